@@ -0,0 +1,130 @@
+from typing import List
+from dataclasses import dataclass
+import random
+
+from django.db import transaction
+
+from restapi.models.product.type import ProductType
+from restapi.models.product.category import ProductCategory
+from restapi.models.product.currency import Currency
+from restapi.models.product.base import BaseProduct
+from restapi.models.product.product import Product
+from restapi.models.user import User
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CatalogScale:
+    categories: int = 10
+    base_products: int = 200
+    variations: int = 3  # products per base product
+    users: int = 50
+    out_of_stock_ratio: float = .1
+    seed: int = 4
+
+
+@dataclass
+class SeededCatalog:
+    product_ids: List[int]
+    user_ids: List[int]
+
+
+class CatalogSeeder:
+    """
+    Seeds a synthetic catalog (product types, currencies, categories,
+    products and users) for benchmarks. It must only be run against a
+    throwaway database.
+    """
+
+    product_types = ["game-pc-steam", "game-pc-epic", "game-pc-ubisoft",
+                     "gift-card", "steam-gem", "steam-tf2"]
+
+    currencies = [("USD", "dollar", 60_000.0), ("TRY", "lira", 1_800.0)]
+
+    def __init__(self, scale: CatalogScale) -> None:
+        self._scale = scale
+        self._random = random.Random(scale.seed)
+
+    def seed(self) -> SeededCatalog:
+        with transaction.atomic():
+            types = self._seedProductTypes()
+            currencies = self._seedCurrencies()
+            categories = self._seedCategories(types)
+            product_ids = self._seedProducts(categories, currencies)
+            user_ids = self._seedUsers()
+
+        logger.info("Benchmark catalog seeded - products: {}, users: {}"
+                    .format(len(product_ids), len(user_ids)))
+
+        return SeededCatalog(product_ids=product_ids, user_ids=user_ids)
+
+    def _seedProductTypes(self) -> List[ProductType]:
+        return [ProductType._default_manager.get_or_create(typename=name)[0]
+                for name in self.product_types]
+
+    def _seedCurrencies(self) -> List[Currency]:
+        currencies = []
+
+        for unit, name, toman_value in self.currencies:
+            currency, _ = Currency._default_manager.update_or_create(
+                unit=unit,
+                defaults={"name": name, "toman_value": toman_value})
+
+            currencies.append(currency)
+
+        return currencies
+
+    def _seedCategories(self,
+                        types: List[ProductType]) -> List[ProductCategory]:
+        categories = [
+            ProductCategory(slug=f"bench-category-{i}",
+                            title=f"Bench category {i}",
+                            brief_description="benchmark category",
+                            product_type=types[i % len(types)])
+            for i in range(self._scale.categories)]
+
+        return ProductCategory._default_manager.bulk_create(categories)
+
+    def _seedProducts(self, categories: List[ProductCategory],
+                      currencies: List[Currency]) -> List[int]:
+
+        base_products = [
+            BaseProduct(slug=f"bench-product-{i}",
+                        title=f"Bench product {i}",
+                        category=categories[i % len(categories)],
+                        brief_description="benchmark product",
+                        description="benchmark product",
+                        cover_image="product/bench/cover.jpg",
+                        cover_image_lq="product/bench/cover_lq.jpg")
+            for i in range(self._scale.base_products)]
+
+        base_products = BaseProduct._default_manager.bulk_create(base_products)
+        products = []
+
+        for base_product in base_products:
+            for _ in range(self._scale.variations):
+                in_stock = (self._random.random() >=
+                            self._scale.out_of_stock_ratio)
+                currency = self._random.choice([None, *currencies])
+
+                products.append(Product(
+                    base_product=base_product,
+                    price_irt=self._random.randrange(50_000, 5_000_000, 1000),
+                    non_rial_currency=currency,
+                    non_rial_value=(self._random.choice([5, 10, 20, 50])
+                                    if currency is not None else None),
+                    stock=self._random.randint(1, 500) if in_stock else 0))
+
+        products = Product._default_manager.bulk_create(
+            products, batch_size=1000)
+
+        return [product.id for product in products]
+
+    def _seedUsers(self) -> List[int]:
+        # Mobile numbers are stored without the leading zero
+        users = [User._default_manager.create(mobile=9_000_000_000 + i)
+                 for i in range(self._scale.users)]
+
+        return [user.id for user in users]
@@ -0,0 +1,86 @@
+from typing import List, Dict
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import itertools
+import threading
+import time
+
+from restapi.base.interface_payment import (IPayment, PaymentStatus,
+                                            VerifiedPaymentResult)
+
+
+class FakeSep(IPayment):
+    """
+    A local stand-in for the Sep gateway. Tokens and reference numbers are
+    generated in memory and every call sleeps for the configured latency to
+    mimic the gateway round trip. As with Sep, verification goes through
+    inquiry, and a payment can only be verified once.
+    """
+
+    def __init__(self, latency_ms: float = 0) -> None:
+        self._latency = latency_ms / 1000
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._payments: Dict[str, int] = {}  # trackid -> amount (rial)
+        self.calls: Dict[str, int] = {"requestPayment": 0,
+                                      "inquiryPayment": 0}
+
+    def requestPayment(self, orderid: str, amount_toman: int,
+                       mobile: int | None = None) -> str | None:
+
+        self._roundTrip("requestPayment")
+
+        with self._lock:
+            token = f"fake-token-{next(self._counter)}"
+            self._payments[token] = amount_toman * 10
+
+        return token
+
+    def getPaymentUrl(self, trackid: str) -> str:
+        return f"http://localhost/fake-sep/{trackid}"
+
+    def isPaymentVerifiable(self, callback_data: Dict,
+                            authorized_cards: List[int] = []) -> PaymentStatus:
+
+        if callback_data.get("State") != "OK":
+            return PaymentStatus.PAYMENTFAILED
+
+        return PaymentStatus.OK
+
+    def verifyPayment(self, trackid: str) -> VerifiedPaymentResult | None:
+        response = self.inquiryPayment(trackid)
+
+        if not response["Success"]:
+            return None
+
+        return VerifiedPaymentResult(
+            paid_amount_rial=response["TransactionDetail"]["AffectiveAmount"],
+            card_number={"first_digits": 603799, "last_digits": 1234})
+
+    def inquiryPayment(self, trackid: str) -> Dict:
+        self._roundTrip("inquiryPayment")
+
+        with self._lock:
+            amount = self._payments.pop(trackid, None)
+
+        if amount is None:
+            return {"Success": False, "ResultCode": -2}
+
+        return {
+            "Success": True,
+            "ResultCode": 0,
+            "TransactionDetail": {
+                "RefNum": trackid,
+                "MaskedPan": "603799******1234",
+                "AffectiveAmount": amount,
+                "StraceDate": datetime.now(ZoneInfo("Asia/Tehran"))
+                .strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        }
+
+    def _roundTrip(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+
+        if self._latency:
+            time.sleep(self._latency)
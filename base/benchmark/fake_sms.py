@@ -0,0 +1,48 @@
+from typing import List, Tuple
+import random
+import threading
+import time
+
+from restapi.base.interface_sms import ISms
+
+
+class FakeSms(ISms):
+    """
+    An in-memory SMS provider which records sent codes. Every request sleeps
+    for the configured latency, and batch sending can be disabled to test
+    providers without a batch API. With failure_rate, that share of the
+    requests returns a 500 status without raising.
+    """
+
+    def __init__(self, latency_ms: float = 0, batch: bool = True,
+                 failure_rate: float = 0) -> None:
+        self._latency = latency_ms / 1000
+        self._failure_rate = failure_rate
+        self._random = random.Random(7)
+        self._lock = threading.Lock()
+        self.sent: List[Tuple[int, str]] = []
+        self.failed: List[Tuple[int, str]] = []
+        self.requests = 0
+
+        if not batch:
+            self.sendOtpBatch = None
+
+    def sendOtp(self, mobile: int, code: str) -> int:
+        return self._request([(mobile, code)])
+
+    def sendOtpBatch(self, messages: List[Tuple[int, str]]) -> int:
+        return self._request(messages)
+
+    def _request(self, messages: List[Tuple[int, str]]) -> int:
+        if self._latency:
+            time.sleep(self._latency)
+
+        with self._lock:
+            self.requests += 1
+
+            if self._random.random() < self._failure_rate:
+                self.failed.extend(messages)
+                return 500
+
+            self.sent.extend(messages)
+            return 200
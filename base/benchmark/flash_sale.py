@@ -0,0 +1,83 @@
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from django.db import connection
+
+from restapi.base.benchmark.runner import EndpointStats, OrderViewClient
+from restapi.base.rate_limiter import RateLimiter
+from restapi.models.user import User
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class FlashSaleBenchmark:
+    """
+    All users submit a cart containing the same product at once. Latency is
+    measured from submitting the cart until its final result, so with
+    admission control it includes polling the ticket.
+    """
+
+    def __init__(self, product_id: int, user_ids: List[int],
+                 concurrency: int = 64, poll_interval: float = .01) -> None:
+
+        self._product_id = product_id
+        self._user_ids = user_ids
+        self._concurrency = concurrency
+        self._poll_interval = poll_interval
+        self._client = OrderViewClient()
+        self._stats = EndpointStats()
+        self._lock = threading.Lock()
+
+    def run(self) -> Dict:
+        barrier = threading.Barrier(min(self._concurrency,
+                                        len(self._user_ids)))
+
+        # each mode runs on a fresh database with the same user ids, so the
+        # buckets of the previous mode would still apply
+        RateLimiter.getInstance().reset()
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self._concurrency) as executor:
+            for _ in executor.map(lambda user_id: self._buy(user_id, barrier),
+                                  self._user_ids):
+                pass
+
+        summary = self._stats.summary(time.perf_counter() - start)
+        summary["orders_submitted"] = self._stats.status.get(201, 0)
+
+        return summary
+
+    def _buy(self, user_id: int, barrier: threading.Barrier) -> None:
+        try:
+            user = User._default_manager.get(id=user_id)
+
+            try:
+                barrier.wait(timeout=5)
+            except threading.BrokenBarrierError:
+                pass
+
+            start = time.perf_counter()
+
+            response = self._client.call(
+                "submit-cart", user, "post",
+                {"order_list": [{"id": self._product_id, "count": 1}]})
+
+            if response.status_code == 202:
+                ticket = response.data["ticket"]
+
+                while response.status_code == 202:
+                    time.sleep(self._poll_interval)
+                    response = self._client.call("get-cart-ticket", user,
+                                                 "get", {"ticket": ticket})
+
+            with self._lock:
+                self._stats.record(time.perf_counter() - start, 0,
+                                   response.status_code)
+        except Exception as e:
+            logger.error("Flash sale buyer failed - uid: {}, {}"
+                         .format(user_id, e))
+        finally:
+            connection.close()
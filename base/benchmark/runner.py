@@ -0,0 +1,269 @@
+from typing import List, Dict, Callable
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+import math
+import random
+import threading
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from restapi.base.interface_payment import IPayment
+from restapi.base.rate_limiter import RateLimiter
+from restapi.models.user import User
+from restapi.views.order import Order
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# Sample payloads for the requirement submission endpoints
+REQUIREMENT_PAYLOADS = {
+    "steam-tradelink": {
+        "tradelink": ("https://steamcommunity.com/tradeoffer/new/"
+                      "?partner=1&token=bench")
+    },
+    "steam-user-pass-backup": {
+        "username": "bench", "password": "bench-pass", "backup_code": "B3NCH"
+    },
+    "epic-email-pass": {"email": "bench@example.com", "password": "bench"},
+    "ubisoft-email-pass": {"email": "bench@example.com", "password": "bench"},
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """nearest-rank percentile of an unsorted list"""
+
+    if not values:
+        return 0.
+
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    status: Dict[int, int] = field(default_factory=dict)
+
+    def record(self, latency: float, queries: int, status_code: int) -> None:
+        self.latencies.append(latency)
+        self.queries.append(queries)
+        self.status[status_code] = self.status.get(status_code, 0) + 1
+
+    def summary(self, wall_seconds: float) -> Dict:
+        count = len(self.latencies)
+
+        return {
+            "requests": count,
+            "errors": sum(n for code, n in self.status.items() if code >= 500),
+            "status": {str(code): n
+                       for code, n in sorted(self.status.items())},
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 3),
+            "throughput_rps": (round(count / wall_seconds, 2)
+                               if wall_seconds else 0),
+            "queries_per_request": (round(sum(self.queries) / count, 2)
+                                    if count else 0),
+        }
+
+
+def client_ip(user_id: int) -> str:
+    """
+    A distinct private address per simulated user, so that users don't share
+    the per-IP rate limit buckets the way they would all sharing 127.0.0.1
+    """
+
+    return "10.{}.{}.{}".format((user_id >> 16) & 255, (user_id >> 8) & 255,
+                                user_id & 255)
+
+
+class OrderViewClient:
+    """
+    calls the Order view in-process as an authenticated user, from the
+    user's own client IP
+    """
+
+    def __init__(self) -> None:
+        self._factory = APIRequestFactory()
+        self._view = Order.as_view()
+
+    def call(self, method: str, user: User, http_method: str,
+             data: Dict | None = None):
+
+        path = f"/order/{method}"
+        ip = client_ip(user.id)
+
+        if http_method == "get":
+            request = self._factory.get(path, data, REMOTE_ADDR=ip)
+        else:
+            request = self._factory.post(path, data, format="json",
+                                         REMOTE_ADDR=ip)
+
+        force_authenticate(request, user=user, token="benchmark")
+        response = self._view(request, method=method)
+
+        if hasattr(response, "render"):
+            response.render()
+
+        return response
+
+
+class CheckoutBenchmark:
+    """
+    Drives the Order view with concurrent simulated users. Each session
+    fetches cart details, submits a cart, polls the unpaid order details,
+    submits the requested requirements and finally requests a payment token
+    from the (fake) gateway.
+    """
+
+    def __init__(self, product_ids: List[int], user_ids: List[int],
+                 gateway: IPayment, sessions_per_user: int = 1,
+                 cart_size: int = 2, detail_reads: int = 3,
+                 concurrency: int = 8, seed: int = 4) -> None:
+
+        self._product_ids = product_ids
+        self._user_ids = user_ids
+        self._gateway = gateway
+        self._sessions_per_user = sessions_per_user
+        self._cart_size = cart_size
+        self._detail_reads = detail_reads
+        self._concurrency = concurrency
+        self._seed = seed
+
+        self._client = OrderViewClient()
+        self._stats: Dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def run(self) -> Dict:
+        jobs = [(user_id, self._seed + i)
+                for i, user_id in enumerate(
+                    self._user_ids * self._sessions_per_user)]
+
+        # user ids repeat across throwaway databases, and so would their
+        # buckets
+        RateLimiter.getInstance().reset()
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self._concurrency) as executor:
+            for _ in executor.map(lambda job: self._session(*job), jobs):
+                pass
+
+        wall_seconds = time.perf_counter() - start
+
+        return {
+            "config": {
+                "products": len(self._product_ids),
+                "users": len(self._user_ids),
+                "sessions_per_user": self._sessions_per_user,
+                "cart_size": self._cart_size,
+                "detail_reads": self._detail_reads,
+                "concurrency": self._concurrency,
+            },
+            "wall_seconds": round(wall_seconds, 3),
+            "endpoints": {name: stats.summary(wall_seconds)
+                          for name, stats in sorted(self._stats.items())},
+        }
+
+    def _session(self, user_id: int, seed: int) -> None:
+        rnd = random.Random(seed)
+
+        try:
+            user = User._default_manager.get(id=user_id)
+            cart = rnd.sample(self._product_ids,
+                              min(self._cart_size, len(self._product_ids)))
+
+            self._call("get-cart-details", user, "get",
+                       {"product_ids": cart})
+
+            response = self._call(
+                "submit-cart", user, "post",
+                {"order_list": [{"id": product_id, "count": 1}
+                                for product_id in cart]})
+
+            if response.status_code != 201:
+                return
+
+            for _ in range(self._detail_reads):
+                response = self._call("get-unpaid-order-details", user, "get")
+
+            if response.status_code != 200:
+                return
+
+            for req in response.data["requirements"]:
+                payload = REQUIREMENT_PAYLOADS.get(req["requirement"])
+
+                if payload is not None:
+                    self._call(f"submit-{req['requirement']}", user, "post",
+                               payload, stats_name="submit-requirement")
+
+            self._timed("sep-request-payment", lambda: self._gateway
+                        .requestPayment(f"bench-{user.id}",
+                                        response.data["price"]))
+        except Exception as e:
+            logger.error("Benchmark session failed - uid: {}, {}"
+                         .format(user_id, e))
+        finally:
+            connection.close()
+
+    def _call(self, method: str, user: User, http_method: str,
+              data: Dict | None = None, stats_name: str | None = None):
+
+        return self._timed(stats_name or method, lambda: self._client.call(
+            method, user, http_method, data))
+
+    def _timed(self, name: str, func: Callable):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+
+        status_code = getattr(result, "status_code", 200)
+
+        with self._lock:
+            self._stats.setdefault(name, EndpointStats()) \
+                .record(elapsed, len(ctx.captured_queries), status_code)
+
+        return result
+
+
+def compare_with_baseline(report: Dict, baseline: Dict,
+                          tolerance: float = .2) -> List[str]:
+    """
+    Returns a description of every regression compared to the baseline.
+    Latency and throughput may drift by the given tolerance, whereas query
+    counts are deterministic and are compared exactly.
+    """
+
+    regressions = []
+
+    for name, base in baseline.get("endpoints", {}).items():
+        current = report["endpoints"].get(name)
+
+        if current is None:
+            regressions.append(f"{name}: endpoint missing from the run")
+            continue
+
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if current[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {current[key]} > "
+                                   f"{base[key]} (+{tolerance:.0%})")
+
+        min_throughput = base["throughput_rps"] * (1 - tolerance)
+
+        if current["throughput_rps"] < min_throughput:
+            regressions.append(f"{name}: throughput_rps "
+                               f"{current['throughput_rps']} < "
+                               f"{base['throughput_rps']} (-{tolerance:.0%})")
+
+        if current["queries_per_request"] > base["queries_per_request"]:
+            regressions.append(f"{name}: queries_per_request "
+                               f"{current['queries_per_request']} > "
+                               f"{base['queries_per_request']}")
+
+    return regressions
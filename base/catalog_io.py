@@ -0,0 +1,319 @@
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import csv
+import json
+
+from django.db import transaction
+
+from restapi.base.service.repricing import calc_effective_price
+from restapi.base.shop.checkout_cache import CheckoutSnapshotCache
+from restapi.base.shop.stock_events import publish_product_stocks
+from restapi.models.product.base import BaseProduct
+from restapi.models.product.currency import Currency
+from restapi.models.product.product import Product
+from restapi.models.product.type import ProductType
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# Columns of imported and exported files. Products are matched by id; rows
+# without an id create new products. Related objects are referenced by
+# natural keys: the base product slug, currency unit and product type name.
+CATALOG_FIELDS = ["id", "base_product", "price_irt", "non_rial_currency",
+                  "non_rial_value", "product_type", "stock", "variation"]
+
+
+@dataclass
+class InvalidRow:
+    """a line that couldn't be parsed, reported like any other invalid row"""
+
+    reason: str
+
+
+def read_rows(stream: TextIO,
+              fmt: str) -> Iterator[Tuple[int, Dict | InvalidRow]]:
+    """incrementally parses a CSV or JSONL stream into (line, row) pairs"""
+
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items()
+                                    if key in CATALOG_FIELDS}
+    else:
+        for line_num, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+
+            try:
+                yield line_num, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_num, InvalidRow(f"invalid JSON - {e}")
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    last_line: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+class CatalogImporter:
+    """
+    Applies catalog rows in chunks, each chunk in its own transaction using
+    bulk_update/bulk_create, and invalidates price caches once per committed
+    chunk. Invalid rows are reported and skipped. Since chunks are committed
+    independently, an interrupted import can resume from the line after the
+    last committed one.
+    """
+
+    def __init__(self, chunk_size: int = 1000, dry_run: bool = False) -> None:
+        self._chunk_size = chunk_size
+        self._dry_run = dry_run
+        self._currencies = dict(Currency._default_manager
+                                .values_list("unit", "toman_value"))
+        self._product_types = dict(ProductType._default_manager
+                                   .values_list("typename", "id"))
+
+    def run(self, rows: Iterable[Tuple[int, Dict]],
+            start_line: int = 0, on_chunk=None) -> ImportResult:
+
+        result = ImportResult()
+        chunk: List[Tuple[int, Dict]] = []
+
+        for line_num, row in rows:
+            if line_num < start_line:
+                continue
+
+            chunk.append((line_num, row))
+
+            if len(chunk) == self._chunk_size:
+                self._applyChunk(chunk, result)
+                chunk = []
+
+                if on_chunk is not None:
+                    on_chunk(result)
+
+        if chunk:
+            self._applyChunk(chunk, result)
+
+            if on_chunk is not None:
+                on_chunk(result)
+
+        return result
+
+    def _applyChunk(self, chunk: List[Tuple[int, Dict]],
+                    result: ImportResult) -> None:
+
+        slugs = {row["base_product"] for _, row in chunk
+                 if isinstance(row, dict) and
+                 isinstance(row.get("base_product"), str)}
+        base_products = dict(BaseProduct._default_manager
+                             .filter(slug__in=slugs)
+                             .values_list("slug", "id"))
+
+        parsed: List[Tuple[int, Dict]] = []
+
+        for line_num, row in chunk:
+            try:
+                parsed.append((line_num, self._parseRow(row, base_products)))
+            except (ValueError, TypeError) as e:
+                result.errors.append(f"line {line_num}: {e}")
+
+        with transaction.atomic():
+            ids = [values["id"] for _, values in parsed if "id" in values]
+            existing = Product._default_manager.select_for_update() \
+                .in_bulk(ids)
+
+            to_create: List[Product] = []
+            to_update: List[Product] = []
+            update_fields = set()
+
+            for line_num, values in parsed:
+                product_id = values.pop("id", None)
+
+                if product_id is not None:
+                    product = existing.get(product_id)
+
+                    if product is None:
+                        result.errors.append(
+                            f"line {line_num}: product {product_id} not "
+                            "found")
+                        continue
+
+                    for name, value in values.items():
+                        setattr(product, name, value)
+
+                    self._setEffectivePrice(product)
+                    update_fields.update(values)
+                    update_fields.add("effective_price_irt")
+                    to_update.append(product)
+                else:
+                    if ("base_product_id" not in values or
+                            "price_irt" not in values):
+                        result.errors.append(
+                            f"line {line_num}: base_product and price_irt "
+                            "are required for new products")
+                        continue
+
+                    product = Product(**values)
+                    self._setEffectivePrice(product)
+                    to_create.append(product)
+
+            if not self._dry_run:
+                if to_update:
+                    # bulk_update doesn't set auto_now fields
+                    now = datetime.now(timezone.utc)
+
+                    for product in to_update:
+                        product.updated_at = now
+
+                    update_fields.add("updated_at")
+                    Product._default_manager.bulk_update(to_update,
+                                                         list(update_fields))
+
+                if to_create:
+                    Product._default_manager.bulk_create(to_create)
+
+                transaction.on_commit(self._invalidateCaches)
+
+                if "stock" in update_fields:
+                    publish_product_stocks(to_update)
+
+        result.updated += len(to_update)
+        result.created += len(to_create)
+        result.last_line = chunk[-1][0]
+
+    def _parseRow(self, row: Dict | InvalidRow,
+                  base_products: Dict[str, int]) -> Dict:
+
+        if isinstance(row, InvalidRow):
+            raise ValueError(row.reason)
+
+        if not isinstance(row, dict):
+            raise TypeError("row must be an object")
+
+        values: Dict = {}
+
+        # Empty CSV cells leave non-nullable fields unchanged and set nullable
+        # fields to null.
+        def present(name):
+            return row.get(name) not in (None, "")
+
+        if present("id"):
+            values["id"] = int(row["id"])
+
+        if present("base_product"):
+            if row["base_product"] not in base_products:
+                raise ValueError(
+                    f"unknown base product {row['base_product']}")
+
+            values["base_product_id"] = base_products[row["base_product"]]
+
+        if present("price_irt"):
+            values["price_irt"] = int(row["price_irt"])
+
+            if values["price_irt"] < 0:
+                raise ValueError("price_irt cannot be negative")
+
+        if "non_rial_currency" in row:
+            unit = row["non_rial_currency"] or None
+
+            if unit is not None and unit not in self._currencies:
+                raise ValueError(f"unknown currency {unit}")
+
+            values["non_rial_currency_id"] = unit
+
+        if "non_rial_value" in row:
+            values["non_rial_value"] = (float(row["non_rial_value"])
+                                        if present("non_rial_value")
+                                        else None)
+
+        if (values.get("non_rial_currency_id") is not None and
+                values.get("non_rial_value") is None):
+            raise ValueError("non_rial_value is required with a currency")
+
+        if "product_type" in row:
+            typename = row["product_type"] or None
+
+            if typename is not None and typename not in self._product_types:
+                raise ValueError(f"unknown product type {typename}")
+
+            values["product_type_id"] = (self._product_types[typename]
+                                         if typename is not None else None)
+
+        if present("stock"):
+            values["stock"] = int(row["stock"])
+
+        if "variation" in row:
+            variation = row["variation"]
+
+            if isinstance(variation, str):
+                variation = json.loads(variation) if variation else None
+
+            values["variation"] = variation
+
+        return values
+
+    def _setEffectivePrice(self, product: Product) -> None:
+        # bulk operations bypass the pre_save signal of the repricing service
+        product.effective_price_irt = calc_effective_price(
+            product.price_irt, product.non_rial_value,
+            self._currencies.get(product.non_rial_currency_id))
+
+    def _invalidateCaches(self) -> None:
+        CheckoutSnapshotCache.getInstance().invalidateAll()
+
+
+class CatalogExporter:
+    """writes the catalog in id order, reading it in chunks"""
+
+    def __init__(self, chunk_size: int = 1000) -> None:
+        self._chunk_size = chunk_size
+
+    def write(self, stream: TextIO, fmt: str) -> int:
+        writer = None
+
+        if fmt == "csv":
+            writer = csv.writer(stream)
+            writer.writerow(CATALOG_FIELDS)
+
+        count = 0
+
+        for row in self._rows():
+            if writer is not None:
+                row["variation"] = (json.dumps(row["variation"],
+                                               ensure_ascii=False)
+                                    if row["variation"] is not None else "")
+                writer.writerow(["" if row[name] is None else row[name]
+                                 for name in CATALOG_FIELDS])
+            else:
+                stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+            count += 1
+
+        return count
+
+    def _rows(self) -> Iterator[Dict]:
+        last_id = 0
+
+        while True:
+            chunk = list(Product._default_manager
+                         .filter(id__gt=last_id)
+                         .order_by("id")
+                         .values_list("id", "base_product__slug", "price_irt",
+                                      "non_rial_currency_id", "non_rial_value",
+                                      "product_type__typename", "stock",
+                                      "variation")
+                         [:self._chunk_size])
+
+            if not chunk:
+                return
+
+            for values in chunk:
+                yield dict(zip(CATALOG_FIELDS, values))
+
+            last_id = chunk[-1][0]
@@ -0,0 +1,93 @@
+from typing import List
+
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
+from django.conf import settings
+
+from restapi.base.singleton_meta import SingletonMeta
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def get_fernet_keys() -> List[str]:
+    """
+    FERNET_KEYS lists the keys from newest to oldest. The first key encrypts
+    new data and all of them can decrypt. FERNET_KEY is used if it isn't set.
+    """
+
+    return list(getattr(settings, "FERNET_KEYS", None) or
+                [settings.FERNET_KEY])
+
+
+class CryptoService(metaclass=SingletonMeta):
+    """
+    Encrypts stored credentials (e.g. account passwords of order
+    requirements). Keys are loaded once per process, and key rotation doesn't
+    require re-encrypting anything at request time since data encrypted with
+    an older key remains decryptable.
+
+    Stored credentials must be read through this class rather than
+    Crypto(settings.FERNET_KEY), which only knows a single key and can't read
+    data encrypted after a rotation.
+
+    This class is a singleton, so it's advisable to use the getInstance method
+    instead of directly using the constructor
+    """
+
+    def __init__(self) -> None:
+        self._fernet = MultiFernet([Fernet(key)
+                                    for key in get_fernet_keys()])
+
+    @classmethod
+    def getInstance(cls):
+        return cls()
+
+    def encrypt(self, data: str) -> str:
+        return self._fernet.encrypt(data.encode()).decode()
+
+    def decrypt(self, token: str) -> str | None:
+        try:
+            return self._fernet.decrypt(token.encode()).decode()
+        except InvalidToken:
+            logger.error("Token cannot be decrypted with any of the keys")
+            return None
+
+
+# The functions below run in the worker processes of bulk key rotation, where
+# the keys are passed explicitly instead of being read from the settings.
+
+_worker_fernet: MultiFernet | None = None
+_worker_current: Fernet | None = None
+
+
+def init_rotation_worker(keys: List[str]) -> None:
+    global _worker_fernet, _worker_current
+
+    fernets = [Fernet(key) for key in keys]
+    _worker_current = fernets[0]
+    _worker_fernet = MultiFernet(fernets)
+
+
+def rotate_tokens(tokens: List[str]) -> List[str | None]:
+    """
+    Returns the rotated tokens. Tokens already using the current key are
+    returned as they are, and None is returned for undecryptable tokens.
+    """
+
+    assert _worker_fernet is not None and _worker_current is not None
+    rotated: List[str | None] = []
+
+    for token in tokens:
+        try:
+            _worker_current.decrypt(token.encode())
+            rotated.append(token)
+            continue
+        except InvalidToken:
+            pass
+
+        try:
+            rotated.append(_worker_fernet.rotate(token.encode()).decode())
+        except InvalidToken:
+            rotated.append(None)
+
+    return rotated
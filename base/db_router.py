@@ -0,0 +1,82 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_pinned: ContextVar[bool] = ContextVar("pinned_to_primary", default=False)
+_written: ContextVar[bool] = ContextVar("written_to_primary", default=False)
+
+
+def pin_to_primary() -> None:
+    """route the remaining reads of the current request to the primary"""
+    _pinned.set(True)
+
+
+def reset_pinning() -> None:
+    _pinned.set(False)
+    _written.set(False)
+
+
+def has_written() -> bool:
+    return _written.get()
+
+
+@contextmanager
+def use_primary():
+    """
+    Reads inside this block go to the primary, e.g. stock checks whose
+    result must not be stale.
+    """
+
+    token = _pinned.set(True)
+
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Sends catalog reads to one of the DATABASE_REPLICAS aliases; all other
+    models (orders, users, payments, ...) and all writes go to the primary
+    (default) database, since they are read before being written back. Once
+    a request writes, the rest of it reads from the primary
+    (read-your-writes), and so do reads inside transactions.
+    """
+
+    replica_models = {"product", "baseproduct", "productcategory",
+                      "producttype", "currency"}
+
+    def __init__(self) -> None:
+        self._primary = DEFAULT_DB_ALIAS
+        self._replicas = list(getattr(settings, "DATABASE_REPLICAS", []))
+
+    def db_for_read(self, model, **hints) -> str:
+        if (not self._replicas or
+                model._meta.model_name not in self.replica_models or
+                _pinned.get() or
+                _written.get() or
+                connections[self._primary].in_atomic_block):
+
+            return self._primary
+
+        return random.choice(self._replicas)
+
+    def db_for_write(self, model, **hints) -> str:
+        # not a pin: use_primary() resets pins when its block exits
+        _written.set(True)
+        return self._primary
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool | None:
+        databases = {self._primary, *self._replicas}
+
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> bool:
+        return db == self._primary
@@ -0,0 +1,246 @@
+from typing import Any, Dict, List
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import lru_cache
+from pathlib import Path
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import (InvalidToken, TokenError,
+                                                 TokenBackendError)
+from rest_framework_simplejwt.serializers import (TokenObtainPairSerializer,
+                                                  TokenRefreshSerializer)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class JwtKey:
+    kid: str | None
+    algorithm: str
+    signing_key: Any  # prepared key object, None on verification-only hosts
+    verifying_key: Any  # prepared key object
+
+
+def _read_key(config: Dict, name: str) -> str | None:
+    if config.get(name):
+        return config[name]
+
+    path = config.get(f"{name}_file")
+
+    return Path(path).read_text() if path else None
+
+
+def load_key(config: Dict) -> JwtKey:
+    """
+    Builds a key from a JWT_KEYS entry: kid, algorithm and signing_key /
+    verifying_key, each of which may instead be read from a *_file path.
+    Keys are parsed once here rather than on every verification.
+    """
+
+    algorithm = get_default_algorithms()[config["algorithm"]]
+    signing_key = _read_key(config, "signing_key")
+    verifying_key = _read_key(config, "verifying_key")
+
+    if config["algorithm"].startswith("HS"):
+        # symmetric keys sign and verify
+        verifying_key = verifying_key or signing_key
+
+    if verifying_key is None:
+        raise ValueError(f"JWT key {config['kid']} has no verifying key")
+
+    return JwtKey(
+        kid=config["kid"],
+        algorithm=config["algorithm"],
+        signing_key=algorithm.prepare_key(signing_key)
+        if signing_key else None,
+        verifying_key=algorithm.prepare_key(verifying_key))
+
+
+class KeySet:
+    """
+    JWT keys indexed by kid. New tokens are signed with the JWT_SIGNING_KID
+    key and carry its kid in the header, and tokens are verified with the key
+    of their kid, so keys can be rotated by adding a new key, switching
+    JWT_SIGNING_KID and removing the old key once its tokens have expired.
+
+    With asymmetric algorithms (EdDSA, ES256, RS256), hosts that only verify
+    tokens need just the verifying (public) keys.
+
+    Tokens without a kid are verified with the SIMPLE_JWT key only while
+    JWT_ACCEPT_LEGACY_TOKENS is on, which by default it is only when JWT_KEYS
+    isn't configured.
+
+    Only consumers using the key set accept tokens carrying a kid: the Order
+    view (KeySetJWTAuthentication) and the JwtAuthentication middleware.
+    simplejwt's own JWTAuthentication and serializers reject them unless the
+    settings point them at the key set as well:
+
+        SIMPLE_JWT = {
+            "AUTH_TOKEN_CLASSES":
+                ("restapi.base.jwt_keyset.KeySetAccessToken",),
+            "TOKEN_OBTAIN_SERIALIZER":
+                "restapi.base.jwt_keyset.KeySetTokenObtainPairSerializer",
+            "TOKEN_REFRESH_SERIALIZER":
+                "restapi.base.jwt_keyset.KeySetTokenRefreshSerializer",
+        }
+    """
+
+    def __init__(self, keys: List[JwtKey],
+                 signing_kid: str | None = None) -> None:
+        self._keys: Dict[str | None, JwtKey] = {key.kid: key for key in keys}
+        self._signing_kid = signing_kid
+
+    @classmethod
+    def fromSettings(cls) -> "KeySet":
+        configs = getattr(settings, "JWT_KEYS", [])
+        keys = [load_key(config) for config in configs]
+
+        if getattr(settings, "JWT_ACCEPT_LEGACY_TOKENS", not configs):
+            # tokens issued before key ids were introduced have no kid
+            try:
+                keys.append(load_key({
+                    "kid": None,
+                    "algorithm": api_settings.ALGORITHM,
+                    "signing_key": api_settings.SIGNING_KEY,
+                    "verifying_key": api_settings.VERIFYING_KEY,
+                }))
+            except (ValueError, jwt.InvalidKeyError) as e:
+                # e.g. a verification-only host without the SIMPLE_JWT key
+                logger.warning("Tokens without a kid are rejected, the "
+                               "SIMPLE_JWT key is not available - {}"
+                               .format(e))
+
+        return cls(keys, getattr(settings, "JWT_SIGNING_KID", None))
+
+    def getKey(self, kid: str | None) -> JwtKey | None:
+        return self._keys.get(kid)
+
+    def getSigningKey(self) -> JwtKey:
+        key = self._keys.get(self._signing_kid)
+
+        if key is None or key.signing_key is None:
+            raise TokenBackendError(_("No signing key is available"))
+
+        return key
+
+
+class KeySetTokenBackend(TokenBackend):
+    """
+    TokenBackend selecting the key by the token's kid header. Audience,
+    issuer and leeway are applied as by simplejwt's backend.
+    """
+
+    def __init__(self, key_set: KeySet, audience=None, issuer=None,
+                 leeway: float | int | timedelta = 0,
+                 json_encoder=None) -> None:
+
+        # The base class validates a single algorithm and key, which doesn't
+        # apply here; encode() and decode() use the keys of the key set.
+        self._key_set = key_set
+        self.audience = audience
+        self.issuer = issuer
+        self.leeway = leeway
+        self.json_encoder = json_encoder
+
+    def encode(self, payload: Dict[str, Any]) -> str:
+        key = self._key_set.getSigningKey()
+        jwt_payload = payload.copy()
+
+        if self.audience is not None:
+            jwt_payload["aud"] = self.audience
+
+        if self.issuer is not None:
+            jwt_payload["iss"] = self.issuer
+
+        token = jwt.encode(jwt_payload, key.signing_key,
+                           algorithm=key.algorithm,
+                           headers={"kid": key.kid} if key.kid else None,
+                           json_encoder=self.json_encoder)
+
+        if isinstance(token, bytes):
+            return token.decode("utf-8")
+
+        return token
+
+    def decode(self, token: str, verify: bool = True) -> Dict[str, Any]:
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.InvalidTokenError as e:
+            raise TokenBackendError(_("Token is invalid or expired")) from e
+
+        key = self._key_set.getKey(kid)
+
+        if key is None:
+            raise TokenBackendError(_("Token is invalid or expired"))
+
+        try:
+            return jwt.decode(
+                token, key.verifying_key, algorithms=[key.algorithm],
+                audience=self.audience, issuer=self.issuer,
+                leeway=self._getLeeway(),
+                options={"verify_aud": self.audience is not None,
+                         "verify_signature": verify})
+        except jwt.InvalidAlgorithmError as e:
+            raise TokenBackendError(_("Invalid algorithm specified")) from e
+        except jwt.InvalidTokenError as e:
+            raise TokenBackendError(_("Token is invalid or expired")) from e
+
+    def _getLeeway(self) -> timedelta:
+        if isinstance(self.leeway, timedelta):
+            return self.leeway
+
+        return timedelta(seconds=self.leeway or 0)
+
+
+@lru_cache(maxsize=None)
+def get_token_backend() -> KeySetTokenBackend:
+    """the token backend of this process, loaded on first use"""
+
+    return KeySetTokenBackend(KeySet.fromSettings(),
+                              audience=api_settings.AUDIENCE,
+                              issuer=api_settings.ISSUER,
+                              leeway=api_settings.LEEWAY,
+                              json_encoder=api_settings.JSON_ENCODER)
+
+
+class KeySetAccessToken(AccessToken):
+    """
+    Access token verified with the key set. Set it in SIMPLE_JWT's
+    AUTH_TOKEN_CLASSES.
+    """
+
+    def get_token_backend(self) -> TokenBackend:
+        return get_token_backend()
+
+
+class KeySetRefreshToken(RefreshToken):
+    access_token_class = KeySetAccessToken
+
+    def get_token_backend(self) -> TokenBackend:
+        return get_token_backend()
+
+
+class KeySetTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = KeySetRefreshToken
+
+
+class KeySetTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = KeySetRefreshToken
+
+
+class KeySetJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication validating access tokens with the key set"""
+
+    def get_validated_token(self, raw_token: bytes) -> KeySetAccessToken:
+        try:
+            return KeySetAccessToken(raw_token)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
@@ -0,0 +1,39 @@
+from types import ModuleType
+import importlib
+import sys
+
+
+class _LazyModule(ModuleType):
+    """stands in for a module until one of its attributes is accessed"""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def __getattr__(self, attr: str):
+        module = self.__dict__["_module"]
+
+        if module is None:
+            # import_module waits for a module another thread is executing,
+            # so no thread sees it half-executed
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+
+        return getattr(module, attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Returns a stand-in for the module that imports it on first attribute
+    access. Meant for heavy modules that most workers rarely or never use
+    (e.g. HTTP clients of third-party gateways), so they don't slow down
+    worker startup.
+
+    importlib's LazyLoader isn't used since it's only thread-safe as of
+    Python 3.12.3; the module is imported normally instead, just later.
+    """
+
+    if name in sys.modules:
+        return sys.modules[name]
+
+    return _LazyModule(name)
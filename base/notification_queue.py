@@ -0,0 +1,234 @@
+from typing import Callable, Dict, List, Tuple
+from collections import deque
+from dataclasses import dataclass
+import heapq
+import queue
+import threading
+import time
+
+from django.conf import settings
+
+from restapi.base.interface_sms import ISms
+from restapi.base.token_bucket import TokenBucket
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OtpMessage:
+    mobile: int
+    code: str
+    enqueued_at: float
+    not_before: float = 0
+
+
+class OtpDispatchQueue:
+    """
+    Sends OTP codes from worker threads instead of the request thread.
+
+    - Sends are rate limited per SMS provider (handler class) with a token
+      bucket.
+    - Up to OTP_QUEUE_BATCH_SIZE messages are sent in a single request if the
+      handler provides a sendOtpBatch method accepting a list of
+      (mobile, code).
+    - If a message for a mobile number is still queued, a new request
+      replaces its code. Once a code has been sent, the next one for that
+      number is held back until OTP_DEDUPE_WINDOW seconds have passed, and
+      requests in the meantime replace its code. The latest requested code
+      is therefore always the one delivered, while a number gets at most one
+      SMS per window.
+
+    Settings: OTP_QUEUE_WORKERS, OTP_QUEUE_RATE (messages per second),
+    OTP_QUEUE_BURST, OTP_QUEUE_BATCH_SIZE and OTP_DEDUPE_WINDOW.
+    """
+
+    def __init__(self, get_sms_handler: Callable[[], ISms]) -> None:
+        self._get_sms_handler = get_sms_handler
+        self._workers = getattr(settings, "OTP_QUEUE_WORKERS", 2)
+        self._rate = getattr(settings, "OTP_QUEUE_RATE", 20)
+        self._burst = getattr(settings, "OTP_QUEUE_BURST", 40)
+        self._batch_size = getattr(settings, "OTP_QUEUE_BATCH_SIZE", 50)
+        self._dedupe_window = getattr(settings, "OTP_DEDUPE_WINDOW", 60)
+
+        self._queue: queue.Queue[int] = queue.Queue()
+        self._pending: Dict[int, OtpMessage] = {}
+        # heap of (not_before, mobile) of messages held back by the window
+        self._delayed: List[Tuple[float, int]] = []
+        self._sent_at: Dict[int, float] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._delayed_changed = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+
+        self._latencies: deque[float] = deque(maxlen=1000)
+        self._counters = {"queued": 0, "coalesced": 0, "deferred": 0,
+                          "sent": 0, "failed": 0}
+
+    def enqueue(self, mobile: int, code: str) -> None:
+        now = time.monotonic()
+
+        with self._lock:
+            pending = self._pending.get(mobile)
+
+            if pending is not None:
+                pending.code = code
+                self._counters["coalesced"] += 1
+                return
+
+            message = OtpMessage(mobile, code, now)
+            self._pending[mobile] = message
+            self._counters["queued"] += 1
+            self._startWorkers()
+
+            sent_at = self._sent_at.get(mobile)
+
+            if sent_at is not None and now - sent_at < self._dedupe_window:
+                message.not_before = sent_at + self._dedupe_window
+                heapq.heappush(self._delayed, (message.not_before, mobile))
+                self._counters["deferred"] += 1
+                self._delayed_changed.notify()
+                return
+
+        self._queue.put(mobile)
+
+    def getMetrics(self) -> Dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            metrics: Dict = dict(self._counters)
+            metrics["delayed"] = len(self._delayed)
+
+        metrics["queue_size"] = self._queue.qsize()
+
+        for name, pct in (("latency_p50_ms", .5), ("latency_p95_ms", .95),
+                          ("latency_max_ms", 1)):
+            if latencies:
+                latency = latencies[int(pct * (len(latencies) - 1))]
+                metrics[name] = round(latency * 1000, 1)
+            else:
+                metrics[name] = None
+
+        return metrics
+
+    def _startWorkers(self) -> None:
+        # the lock is held by the caller
+        if self._threads:
+            return
+
+        for i in range(self._workers):
+            thread = threading.Thread(target=self._run, daemon=True,
+                                      name=f"otp-dispatch-{i}")
+            thread.start()
+            self._threads.append(thread)
+
+        thread = threading.Thread(target=self._runScheduler, daemon=True,
+                                  name="otp-dispatch-scheduler")
+        thread.start()
+        self._threads.append(thread)
+
+    def _runScheduler(self) -> None:
+        """queues held-back messages once their dedupe window has passed"""
+
+        while True:
+            with self._delayed_changed:
+                while True:
+                    now = time.monotonic()
+
+                    if self._delayed and self._delayed[0][0] <= now:
+                        _, mobile = heapq.heappop(self._delayed)
+                        break
+
+                    self._delayed_changed.wait(
+                        self._delayed[0][0] - now if self._delayed else None)
+
+            self._queue.put(mobile)
+
+    def _run(self) -> None:
+        while True:
+            mobiles = [self._queue.get()]
+
+            while len(mobiles) < self._batch_size:
+                try:
+                    mobiles.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self._lock:
+                messages = [self._pending.pop(mobile) for mobile in mobiles]
+
+            try:
+                self._send(messages)
+            except Exception as e:
+                logger.error(e)
+
+    def _send(self, messages: List[OtpMessage]) -> None:
+        sms_handler = self._get_sms_handler()
+        bucket = self._getBucket(sms_handler)
+        send_batch = getattr(sms_handler, "sendOtpBatch", None)
+
+        if send_batch is not None:
+            bucket.consume()  # a batch counts as a single provider request
+
+            try:
+                status = send_batch([(msg.mobile, msg.code)
+                                     for msg in messages])
+                self._record(messages, self._isSuccess(status, messages))
+            except Exception as e:
+                logger.error("Sending {} OTP codes failed - {}"
+                             .format(len(messages), e))
+                self._record(messages, False)
+
+            return
+
+        for msg in messages:
+            bucket.consume()
+
+            try:
+                status = sms_handler.sendOtp(msg.mobile, msg.code)
+                self._record([msg], self._isSuccess(status, [msg]))
+            except Exception as e:
+                logger.error("Sending OTP code to mobile number {} failed - {}"
+                             .format(msg.mobile, e))
+                self._record([msg], False)
+
+    def _isSuccess(self, status, messages: List[OtpMessage]) -> bool:
+        """
+        Handlers return the provider's status code; anything other than a
+        2xx code (or True) is a failure, which doesn't start the dedupe
+        window, so a retry is sent right away.
+        """
+
+        if status is True or (type(status) is int and 200 <= status < 300):
+            return True
+
+        logger.error("Sending OTP codes to {} failed - status: {}"
+                     .format([msg.mobile for msg in messages], status))
+
+        return False
+
+    def _getBucket(self, sms_handler: ISms) -> TokenBucket:
+        provider = type(sms_handler).__name__
+
+        with self._lock:
+            if provider not in self._buckets:
+                self._buckets[provider] = TokenBucket(self._rate, self._burst)
+
+            return self._buckets[provider]
+
+    def _record(self, messages: List[OtpMessage], success: bool) -> None:
+        now = time.monotonic()
+
+        with self._lock:
+            for msg in messages:
+                if success:
+                    self._sent_at[msg.mobile] = now
+                    self._latencies.append(now - msg.enqueued_at)
+
+            self._counters["sent" if success else "failed"] += len(messages)
+
+            # forget numbers whose dedupe window has passed
+            if len(self._sent_at) > 10_000:
+                self._sent_at = {
+                    mobile: sent_at
+                    for mobile, sent_at in self._sent_at.items()
+                    if now - sent_at < self._dedupe_window}
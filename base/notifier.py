@@ -1,4 +1,7 @@
+from typing import Dict
+
 from restapi.base.interface_sms import ISms
+from restapi.base.notification_queue import OtpDispatchQueue
 from restapi.base.singleton_defaults import get_default_sms_handler
 from restapi.base.singleton_meta import SingletonMeta
 
@@ -14,16 +17,28 @@ class Notifier(metaclass=SingletonMeta):
 
     def __init__(self) -> None:
         self._sms_handler: ISms = get_default_sms_handler()
+        self._otp_queue = OtpDispatchQueue(lambda: self._sms_handler)
 
     @classmethod
     def getInstance(cls):
         return cls()
 
     def sendOtpToMobile(self, mobile: int, code: str) -> int:
+        """
+        The code is sent from a background worker, so a slow SMS provider
+        doesn't block the request, and 200 is returned once it's queued.
+        Failed sends are logged and counted in getOtpQueueMetrics().
+        """
+
         logger.info("OTP code {} has been requested for mobile number {}"
                     .format(code, mobile))
 
-        return self._sms_handler.sendOtp(mobile, code)
+        self._otp_queue.enqueue(mobile, code)
+
+        return 200
+
+    def getOtpQueueMetrics(self) -> Dict:
+        return self._otp_queue.getMetrics()
 
     def setSmsHandler(self, sms_handler: ISms) -> None:
         self._sms_handler = sms_handler
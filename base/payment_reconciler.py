@@ -0,0 +1,160 @@
+from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db import connection
+
+from restapi.base.interface_payment import IPayment, VerifiedPaymentResult
+from restapi.base.service.payment_service import PaymentService
+from restapi.base.token_bucket import TokenBucket
+from restapi.models import SepPayment
+from restapi.models.sep import SepPaymentAttempt
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReconcileReport:
+    settled: int = 0
+    flagged: int = 0
+    expired: int = 0  # not verified within the verification window
+    retry: int = 0  # not verified yet, tried again in the next run
+
+
+class PaymentReconciler:
+    """
+    Completes the payments whose callback arrived (and passed the card check)
+    but whose verification never completed, e.g. because the callback request
+    timed out on the user's side.
+
+    Payments are verified the way the callback verifies them, by the
+    gateway's verifyPayment, concurrently in a bounded thread pool with a
+    token bucket capping the request rate and without holding any database
+    locks. Verified payments are then completed by PaymentService, as in the
+    callback. Verification refuses payments that were already verified, so a
+    payment verified by the callback in the meantime isn't captured twice.
+
+    Attempts without a callback (PENDING) carry no RefNum, which only the
+    callback provides, so they can't be inquired. Like CALLBACK attempts that
+    can't be verified, they are flagged once the verification window passes;
+    the gateway reverses the unverified transactions.
+    """
+
+    def __init__(self, gateway: IPayment, workers: int = 4,
+                 rate: float = 5, batch_size: int = 200,
+                 grace_seconds: int = 120) -> None:
+
+        self._gateway = gateway
+        self._payment_service = PaymentService()
+        self._workers = workers
+        self._bucket = TokenBucket(rate, max(1, workers))
+        self._batch_size = batch_size
+        self._grace = timedelta(seconds=grace_seconds)
+        self._window = timedelta(seconds=getattr(
+            settings, "PAYMENT_VERIFY_WINDOW", 3600))
+
+    def run(self) -> ReconcileReport:
+        report = ReconcileReport()
+        now = datetime.now(timezone.utc)
+
+        report.expired = self._flagExpired(now)
+
+        last_id = 0
+
+        with ThreadPoolExecutor(max_workers=self._workers) as pool:
+            while True:
+                attempts = list(
+                    SepPaymentAttempt._default_manager
+                    .filter(state=SepPaymentAttempt.State.CALLBACK,
+                            id__gt=last_id,
+                            callback_at__lt=now - self._grace,
+                            created_at__gt=now - self._window)
+                    .exclude(refnum=None)
+                    .order_by("id")[:self._batch_size])
+
+                if not attempts:
+                    break
+
+                self._reconcileBatch(pool, attempts, report)
+                last_id = attempts[-1].id
+
+        return report
+
+    def _flagExpired(self, now: datetime) -> int:
+        """attempts that can no longer be verified"""
+
+        return (SepPaymentAttempt._default_manager
+                .filter(state__in=[SepPaymentAttempt.State.PENDING,
+                                   SepPaymentAttempt.State.CALLBACK],
+                        created_at__lte=now - self._window)
+                .update(state=SepPaymentAttempt.State.FLAGGED,
+                        note="not verified within the verification window"))
+
+    def _reconcileBatch(self, pool: ThreadPoolExecutor,
+                        attempts: List[SepPaymentAttempt],
+                        report: ReconcileReport) -> None:
+
+        verified = set(SepPayment._default_manager
+                       .filter(refnum__in=[a.refnum for a in attempts])
+                       .values_list("refnum", flat=True))
+
+        pending = []
+
+        for attempt in attempts:
+            if attempt.refnum in verified:
+                # the verification result is gone, so it can't be completed;
+                # the state is checked again in case it was completed since
+                report.flagged += SepPaymentAttempt._default_manager \
+                    .filter(id=attempt.id,
+                            state=SepPaymentAttempt.State.CALLBACK) \
+                    .update(state=SepPaymentAttempt.State.FLAGGED,
+                            note="verified but not completed")
+
+                logger.warning("Payment {} of order {} was verified but not "
+                               "completed".format(attempt.refnum,
+                                                  attempt.orderid))
+            else:
+                pending.append(attempt)
+
+        results = pool.map(self._verify, [a.refnum for a in pending])
+
+        for attempt, result in zip(pending, results):
+            if result is None:
+                report.retry += 1
+                continue
+
+            try:
+                completed = self._payment_service.completePayment(
+                    attempt.refnum, result)
+            except Exception as e:
+                logger.error("Completing payment {} failed - {}"
+                             .format(attempt.refnum, e))
+                completed = False
+
+            if completed:
+                report.settled += 1
+            else:
+                report.flagged += 1
+
+    def _verify(self, refnum: str) -> VerifiedPaymentResult | None:
+        self._bucket.consume()
+
+        try:
+            return self._gateway.verifyPayment(refnum)
+        except Exception as e:
+            logger.error("Verifying payment {} failed - {}"
+                         .format(refnum, e))
+            return None
+        finally:
+            # the gateway checks for duplicates with this thread's connection
+            connection.close()
+
+
+def summarize(report: ReconcileReport) -> Tuple[str, ...]:
+    return (f"settled: {report.settled}",
+            f"flagged: {report.flagged}",
+            f"expired: {report.expired}",
+            f"retry later: {report.retry}")
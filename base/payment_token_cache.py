@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+
+class PaymentTokenCache:
+    """
+    Keeps the last payment token requested for each order, so repeated
+    payment attempts for the same order, amount and mobile number reuse a
+    still valid token instead of requesting a new one from the gateway. The
+    TTL must not exceed the gateway's token lifetime.
+
+    A token is dropped once a payment callback for the order arrives (the
+    token may have been used) and when the order is deleted. A different
+    amount, e.g. after a price change, never matches the cached token.
+    """
+
+    def __init__(self, gateway: str, ttl: int) -> None:
+        self._gateway = gateway
+        self._ttl = ttl
+
+    def get(self, orderid: str, amount_toman: int,
+            mobile: int | None) -> str | None:
+
+        entry = cache.get(_key(orderid))
+
+        if (entry is None or
+                entry["gateway"] != self._gateway or
+                entry["amount"] != amount_toman or
+                entry["mobile"] != mobile):
+            return None
+
+        return entry["token"]
+
+    def set(self, orderid: str, amount_toman: int, mobile: int | None,
+            token: str) -> None:
+
+        cache.set(_key(orderid), {
+            "gateway": self._gateway,
+            "amount": amount_toman,
+            "mobile": mobile,
+            "token": token,
+        }, timeout=self._ttl)
+
+    @staticmethod
+    def invalidate(orderid: str) -> None:
+        cache.delete(_key(orderid))
+
+
+def _key(orderid: str) -> str:
+    return f"payment-token:{orderid}"
+
+
+@receiver(post_delete, sender="restapi.Order")
+def _invalidate_order_token(sender, instance, **kwargs):
+    PaymentTokenCache.invalidate(str(instance.id))
@@ -0,0 +1,173 @@
+from typing import Dict, List, Tuple
+from collections import OrderedDict
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from ipware import get_client_ip
+from rest_framework.throttling import BaseThrottle
+
+from restapi.base.singleton_meta import SingletonMeta
+from restapi.base.token_bucket import TokenBucket
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter(metaclass=SingletonMeta):
+    """
+    Token-bucket rate limiter for API methods. Limits are configured per
+    method name in RATE_LIMITS as (tokens per second, burst); the "default"
+    entry applies to methods without their own limit.
+
+    Buckets are kept in process memory by default. With RATE_LIMIT_SHARED,
+    they are kept in the Django cache (as GCRA timestamps) so the limits hold
+    across workers. The shared mode doesn't lock, so concurrent requests may
+    slightly exceed a limit.
+
+    This class is a singleton, so it's advisable to use the getInstance method
+    instead of directly using the constructor
+    """
+
+    default_limits = {
+        "submit-cart": (.5, 5),
+        "default": (1, 10),
+    }
+
+    max_local_buckets = 100_000
+
+    def __init__(self) -> None:
+        self._limits: Dict[str, Tuple[float, float]] = dict(
+            self.default_limits)
+        self._limits.update(getattr(settings, "RATE_LIMITS", {}))
+        self._shared = getattr(settings, "RATE_LIMIT_SHARED", False)
+
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def getInstance(cls):
+        return cls()
+
+    def check(self, method: str, keys: List[str]) -> float:
+        """
+        Consumes a token of each key for the method, but only if all of them
+        have one. Returns 0 if the request is allowed, otherwise the seconds
+        to wait before retrying.
+        """
+
+        if method not in self._limits:
+            # arbitrary method names must not create buckets of their own
+            method = "default"
+
+        limit = self._limits.get(method)
+
+        if limit is None or not keys:
+            return 0
+
+        rate, burst = limit
+        bucket_keys = [f"rate-limit:{method}:{key}" for key in keys]
+
+        if self._shared:
+            return self._checkShared(bucket_keys, rate, burst)
+
+        return self._checkLocal(bucket_keys, rate, burst)
+
+    def reset(self) -> None:
+        """
+        Drops the in-memory buckets, e.g. between benchmark runs whose
+        throwaway databases reuse the same user ids. Shared buckets expire on
+        their own and are left alone.
+        """
+
+        with self._lock:
+            self._buckets.clear()
+
+    def _checkLocal(self, keys: List[str], rate: float,
+                    burst: float) -> float:
+
+        with self._lock:
+            buckets = [self._getBucket(key, rate, burst) for key in keys]
+
+            wait = max(bucket.waitTime() for bucket in buckets)
+
+            if wait:
+                return wait
+
+            for bucket in buckets:
+                bucket.tryConsume()
+
+        return 0
+
+    def _getBucket(self, key: str, rate: float, burst: float) -> TokenBucket:
+        # the lock is held by the caller
+        bucket = self._buckets.get(key)
+
+        if bucket is None:
+            bucket = TokenBucket(rate, burst)
+            self._buckets[key] = bucket
+
+            if len(self._buckets) > self.max_local_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        return bucket
+
+    def _checkShared(self, keys: List[str], rate: float,
+                     burst: float) -> float:
+
+        # generic cell rate algorithm; the theoretical arrival time (TAT) of
+        # the next request is the only state
+        now = time.time()
+        interval = 1 / rate
+        stored = cache.get_many(keys)
+        tats = {key: max(stored.get(key, now), now) for key in keys}
+
+        wait = max(tat - now - (burst - 1) * interval
+                   for tat in tats.values())
+
+        if wait > 0:
+            return wait
+
+        cache.set_many({key: tat + interval for key, tat in tats.items()},
+                       timeout=math.ceil(burst * interval) + 1)
+        return 0
+
+
+class MethodRateThrottle(BaseThrottle):
+    """
+    Rate limits the unsafe methods of views routed with a `method` argument
+    (e.g. Order), keyed by both the user id and the client IP.
+    """
+
+    def __init__(self) -> None:
+        self._wait = 0.
+
+    def allow_request(self, request, view) -> bool:
+        if request.method in ("GET", "HEAD", "OPTIONS"):
+            return True
+
+        method = view.kwargs.get("method", "")
+        ip = get_client_ip(request)[0]
+        keys = [f"ip:{ip}"]
+
+        if request.user and request.user.is_authenticated:
+            keys.insert(0, f"uid:{request.user.id}")
+
+        self._wait = RateLimiter.getInstance().check(method, keys)
+
+        if self._wait:
+            logger.info("[IP: {}] [uid: {}] [CLIENT_ERROR] Rate limit of {} "
+                        "exceeded".format(ip,
+                                          getattr(request.user, "id", None),
+                                          method))
+
+            return False
+
+        return True
+
+    def wait(self) -> float | None:
+        return self._wait
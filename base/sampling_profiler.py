@@ -0,0 +1,120 @@
+from typing import Dict, List
+from collections import Counter
+import sys
+import threading
+import time
+
+# modules whose frames count as time spent in outgoing HTTP requests
+HTTP_MODULE_PREFIXES = ("urllib3.", "requests.", "http.client:")
+
+
+def _frame_label(frame) -> str:
+    return "{}:{}".format(frame.f_globals.get("__name__", "?"),
+                          frame.f_code.co_name)
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread from a background thread every
+    `interval` seconds using sys._current_frames(), and aggregates the
+    samples as collapsed stacks (the input format of flamegraph.pl and
+    speedscope). The profiled thread isn't instrumented, so its overhead is
+    limited to the sampling thread's share of the GIL.
+    """
+
+    def __init__(self, thread_id: int, interval: float = .005,
+                 max_seconds: float = 30) -> None:
+        self._thread_id = thread_id
+        self._interval = interval
+        self._max_samples = int(max_seconds / interval)
+        self._stacks: Counter[str] = Counter()
+        self._http_samples = 0
+        self._samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run,
+                                        name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    @property
+    def samples(self) -> int:
+        return self._samples
+
+    @property
+    def httpShare(self) -> float:
+        """share of the samples taken inside HTTP client code"""
+
+        return self._http_samples / self._samples if self._samples else 0
+
+    def collapsed(self) -> List[str]:
+        return [f"{stack} {count}"
+                for stack, count in self._stacks.most_common()]
+
+    def _run(self) -> None:
+        while (not self._stop.wait(self._interval) and
+               self._samples < self._max_samples):
+
+            frame = sys._current_frames().get(self._thread_id)
+
+            if frame is None:
+                return
+
+            labels = []
+            in_http = False
+
+            while frame is not None:
+                label = _frame_label(frame)
+                labels.append(label)
+
+                if label.startswith(HTTP_MODULE_PREFIXES):
+                    in_http = True
+
+                frame = frame.f_back
+
+            labels.reverse()
+            self._stacks[";".join(labels)] += 1
+            self._samples += 1
+
+            if in_http:
+                self._http_samples += 1
+
+
+class QueryTimer:
+    """
+    Database execute wrapper (see connection.execute_wrapper) recording the
+    time and count of queries, and the slowest statements.
+    """
+
+    def __init__(self, keep_slowest: int = 10) -> None:
+        self.total_seconds = 0.0
+        self.count = 0
+        self._keep = keep_slowest
+        self._slowest: List[Dict] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.total_seconds += duration
+            self.count += 1
+            self._record(sql, duration)
+
+    def slowest(self) -> List[Dict]:
+        return sorted(self._slowest, key=lambda query: query["ms"],
+                      reverse=True)
+
+    def _record(self, sql: str, duration: float) -> None:
+        if (len(self._slowest) >= self._keep and
+                duration * 1000 <= self._slowest[-1]["ms"]):
+            return
+
+        self._slowest.append({"sql": sql[:500], "ms": duration * 1000})
+        self._slowest = self.slowest()[:self._keep]
@@ -0,0 +1,108 @@
+from datetime import datetime
+
+from django.db import transaction
+
+from restapi.base.interface_payment import VerifiedPaymentResult
+from restapi.base.service.order_service import OrderService
+from restapi.base.service.receipt_service import ReceiptService
+from restapi.models import Order, SepPayment
+from restapi.models.sep import SepPaymentAttempt
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class PaymentService:
+    """
+    Completes verified Sep payments: the paid amount is checked against the
+    payment attempt, the order is marked as paid and its receipt is frozen.
+    The payment callback and the reconciliation job both complete payments
+    through completePayment, which is idempotent, so a payment completed by
+    one of them is left alone by the other.
+    """
+
+    def __init__(self) -> None:
+        self._order_service = OrderService()
+        self._receipt_service = ReceiptService()
+
+    def completePayment(self, refnum: str, payment: VerifiedPaymentResult,
+                        paid_at: datetime | None = None) -> bool:
+        """
+        Must be called once the payment is verified. Returns whether the
+        order is paid; payments that can't be completed are flagged for
+        review.
+        """
+
+        with transaction.atomic():
+            attempt = SepPaymentAttempt._default_manager \
+                .select_for_update().filter(refnum=refnum).first()
+
+            if attempt is None:
+                logger.error("No payment attempt for payment {}"
+                             .format(refnum))
+                return False
+
+            if attempt.state == SepPaymentAttempt.State.SETTLED:
+                return True
+
+            attempt.paid_amount_rial = payment.paid_amount_rial
+
+            if payment.paid_amount_rial < attempt.amount_toman * 10:
+                return self._flag(attempt, "paid amount is less than the "
+                                  "order amount")
+
+            order = None
+
+            if attempt.orderid.isdigit():
+                order = Order._default_manager.select_for_update() \
+                    .filter(id=int(attempt.orderid)).first()
+
+            if order is None:
+                return self._flag(attempt, "order not found")
+
+            if not self._order_service.markOrderAsPaid(order, refnum):
+                return self._flag(attempt, "marking the order as paid "
+                                  "failed")
+
+            attempt.state = SepPaymentAttempt.State.SETTLED
+            attempt.note = None
+            attempt.save(update_fields=["state", "paid_amount_rial", "note"])
+
+            self._freezeReceipt(order, attempt, payment, paid_at)
+
+        return True
+
+    def _freezeReceipt(self, order: Order, attempt: SepPaymentAttempt,
+                       payment: VerifiedPaymentResult,
+                       paid_at: datetime | None) -> None:
+        """
+        Failures are only logged, since the order is paid either way.
+        """
+
+        if paid_at is None:
+            paid_at = SepPayment._default_manager \
+                .filter(refnum=attempt.refnum) \
+                .values_list("payment_date", flat=True).first()
+
+        try:
+            receipt = self._receipt_service.freezeOrder(
+                order, attempt.refnum, payment, attempt.amount_toman,
+                paid_at=paid_at)
+        except Exception as e:
+            receipt = None
+            logger.error("Freezing the receipt of payment {} failed - {}"
+                         .format(attempt.refnum, e))
+
+        if receipt is None:
+            logger.error("Order {} is paid but has no receipt"
+                         .format(order.id))
+
+    def _flag(self, attempt: SepPaymentAttempt, note: str) -> bool:
+        logger.warning("Payment {} of order {} cannot be completed - {}"
+                       .format(attempt.refnum, attempt.orderid, note))
+
+        attempt.state = SepPaymentAttempt.State.FLAGGED
+        attempt.note = note
+        attempt.save(update_fields=["state", "paid_amount_rial", "note"])
+
+        return False
@@ -0,0 +1,164 @@
+from typing import Dict, Iterable, List, Tuple
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import DateTimeField, F, Q, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from restapi.base.interface_payment import VerifiedPaymentResult
+from restapi.models import Order
+from restapi.models.receipt import (OrderLineSnapshot, OrderReceipt,
+                                    UserPurchaseStats)
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(receipt: OrderReceipt) -> str:
+    value = f"{receipt.paid_at.isoformat()}|{receipt.id}"
+    return urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """raises ValueError for invalid cursors"""
+
+    try:
+        paid_at, receipt_id = urlsafe_b64decode(cursor.encode()) \
+            .decode().split("|")
+    except (TypeError, UnicodeDecodeError) as e:
+        raise ValueError(e)
+
+    return datetime.fromisoformat(paid_at), int(receipt_id)
+
+
+class ReceiptService:
+    """
+    Freezes paid orders into receipts and keeps the per-user purchase stats,
+    so the order history is read from receipts instead of recomputing order
+    prices.
+    """
+
+    def freezeOrder(self, order: Order, refnum: str,
+                    payment: VerifiedPaymentResult, total_toman: int,
+                    paid_at: datetime | None = None) -> OrderReceipt | None:
+        """
+        Must be called once the order is paid, with the amount it was charged.
+        Line prices come from the order's line snapshots, i.e. they are the
+        prices at submission. Calling it again for the same payment returns
+        the existing receipt, and the stats are only updated when the receipt
+        is created.
+        """
+
+        existing = OrderReceipt._default_manager.filter(refnum=refnum).first()
+
+        if existing is not None:
+            return existing
+
+        lines, currency_rates = self._freezeLines(
+            OrderLineSnapshot._default_manager
+            .filter(order=order).order_by("id"))
+
+        receipt = OrderReceipt(
+            user_id=order.user_id,
+            order=order,
+            refnum=refnum,
+            lines=lines,
+            currency_rates=currency_rates,
+            total_toman=total_toman,
+            paid_amount_rial=payment.paid_amount_rial,
+            card_first_digits=payment.card_number["first_digits"],
+            card_last_digits=payment.card_number["last_digits"],
+            paid_at=paid_at or datetime.now(timezone.utc))
+
+        try:
+            with transaction.atomic():
+                receipt.save()
+                self._addToStats(receipt)
+        except IntegrityError:
+            # frozen concurrently, e.g. by a repeated callback
+            return OrderReceipt._default_manager.filter(refnum=refnum).first()
+        except Exception as e:
+            logger.error("[uid: {}] Freezing order {} failed - {}"
+                         .format(order.user_id, order.id, e))
+            return None
+
+        return receipt
+
+    def getHistory(self, user_id: int, limit: int,
+                   cursor: str | None = None) \
+            -> Tuple[List[OrderReceipt], str | None]:
+        """
+        Receipts from newest to oldest, paginated by (paid_at, id). Returns
+        the page and the cursor of the next page, if any.
+        """
+
+        receipts = OrderReceipt._default_manager.filter(user_id=user_id)
+
+        if cursor is not None:
+            paid_at, receipt_id = decode_cursor(cursor)
+            receipts = receipts.filter(
+                Q(paid_at__lt=paid_at) |
+                Q(paid_at=paid_at, id__lt=receipt_id))
+
+        page = list(receipts.order_by("-paid_at", "-id")[:limit + 1])
+
+        if len(page) > limit:
+            return page[:limit], encode_cursor(page[limit - 1])
+
+        return page, None
+
+    def getStats(self, user_id: int) -> UserPurchaseStats:
+        stats = UserPurchaseStats._default_manager \
+            .filter(user_id=user_id).first()
+
+        return stats or UserPurchaseStats(user_id=user_id)
+
+    def _freezeLines(self, snapshots: Iterable[OrderLineSnapshot]) \
+            -> Tuple[List[Dict], Dict]:
+
+        lines = []
+        currency_rates = {}
+
+        for line in snapshots:
+            if line.currency is not None and line.toman_value is not None:
+                currency_rates[line.currency] = line.toman_value
+
+            lines.append({
+                "product_id": line.product_id,
+                "title": line.title,
+                "count": line.count,
+                "unit_price_irt": line.unit_price_irt,
+                "currency": line.currency,
+                "non_rial_value": line.non_rial_value,
+            })
+
+        return lines, currency_rates
+
+    def _addToStats(self, receipt: OrderReceipt) -> None:
+        paid_at = Value(receipt.paid_at, output_field=DateTimeField())
+
+        UserPurchaseStats._default_manager.get_or_create(
+            user_id=receipt.user_id)
+
+        UserPurchaseStats._default_manager \
+            .filter(user_id=receipt.user_id) \
+            .update(order_count=F("order_count") + 1,
+                    total_spent_toman=F("total_spent_toman") +
+                    receipt.total_toman,
+                    last_paid_at=Greatest(Coalesce(F("last_paid_at"),
+                                                   paid_at),
+                                          paid_at))
+
+
+def receipt_to_dict(receipt: OrderReceipt) -> Dict:
+    return {
+        "refnum": receipt.refnum,
+        "order_id": receipt.order_id,
+        "lines": receipt.lines,
+        "currency_rates": receipt.currency_rates,
+        "total": receipt.total_toman,
+        "card_number": {"first_digits": receipt.card_first_digits,
+                        "last_digits": receipt.card_last_digits},
+        "paid_at": receipt.paid_at.isoformat(),
+    }
@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+import time
+
+from django.db import transaction
+from django.db.models import F, IntegerField, Q, Value
+from django.db.models.functions import Cast, Round
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from restapi.models.product.currency import Currency
+from restapi.models.product.product import Product
+from restapi.models.product.repricing import RepricingRun
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def calc_effective_price(price_irt: int, non_rial_value: float | None,
+                         toman_value: float | None) -> int:
+
+    if non_rial_value is None or toman_value is None:
+        return price_irt
+
+    return round(non_rial_value * toman_value)
+
+
+class RepricingService:
+    """
+    Maintains Product.effective_price_irt, so that listings and order prices
+    read a column instead of converting non-rial prices on every request.
+    Prices are recomputed with a single UPDATE per currency whenever a
+    currency is saved, and each run is recorded.
+    """
+
+    def repriceCurrency(self, currency: Currency) -> int:
+        start = time.perf_counter()
+        started_at = datetime.now(timezone.utc)
+
+        with transaction.atomic():
+            count = Product._default_manager \
+                .filter(non_rial_currency=currency,
+                        non_rial_value__isnull=False) \
+                .update(effective_price_irt=Cast(
+                    Round(F("non_rial_value") * Value(currency.toman_value)),
+                    IntegerField()),
+                    updated_at=started_at)
+
+            self._recordRun(currency, count, started_at, start)
+
+        logger.info("{} products repriced - currency: {}, toman value: {}"
+                    .format(count, currency.unit, currency.toman_value))
+
+        return count
+
+    def repriceAll(self) -> int:
+        start = time.perf_counter()
+        started_at = datetime.now(timezone.utc)
+
+        with transaction.atomic():
+            count = Product._default_manager \
+                .filter(Q(non_rial_currency__isnull=True) |
+                        Q(non_rial_value__isnull=True)) \
+                .update(effective_price_irt=F("price_irt"),
+                        updated_at=started_at)
+
+            for currency in Currency._default_manager.all():
+                count += self.repriceCurrency(currency)
+
+            self._recordRun(None, count, started_at, start)
+
+        return count
+
+    def _recordRun(self, currency: Currency | None, count: int,
+                   started_at: datetime, start: float) -> None:
+
+        RepricingRun._default_manager.create(
+            currency=currency,
+            toman_value=currency.toman_value if currency else None,
+            products_updated=count,
+            started_at=started_at,
+            duration_ms=int((time.perf_counter() - start) * 1000))
+
+
+@receiver(post_save, sender=Currency)
+def _reprice_on_currency_change(sender, instance, **kwargs):
+    transaction.on_commit(lambda: RepricingService().repriceCurrency(instance))
+
+
+@receiver(pre_save, sender=Product)
+def _set_effective_price(sender, instance, **kwargs):
+    currency = (instance.non_rial_currency
+                if instance.non_rial_currency_id is not None else None)
+
+    instance.effective_price_irt = calc_effective_price(
+        instance.price_irt, instance.non_rial_value,
+        currency.toman_value if currency is not None else None)
@@ -0,0 +1,320 @@
+from typing import Dict, Iterable, List
+from datetime import datetime, timedelta, timezone
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from restapi.base.service.product_service import ProductService
+from restapi.base.service.repricing import calc_effective_price
+from restapi.base.singleton_meta import SingletonMeta
+from restapi.models.product.base import BaseProduct
+from restapi.models.product.product import Product
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class ProductRecord:
+    """the hot fields of a product, as stored in the catalog snapshot"""
+
+    __slots__ = ("id", "title", "cover_image_lq", "effective_price_irt",
+                 "currency", "product_type", "in_stock")
+
+    def __init__(self, id: int, title: str, cover_image_lq: str,
+                 effective_price_irt: int, currency: str | None,
+                 product_type: str | None, in_stock: bool) -> None:
+
+        self.id = id
+        self.title = title
+        self.cover_image_lq = cover_image_lq
+        self.effective_price_irt = effective_price_irt
+        self.currency = currency
+        self.product_type = product_type
+        self.in_stock = in_stock
+
+
+_FIELDS = ("id", "base_product__title", "base_product__cover_image_lq",
+           "price_irt", "effective_price_irt", "non_rial_value",
+           "non_rial_currency_id", "non_rial_currency__toman_value",
+           "product_type__typename",
+           "base_product__category__product_type__typename", "stock")
+
+
+def _to_record(row) -> ProductRecord:
+    (product_id, title, cover_image_lq, price_irt, effective_price_irt,
+     non_rial_value, currency, toman_value, typename,
+     category_typename, stock) = row
+
+    if effective_price_irt is None:
+        effective_price_irt = calc_effective_price(price_irt, non_rial_value,
+                                                   toman_value)
+
+    product_type = typename or category_typename
+
+    # product types and currencies are shared by many records
+    return ProductRecord(
+        id=product_id,
+        title=title,
+        cover_image_lq=cover_image_lq,
+        effective_price_irt=effective_price_irt,
+        currency=sys.intern(currency) if currency else None,
+        product_type=sys.intern(product_type) if product_type else None,
+        in_stock=stock != 0)
+
+
+class CatalogSnapshot(metaclass=SingletonMeta):
+    """
+    A per-worker, in-memory copy of the hot fields of all products, so cart
+    summaries and order dispatch don't query the database. The snapshot is
+    loaded on first use and then refreshed every CATALOG_SNAPSHOT_INTERVAL
+    seconds (default 5) from a background thread, reading only the products
+    whose updated_at (or their base product's) passed the watermark. A full
+    reload every CATALOG_SNAPSHOT_FULL_RELOAD seconds (default 600) picks up
+    category type changes.
+
+    Cart summaries are the ProductService summaries, cached per product as
+    they are requested. Saving or deleting a product or base product drops
+    its records in the saving worker right away; other workers drop them on
+    their next refresh, and a deletion makes them reload fully, so deleted
+    products don't outlive one interval.
+
+    Records may lag by one interval and reservations don't move updated_at,
+    so the stock flag is only a hint; stock is always checked against the
+    database when an order is submitted.
+
+    This class is a singleton, so it's advisable to use the getInstance method
+    instead of directly using the constructor
+    """
+
+    # rows committed late may carry an updated_at older than the watermark
+    watermark_overlap = timedelta(seconds=30)
+
+    # shared by all workers, changed whenever a product is deleted
+    _deletions_key = "catalog-snapshot:deletions"
+
+    def __init__(self) -> None:
+        self._interval = getattr(settings, "CATALOG_SNAPSHOT_INTERVAL", 5)
+        self._full_reload = getattr(settings,
+                                    "CATALOG_SNAPSHOT_FULL_RELOAD", 600)
+        self._chunk_size = getattr(settings, "CATALOG_SNAPSHOT_CHUNK_SIZE",
+                                   2000)
+
+        self._records: Dict[int, ProductRecord] = {}
+        self._summaries: Dict[int, Dict] = {}
+        self._deletions: float | None = None
+        self._watermark: datetime | None = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._refresher: threading.Thread | None = None
+
+    @classmethod
+    def getInstance(cls):
+        return cls()
+
+    def get(self, product_id: int) -> ProductRecord | None:
+        return self.getMany([product_id]).get(product_id)
+
+    def getMany(self, product_ids: Iterable[int]) \
+            -> Dict[int, ProductRecord]:
+        """
+        Products missing from the snapshot (e.g. created after the last
+        refresh) are read from the database.
+        """
+
+        self._ensureLoaded()
+
+        records = self._records
+        found = {}
+        missing = []
+
+        for product_id in product_ids:
+            record = records.get(product_id)
+
+            if record is None:
+                missing.append(product_id)
+            else:
+                found[product_id] = record
+
+        if missing:
+            fetched = self._fetch(Q(id__in=missing))
+            found.update(fetched)
+
+            with self._lock:
+                self._records.update(fetched)
+
+        return found
+
+    def getSummaries(self, product_ids: Iterable[int]) -> List[Dict]:
+        """
+        The summaries of the existing products among the given ones, as
+        ProductService builds them
+        """
+
+        self._ensureLoaded()
+
+        summaries = []
+
+        for product_id in product_ids:
+            summary = self._summaries.get(product_id)
+
+            if summary is None:
+                fetched = ProductService().getProductSummaryByIds(
+                    [product_id])
+
+                if not fetched:
+                    continue
+
+                summary = fetched[0].__dict__
+
+                with self._lock:
+                    self._summaries[product_id] = summary
+
+            summaries.append(summary)
+
+        return summaries
+
+    def updateStocks(self, stocks: Dict[int, int]) -> None:
+        """
+        Applies published stock changes to the records already loaded, so the
+        stock flag doesn't wait for the next refresh. Summaries of the
+        products are rebuilt on their next read.
+        """
+
+        records = self._records
+
+        with self._lock:
+            for product_id, stock in stocks.items():
+                record = records.get(product_id)
+
+                if record is not None:
+                    record.in_stock = stock != 0
+
+                self._summaries.pop(product_id, None)
+
+    def invalidate(self, product_ids: Iterable[int],
+                   deleted: bool = False) -> None:
+        """
+        Drops the records of changed products in this worker. Deletions are
+        announced to the other workers as well.
+        """
+
+        with self._lock:
+            for product_id in product_ids:
+                self._records.pop(product_id, None)
+                self._summaries.pop(product_id, None)
+
+        if deleted:
+            cache.set(self._deletions_key, time.time(), timeout=None)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def load(self) -> None:
+        """(re)loads all products"""
+
+        deletions = cache.get(self._deletions_key)
+        watermark = datetime.now(timezone.utc)
+        records: Dict[int, ProductRecord] = {}
+        last_id = 0
+
+        # keyset chunks, so the load doesn't hold one huge result set
+        while True:
+            chunk = self._fetch(Q(id__gt=last_id), self._chunk_size)
+
+            if not chunk:
+                break
+
+            records.update(chunk)
+            last_id = max(chunk)
+
+        with self._lock:
+            self._records = records
+            self._summaries = {}
+            self._deletions = deletions
+            self._watermark = watermark
+            self._loaded_at = time.monotonic()
+
+        logger.info("Catalog snapshot loaded - {} products"
+                    .format(len(records)))
+
+    def refresh(self) -> int:
+        if (self._watermark is None or
+                time.monotonic() - self._loaded_at > self._full_reload or
+                cache.get(self._deletions_key) != self._deletions):
+            self.load()
+            return len(self._records)
+
+        watermark = datetime.now(timezone.utc)
+        since = self._watermark - self.watermark_overlap
+
+        changed = self._fetch(Q(updated_at__gt=since) |
+                              Q(base_product__updated_at__gt=since))
+
+        with self._lock:
+            self._records.update(changed)
+            self._watermark = watermark
+
+            for product_id in changed:
+                self._summaries.pop(product_id, None)
+
+        return len(changed)
+
+    def _ensureLoaded(self) -> None:
+        if self._refresher is not None:
+            return
+
+        with self._lock:
+            if self._refresher is not None:
+                return
+
+            self._refresher = threading.Thread(target=self._run,
+                                               name="catalog-snapshot",
+                                               daemon=True)
+
+        self.load()
+        self._refresher.start()
+
+    def _fetch(self, condition: Q,
+               limit: int | None = None) -> Dict[int, ProductRecord]:
+
+        rows = Product._default_manager.filter(condition) \
+            .order_by("id").values_list(*_FIELDS)
+
+        if limit is not None:
+            rows = rows[:limit]
+
+        return {row[0]: _to_record(row) for row in rows}
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self._interval)
+
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error("Refreshing the catalog snapshot failed - {}"
+                             .format(e))
+
+
+@receiver(post_save, sender=Product)
+def _invalidate_saved_product(sender, instance, **kwargs):
+    CatalogSnapshot.getInstance().invalidate([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def _invalidate_deleted_product(sender, instance, **kwargs):
+    CatalogSnapshot.getInstance().invalidate([instance.pk], deleted=True)
+
+
+@receiver(post_save, sender=BaseProduct)
+def _invalidate_saved_base_product(sender, instance, **kwargs):
+    # the title and cover image of the products come from the base product
+    CatalogSnapshot.getInstance().invalidate(
+        Product._default_manager.filter(base_product_id=instance.pk)
+        .values_list("id", flat=True))
@@ -0,0 +1,214 @@
+from typing import Dict, Iterable, List
+import queue
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from restapi.base.shop.order_handler import (OrderHandler, OrderError,
+                                             ErrorId, Product)
+from restapi.base.shop.sold_out_cache import SoldOutCache
+from restapi.base.singleton_meta import SingletonMeta
+from restapi.models.user import User
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class CheckoutAdmission(metaclass=SingletonMeta):
+    """
+    Admission control for flash sales. Carts containing a hot product are not
+    submitted by the request thread; they get a ticket and are queued, and a
+    single consumer thread per hot product submits them one after another.
+    Reservations of a hot product therefore don't contend for its row locks
+    (only the consumers of different workers do), and the client polls the
+    ticket for the result.
+
+    Hot products come from the CHECKOUT_HOT_PRODUCTS setting and from
+    setHotProducts(), which applies to all workers.
+
+    Queues live in the memory of the worker that issued the ticket, so the
+    worker keeps a heartbeat in the cache from a thread of its own, which
+    beats regardless of how long a submission takes. A pending ticket whose
+    worker stopped beating (e.g. it was restarted) is failed instead of
+    staying pending until it expires.
+
+    This class is a singleton, so it's advisable to use the getInstance method
+    instead of directly using the constructor
+    """
+
+    _hot_products_key = "checkout-admission:hot-products"
+
+    def __init__(self) -> None:
+        self._static_hot = set(getattr(settings, "CHECKOUT_HOT_PRODUCTS", []))
+        self._max_queue = getattr(settings, "CHECKOUT_ADMISSION_QUEUE_SIZE",
+                                  5000)
+        self._ticket_ttl = getattr(settings, "CHECKOUT_TICKET_TTL", 600)
+        self._heartbeat_interval = getattr(
+            settings, "CHECKOUT_HEARTBEAT_INTERVAL", 5)
+        self._worker_id = uuid.uuid4().hex
+
+        self._queues: Dict[int, queue.Queue] = {}
+        self._consumers: Dict[int, threading.Thread] = {}
+        self._heartbeat: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def getInstance(cls):
+        return cls()
+
+    def setHotProducts(self, product_ids: Iterable[int],
+                       timeout: int | None = None) -> None:
+
+        cache.set(self._hot_products_key, frozenset(product_ids),
+                  timeout=timeout)
+
+    def findHotProduct(self, product_ids: Iterable[int]) -> int | None:
+        hot = self._static_hot | cache.get(self._hot_products_key, set())
+
+        for product_id in product_ids:
+            if product_id in hot:
+                return product_id
+
+        return None
+
+    def submit(self, user: User, order_list: List[Product],
+               hot_product_id: int) -> str | OrderError | None:
+        """
+        Returns a ticket, an error if the cart can be rejected right away, or
+        None if the queue of the product is full.
+        """
+
+        sold_out = SoldOutCache.getInstance().findSoldOut(
+            user.id, [product_cart["id"] for product_cart in order_list])
+
+        if sold_out is not None:
+            return OrderError(error_id=ErrorId.OUT_OF_STOCK,
+                              info={"product_id": sold_out[0],
+                                    "product_title": sold_out[1]})
+
+        ticket = uuid.uuid4().hex
+        self._beat()
+        cache.set(self._ticketKey(ticket),
+                  {"uid": user.id, "state": "pending",
+                   "worker": self._worker_id},
+                  timeout=self._ticket_ttl)
+
+        try:
+            self._getQueue(hot_product_id).put_nowait(
+                (ticket, user, order_list))
+        except queue.Full:
+            cache.delete(self._ticketKey(ticket))
+            return None
+
+        return ticket
+
+    def getResult(self, ticket: str, user_id: int) -> Dict | None:
+        """
+        Returns None for unknown tickets. Otherwise the state is "pending" or
+        "done"; done tickets include the OrderError, or None on success.
+        """
+
+        result = cache.get(self._ticketKey(ticket))
+
+        if result is None or result["uid"] != user_id:
+            return None
+
+        if (result["state"] == "pending" and result.get("worker") and
+                cache.get(self._workerKey(result["worker"])) is None):
+            logger.error("[uid: {}] The worker of checkout ticket {} is gone"
+                         .format(user_id, ticket))
+
+            result = self._setDone(ticket, user_id,
+                                   OrderError(error_id=ErrorId.SAVE_ERROR))
+
+        if result["state"] == "done" and result["error_id"] is not None:
+            result["error"] = OrderError(
+                error_id=ErrorId[result["error_id"]], info=result["info"])
+        else:
+            result["error"] = None
+
+        return result
+
+    def _getQueue(self, product_id: int) -> queue.Queue:
+        with self._lock:
+            product_queue = self._queues.get(product_id)
+
+            if product_queue is None:
+                product_queue = queue.Queue(maxsize=self._max_queue)
+                self._queues[product_id] = product_queue
+
+            if self._heartbeat is None or not self._heartbeat.is_alive():
+                self._heartbeat = threading.Thread(
+                    target=self._runHeartbeat,
+                    name="checkout-admission-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+            consumer = self._consumers.get(product_id)
+
+            if consumer is None or not consumer.is_alive():
+                # (re)start the consumer, e.g. after it died of a cache error
+                consumer = threading.Thread(
+                    target=self._consume, args=(product_id, product_queue),
+                    name=f"checkout-admission-{product_id}", daemon=True)
+                consumer.start()
+                self._consumers[product_id] = consumer
+
+            return product_queue
+
+    def _consume(self, product_id: int, product_queue: queue.Queue) -> None:
+        order_handler = OrderHandler.getInstance()
+
+        while True:
+            ticket, user, order_list = product_queue.get()
+            close_old_connections()
+
+            try:
+                submit_result = order_handler.submitOrder(user, order_list)
+            except Exception as e:
+                logger.error("[uid: {}] Queued order submission failed - {}"
+                             .format(user.id, e))
+
+                submit_result = OrderError(error_id=ErrorId.SAVE_ERROR)
+
+            self._setDone(ticket, user.id,
+                          submit_result if type(submit_result) is OrderError
+                          else None)
+
+    def _setDone(self, ticket: str, user_id: int,
+                 error: OrderError | None) -> Dict:
+
+        result = {
+            "uid": user_id,
+            "state": "done",
+            "error_id": error.error_id.name if error else None,
+            "info": error.info if error else None,
+        }
+
+        cache.set(self._ticketKey(ticket), result, timeout=self._ticket_ttl)
+
+        return dict(result)
+
+    def _runHeartbeat(self) -> None:
+        while True:
+            try:
+                self._beat()
+            except Exception as e:
+                logger.error("Checkout admission heartbeat failed - {}"
+                             .format(e))
+
+            time.sleep(self._heartbeat_interval)
+
+    def _beat(self) -> None:
+        # missing three beats in a row means the worker is gone
+        cache.set(self._workerKey(self._worker_id), True,
+                  timeout=self._heartbeat_interval * 3)
+
+    def _ticketKey(self, ticket: str) -> str:
+        return f"checkout-admission:ticket:{ticket}"
+
+    def _workerKey(self, worker_id: str) -> str:
+        return f"checkout-admission:worker:{worker_id}"
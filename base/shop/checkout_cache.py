@@ -0,0 +1,104 @@
+from typing import Dict
+import copy
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from restapi.base.singleton_meta import SingletonMeta
+from restapi.models.product.currency import Currency
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class CheckoutSnapshotCache(metaclass=SingletonMeta):
+    """
+    Keeps a snapshot of the checkout details (price and requirements without
+    passwords) of each user's unpaid order, so the checkout page can be
+    polled without recalculating the order price.
+
+    A snapshot lives for CHECKOUT_SNAPSHOT_TTL seconds, which also bounds how
+    often reading the checkout details updates the order's last-modified
+    time. Snapshots are dropped whenever the user's order changes, and a
+    currency change invalidates all of them by bumping the generation number
+    stored next to each snapshot.
+
+    This class is a singleton, so it's advisable to use the getInstance method
+    instead of directly using the constructor
+    """
+
+    _generation_key = "checkout-snapshot:generation"
+
+    def __init__(self) -> None:
+        self._ttl = getattr(settings, "CHECKOUT_SNAPSHOT_TTL", 30)
+
+    @classmethod
+    def getInstance(cls):
+        return cls()
+
+    def get(self, user_id: int) -> Dict | None:
+        key = self._key(user_id)
+        values = cache.get_many([key, self._generation_key])
+        snapshot = values.get(key)
+
+        if (snapshot is None or
+                snapshot["generation"] != values.get(self._generation_key)):
+
+            return None
+
+        return snapshot
+
+    def set(self, user_id: int, price: int, requirements: Dict) -> Dict:
+        generation = cache.get_or_set(self._generation_key, 1, timeout=None)
+
+        snapshot = {
+            "generation": generation,
+            "price": price,
+            "requirements": self.stripPasswords(requirements),
+        }
+
+        cache.set(self._key(user_id), snapshot, timeout=self._ttl)
+        return snapshot
+
+    def invalidate(self, user_id: int) -> None:
+        cache.delete(self._key(user_id))
+
+    def invalidateAll(self) -> None:
+        try:
+            cache.incr(self._generation_key)
+        except ValueError:
+            # the generation key is missing, so no snapshot can be valid
+            pass
+
+    @staticmethod
+    def stripPasswords(requirements: Dict | None) -> Dict:
+        stripped = {}
+
+        for key, value in (requirements or {}).items():
+            if value:
+                value = copy.copy(value)
+                value.pop("password", None)
+
+            stripped[key] = value
+
+        return stripped
+
+    def _key(self, user_id: int) -> str:
+        return f"checkout-snapshot:{user_id}"
+
+
+@receiver(post_save, sender="restapi.Order")
+@receiver(post_delete, sender="restapi.Order")
+def _invalidate_order_snapshot(sender, instance, **kwargs):
+    CheckoutSnapshotCache.getInstance().invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Currency)
+def _invalidate_all_snapshots(sender, instance, **kwargs):
+    logger.info("Currency {} changed, checkout snapshots invalidated"
+                .format(instance.unit))
+
+    CheckoutSnapshotCache.getInstance().invalidateAll()
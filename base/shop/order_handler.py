@@ -4,12 +4,21 @@ from enum import Enum, auto
 
 from django.db import transaction
 
+from restapi.base.db_router import use_primary
 from restapi.base.service.product_service import ProductService
 from restapi.base.service.order_service import OrderService
+from restapi.base.service.repricing import calc_effective_price
+from restapi.base.shop.catalog_snapshot import CatalogSnapshot
+from restapi.base.shop.checkout_cache import CheckoutSnapshotCache
 from restapi.base.shop.product.interface_product import IProduct
-from restapi.base.shop.product.game import Game
-from restapi.base.shop.product.giftcard import GiftCard
-from restapi.base.shop.product.steam import Steam
+from restapi.base.shop.product.registry import ProductHandlerRegistry
+from restapi.base.shop.sold_out_cache import SoldOutCache
+from restapi.base.shop.stock_events import StockEventPublisher
+from restapi.base.singleton_meta import SingletonMeta
+from restapi.models import Order
+from restapi.models.product.currency import Currency
+from restapi.models.product.product import Product as ProductModel
+from restapi.models.receipt import OrderLineSnapshot
 from restapi.models.user import User
 
 import logging
@@ -35,30 +44,71 @@ class OrderError:
     info: Dict | None = None
 
 
+class _OrderRejected(Exception):
+    def __init__(self, error: OrderError) -> None:
+        self.error = error
+
+
 @dataclass
 class CheckoutDetail:
     price: int
     requirements: Dict
 
 
-class OrderHandler:
+class OrderHandler(metaclass=SingletonMeta):
+    """
+    This class is stateless and a singleton, so it's advisable to use the
+    getInstance method instead of directly using the constructor
+    """
+
     def __init__(self):
         self._product_service = ProductService()
         self._order_service = OrderService()
+        self._checkout_cache = CheckoutSnapshotCache.getInstance()
+        self._handlers = ProductHandlerRegistry.getInstance()
+        self._stock_events = StockEventPublisher.getInstance()
+        self._sold_out = SoldOutCache.getInstance()
+        self._catalog = CatalogSnapshot.getInstance()
 
-        self._handlers = {
-            "game-pc-steam": Game,
-            "game-pc-epic": Game,
-            "game-pc-ubisoft": Game,
-            "gift-card": GiftCard,
-            "steam-gem": Steam,
-            "steam-tf2": Steam,
-        }
+    @classmethod
+    def getInstance(cls):
+        return cls()
 
     def submitOrder(self, user: User,
                     order_list: List[Product]) \
             -> bool | OrderError:
 
+        # reject orders containing sold-out products before any database work
+        sold_out = self._sold_out.findSoldOut(
+            user.id, [product_cart["id"] for product_cart in order_list])
+
+        if sold_out is not None:
+            logger.info(("[uid: {}] [CLIENT_ERROR] Product {} is out of "
+                         "stock (cached)").format(user.id, sold_out[1]))
+
+            return OrderError(error_id=ErrorId.OUT_OF_STOCK,
+                              info={"product_id": sold_out[0],
+                                    "product_title": sold_out[1]})
+
+        try:
+            with transaction.atomic():
+                result = self._replaceUserOrder(user, order_list)
+
+                if result is not True:
+                    # roll back so the previous unpaid order is kept
+                    raise _OrderRejected(result)
+        except _OrderRejected as e:
+            return e.error
+
+        self._checkout_cache.invalidate(user.id)
+        self._sold_out.setUserReservation(
+            user.id, [product_cart["id"] for product_cart in order_list])
+
+        return True
+
+    def _replaceUserOrder(self, user: User,
+                          order_list: List[Product]) -> bool | OrderError:
+
         # delete previous unpaid order and retrieve the submitted requirements
         order = self._order_service.getUnpaidOrderAndUpdateLastModified(user)
         last_unpaid_order_reqs = {}
@@ -70,7 +120,8 @@ class OrderHandler:
                     if value is not None}
 
             try:
-                order.delete()
+                with transaction.atomic():
+                    order.delete()
             except Exception as e:
                 logger.warning(e)
                 pass
@@ -79,20 +130,25 @@ class OrderHandler:
         products: List[IProduct] = []
         products_count: List[int] = []
 
+        items = self._catalog.getMany(
+            [product_cart["id"] for product_cart in order_list])
+
         for product_cart in order_list:
-            try:
-                item = self._product_service \
-                    .getProductSummaryByIds([product_cart["id"]])[0]
-            except IndexError as e:
-                # product not found
-                logger.info("[uid: {}] [CLIENT_ERROR] Product not found - {}"
-                            .format(user.id, e))
+            item = items.get(product_cart["id"])
+
+            if item is None:
+                logger.info("[uid: {}] [CLIENT_ERROR] Product {} not found"
+                            .format(user.id, product_cart["id"]))
 
                 return OrderError(error_id=ErrorId.INVALID_ID,
                                   info={"product_id": product_cart["id"]})
 
-            product = self.createProduct(
-                item.product_type, product_cart["id"])
+            # stock checks must not read stale data from a replica
+            with use_primary():
+                product = self.createProduct(
+                    item.product_type, product_cart["id"])
+
+                stock = product.getStock() if product is not None else 0
 
             if product is None:
                 logger.info("[uid: {}] [CLIENT_ERROR] Product {} not found"
@@ -102,12 +158,12 @@ class OrderHandler:
                                   info={"product_id": product_cart["id"],
                                         "product_title": item.title})
 
-            stock = product.getStock()
-
             if stock == 0:
                 logger.info(("[uid: {}] [CLIENT_ERROR] Product {} is out of "
                              "stock").format(user.id, item.title))
 
+                self._sold_out.markSoldOut(product_cart["id"], item.title)
+
                 return OrderError(error_id=ErrorId.OUT_OF_STOCK,
                                   info={"product_id": product_cart["id"],
                                         "product_title": item.title})
@@ -135,17 +191,31 @@ class OrderHandler:
 
     def getUnpaidOrderCheckoutDetails(self,
                                       user: User) -> CheckoutDetail | None:
-        order = self._order_service.getUnpaidOrderAndUpdateLastModified(user)
+        """
+        Passwords are stripped from the returned requirements. The details are
+        served from the checkout snapshot cache when possible; otherwise the
+        order's last-modified time is updated and a new snapshot is stored.
+        """
 
-        if order is None:
-            return None
+        snapshot = self._checkout_cache.get(user.id)
 
-        price = self._order_service.calcOrderPrice(order)
+        if snapshot is None:
+            order = self._order_service \
+                .getUnpaidOrderAndUpdateLastModified(user)
 
-        if price is None:
-            return None
+            if order is None:
+                return None
 
-        return CheckoutDetail(price=price, requirements=order.requirements)
+            price = self._order_service.calcOrderPrice(order)
+
+            if price is None:
+                return None
+
+            snapshot = self._checkout_cache.set(user.id, price,
+                                                order.requirements)
+
+        return CheckoutDetail(price=snapshot["price"],
+                              requirements=snapshot["requirements"])
 
     def submitRequirement(self, user: User,
                           req_name: str, data: Dict) -> bool | None:
@@ -166,7 +236,10 @@ class OrderHandler:
 
             return False
 
-        return self._order_service.saveRequirmenet(order, req_name, data)
+        result = self._order_service.saveRequirmenet(order, req_name, data)
+        self._checkout_cache.invalidate(user.id)
+
+        return result
 
     def createProduct(self, product_type: str | None,
                       product_id: int) -> IProduct | None:
@@ -174,7 +247,7 @@ class OrderHandler:
         if product_type is None:
             return None
 
-        handler = self._handlers.get(product_type)
+        handler = self._handlers.getHandler(product_type)
 
         if handler is None:
             logger.error(f"No handler found for product type {product_type}")
@@ -204,6 +277,8 @@ class OrderHandler:
                                                               product_list):
                     raise Exception()
 
+                self._saveLineSnapshots(order, product_list)
+
                 # reserve products
                 for item in zip(products, products_count):
                     product = item[0]
@@ -212,6 +287,16 @@ class OrderHandler:
                     if not product.reserve(count, order.id):
                         raise Exception()
 
+                # reserve() writes the stock with update(), so the products
+                # may still hold the stock they were read with
+                with use_primary():
+                    stocks = dict(ProductModel._default_manager
+                                  .filter(id__in=[product.getProduct().id
+                                                  for product in products])
+                                  .values_list("id", "stock"))
+
+                self._stock_events.publishOnCommit(stocks)
+
                 # save requirmenets
                 requirements = set()
 
@@ -232,3 +317,33 @@ class OrderHandler:
             return False
 
         return True
+
+    def _saveLineSnapshots(self, order: Order,
+                           product_list: List[Dict]) -> None:
+        """the lines and prices of the order as submitted, for its receipt"""
+
+        records = self._catalog.getMany(
+            [item["product"].id for item in product_list])
+
+        units = {item["product"].non_rial_currency_id
+                 for item in product_list} - {None}
+
+        rates = dict(Currency._default_manager.filter(unit__in=units)
+                     .values_list("unit", "toman_value")) if units else {}
+
+        lines = []
+
+        for item in product_list:
+            product = item["product"]
+            rate = rates.get(product.non_rial_currency_id)
+
+            lines.append(OrderLineSnapshot(
+                order=order, product=product,
+                title=records[product.id].title, count=item["count"],
+                unit_price_irt=calc_effective_price(
+                    product.price_irt, product.non_rial_value, rate),
+                currency=product.non_rial_currency_id,
+                non_rial_value=product.non_rial_value,
+                toman_value=rate))
+
+        OrderLineSnapshot._default_manager.bulk_create(lines)
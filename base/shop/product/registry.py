@@ -0,0 +1,97 @@
+from typing import Dict
+from importlib import import_module
+from importlib.metadata import entry_points
+import threading
+
+from django.conf import settings
+
+from restapi.base.shop.product.interface_product import IProduct
+from restapi.base.singleton_meta import SingletonMeta
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class ProductHandlerRegistry(metaclass=SingletonMeta):
+    """
+    Maps product types to their handler classes. Handlers are referenced by
+    "module:class" paths and their modules are imported on first use, so
+    adding product types doesn't slow down worker startup.
+
+    Besides the built-in handlers, product types are registered by path
+    through the PRODUCT_HANDLERS setting or entry points in the
+    "game4sell.product_handlers" group; the latter take precedence. Paths are
+    used rather than decorators on the handler classes, since decorators
+    would only run once their modules are imported.
+
+    This class is a singleton, so it's advisable to use the getInstance method
+    instead of directly using the constructor
+    """
+
+    entry_point_group = "game4sell.product_handlers"
+
+    builtin_handlers = {
+        "game-pc-steam": "restapi.base.shop.product.game:Game",
+        "game-pc-epic": "restapi.base.shop.product.game:Game",
+        "game-pc-ubisoft": "restapi.base.shop.product.game:Game",
+        "gift-card": "restapi.base.shop.product.giftcard:GiftCard",
+        "steam-gem": "restapi.base.shop.product.steam:Steam",
+        "steam-tf2": "restapi.base.shop.product.steam:Steam",
+    }
+
+    def __init__(self) -> None:
+        self._paths: Dict[str, str] = dict(self.builtin_handlers)
+        self._paths.update(getattr(settings, "PRODUCT_HANDLERS", {}))
+
+        for entry_point in entry_points(group=self.entry_point_group):
+            self._paths[entry_point.name] = entry_point.value
+
+        self._handlers: Dict[str, type[IProduct]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def getInstance(cls):
+        return cls()
+
+    def register(self, product_type: str,
+                 handler: type[IProduct] | str) -> None:
+
+        with self._lock:
+            if isinstance(handler, str):
+                self._paths[product_type] = handler
+                self._handlers.pop(product_type, None)
+            else:
+                self._handlers[product_type] = handler
+
+    def getHandler(self, product_type: str) -> type[IProduct] | None:
+        handler = self._handlers.get(product_type)
+
+        if handler is not None:
+            return handler
+
+        path = self._paths.get(product_type)
+
+        if path is None:
+            return None
+
+        module_name, _, class_name = path.partition(":")
+
+        try:
+            handler = getattr(import_module(module_name), class_name)
+        except (ImportError, AttributeError) as e:
+            logger.error("Loading handler {} of product type {} failed - {}"
+                         .format(path, product_type, e))
+
+            return None
+
+        with self._lock:
+            self._handlers.setdefault(product_type, handler)
+
+        return handler
+
+    def preload(self) -> None:
+        """import all handler modules, e.g. before serving requests"""
+
+        for product_type in list(self._paths):
+            self.getHandler(product_type)
+
@@ -0,0 +1,96 @@
+from typing import Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from restapi.base.service.product_service import ProductService
+from restapi.base.singleton_meta import SingletonMeta
+
+# the value of entries whose product title isn't known, e.g. entries added
+# from stock events; None can't be used since some cache backends treat it as
+# a miss
+UNKNOWN_TITLE = ""
+
+
+class SoldOutCache(metaclass=SingletonMeta):
+    """
+    A short-lived set of sold-out products shared by all workers, so orders
+    containing them can be rejected before touching the database. Entries are
+    added when a stock check or reservation finds no stock and are removed
+    when stock is published again; otherwise they expire after
+    SOLD_OUT_CACHE_TTL seconds.
+
+    The products reserved by each user's unpaid order are remembered as well,
+    since a user re-submitting a cart may hold the last items of a product.
+
+    This class is a singleton, so it's advisable to use the getInstance method
+    instead of directly using the constructor
+    """
+
+    def __init__(self) -> None:
+        self._ttl = getattr(settings, "SOLD_OUT_CACHE_TTL", 5)
+        self._reservation_ttl = getattr(settings, "UNPAID_ORDER_LIFETIME",
+                                        3600)
+
+    @classmethod
+    def getInstance(cls):
+        return cls()
+
+    def findSoldOut(self, user_id: int,
+                    product_ids: Iterable[int]) -> Tuple[int, str] | None:
+        """
+        Returns the id and title of a sold-out product among the given ones,
+        ignoring the products reserved by the user.
+        """
+
+        user_key = self._userKey(user_id)
+        keys = {self._key(product_id): product_id
+                for product_id in product_ids}
+        values = cache.get_many([*keys, user_key])
+        reserved = values.pop(user_key, ())
+
+        for key, title in values.items():
+            product_id = keys[key]
+
+            if product_id in reserved:
+                continue
+
+            if title == UNKNOWN_TITLE:
+                summaries = ProductService().getProductSummaryByIds(
+                    [product_id])
+                title = summaries[0].title if summaries else title
+
+            return product_id, title
+
+        return None
+
+    def markSoldOut(self, product_id: int, title: str | None = None) -> None:
+        cache.set(self._key(product_id), title or UNKNOWN_TITLE,
+                  timeout=self._ttl)
+
+    def update(self, stocks: Dict[int, int]) -> None:
+        sold_out = [product_id for product_id, stock in stocks.items()
+                    if stock == 0]
+        available = [product_id for product_id, stock in stocks.items()
+                     if stock != 0]
+
+        if available:
+            cache.delete_many([self._key(product_id)
+                               for product_id in available])
+
+        for product_id in sold_out:
+            # keep the title of an existing entry
+            cache.add(self._key(product_id), UNKNOWN_TITLE,
+                      timeout=self._ttl)
+
+    def setUserReservation(self, user_id: int,
+                           product_ids: Iterable[int]) -> None:
+
+        cache.set(self._userKey(user_id), frozenset(product_ids),
+                  timeout=self._reservation_ttl)
+
+    def _key(self, product_id: int) -> str:
+        return f"sold-out:{product_id}"
+
+    def _userKey(self, user_id: int) -> str:
+        return f"sold-out:reserved:{user_id}"
@@ -0,0 +1,190 @@
+from typing import Dict, Iterable, List, Set
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from restapi.base.shop.catalog_snapshot import CatalogSnapshot
+from restapi.base.shop.sold_out_cache import SoldOutCache
+from restapi.base.singleton_meta import SingletonMeta
+from restapi.models.product.product import Product
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def _stock_key(product_id: int) -> str:
+    return f"stock-event:{product_id}"
+
+
+class StockEventPublisher(metaclass=SingletonMeta):
+    """
+    Publishes the latest stock of products to the Django cache, which is
+    shared by all workers. Only the latest value is kept, so rapid changes are
+    coalesced and subscribers see the stock as of their last poll.
+
+    This class is a singleton, so it's advisable to use the getInstance method
+    instead of directly using the constructor
+    """
+
+    def __init__(self) -> None:
+        self._ttl = getattr(settings, "STOCK_EVENTS_TTL", 3600)
+
+    @classmethod
+    def getInstance(cls):
+        return cls()
+
+    def publish(self, stocks: Dict[int, int]) -> None:
+        now = time.time()
+
+        cache.set_many({_stock_key(product_id): (stock, now)
+                        for product_id, stock in stocks.items()},
+                       timeout=self._ttl)
+
+        SoldOutCache.getInstance().update(stocks)
+        CatalogSnapshot.getInstance().updateStocks(stocks)
+
+    def publishOnCommit(self, stocks: Dict[int, int]) -> None:
+        """publish once the current transaction commits"""
+
+        transaction.on_commit(lambda: self.publish(stocks))
+
+
+class StockSubscription:
+    """
+    Holds the latest undelivered stock of each subscribed product rather
+    than a queue of events, so a slow reader costs at most one value per
+    product and always receives the current stock.
+    """
+
+    def __init__(self, product_ids: Set[int]) -> None:
+        self.product_ids = product_ids
+        self._pending: Dict[int, int] = {}
+        self._changed = asyncio.Event()
+
+    def put(self, stocks: Dict[int, int]) -> None:
+        self._pending.update(stocks)
+        self._changed.set()
+
+    async def get(self) -> Dict[int, int]:
+        """waits for stock changes and returns them all at once"""
+
+        await self._changed.wait()
+        self._changed.clear()
+
+        stocks, self._pending = self._pending, {}
+        return stocks
+
+
+class StockEventHub:
+    """
+    Fans stock changes out to the subscribers (e.g. SSE connections) of a
+    worker. A single task polls the cache for the products of all subscribers
+    every STOCK_EVENTS_POLL_INTERVAL seconds, so an idle subscriber only costs
+    its latest stocks. The hub belongs to the event loop of an async worker.
+    """
+
+    _instance: "StockEventHub | None" = None
+
+    def __init__(self) -> None:
+        self._interval = getattr(settings, "STOCK_EVENTS_POLL_INTERVAL", 1)
+        self._subscriptions: Set[StockSubscription] = set()
+        self._published_at: Dict[int, float] = {}
+        self._task: asyncio.Task | None = None
+
+    @classmethod
+    def getInstance(cls) -> "StockEventHub":
+        if cls._instance is None:
+            cls._instance = cls()
+
+        return cls._instance
+
+    def subscribe(self, product_ids: Iterable[int]) -> StockSubscription:
+        subscription = StockSubscription(set(product_ids))
+        self._subscriptions.add(subscription)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+        return subscription
+
+    def unsubscribe(self, subscription: StockSubscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    async def getStocks(self, product_ids: Iterable[int]) -> Dict[int, int]:
+        """
+        The current stock of the products. Products without a recent stock
+        event are read from the database.
+        """
+
+        product_ids = set(product_ids)
+        values = await cache.aget_many([_stock_key(product_id)
+                                        for product_id in product_ids])
+
+        stocks = {int(key.rsplit(":", 1)[1]): stock
+                  for key, (stock, _) in values.items()}
+        missing = product_ids - stocks.keys()
+
+        if missing:
+            async for product_id, stock in (Product._default_manager
+                                            .filter(id__in=missing)
+                                            .values_list("id", "stock")):
+                stocks[product_id] = stock
+
+        return stocks
+
+    async def _run(self) -> None:
+        while self._subscriptions:
+            await asyncio.sleep(self._interval)
+
+            try:
+                await self._poll()
+            except Exception as e:
+                logger.error("Polling stock events failed - {}".format(e))
+
+        self._published_at.clear()
+
+    async def _poll(self) -> None:
+        product_ids: Set[int] = set()
+
+        for subscription in self._subscriptions:
+            product_ids |= subscription.product_ids
+
+        # forget the products nobody is subscribed to anymore
+        for product_id in self._published_at.keys() - product_ids:
+            del self._published_at[product_id]
+
+        values = await cache.aget_many([_stock_key(product_id)
+                                        for product_id in product_ids])
+        changed: Dict[int, int] = {}
+
+        for key, (stock, published_at) in values.items():
+            product_id = int(key.rsplit(":", 1)[1])
+
+            if self._published_at.get(product_id) != published_at:
+                self._published_at[product_id] = published_at
+                changed[product_id] = stock
+
+        if not changed:
+            return
+
+        for subscription in list(self._subscriptions):
+            event = {product_id: stock for product_id, stock in changed.items()
+                     if product_id in subscription.product_ids}
+
+            if event:
+                subscription.put(event)
+
+
+def publish_product_stocks(products: List[Product]) -> None:
+    StockEventPublisher.getInstance().publishOnCommit(
+        {product.id: product.stock for product in products})
+
+
+@receiver(post_save, sender=Product)
+def _publish_saved_stock(sender, instance, **kwargs):
+    publish_product_stocks([instance])
@@ -0,0 +1,89 @@
+from typing import Callable, Dict, List, Tuple
+from importlib import import_module
+import time
+
+from django.core.cache import cache
+from django.db import connections
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def _connect_database() -> None:
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def _connect_cache() -> None:
+    cache.get("warmup")
+
+
+def _register_signal_receivers() -> None:
+    # receivers are connected when their modules are imported
+    import_module("restapi.base.service.repricing")
+    import_module("restapi.base.payment_token_cache")
+
+
+def _load_product_handlers() -> None:
+    from restapi.base.shop.product.registry import ProductHandlerRegistry
+    ProductHandlerRegistry.getInstance().preload()
+
+
+def _load_catalog_snapshot() -> None:
+    # loads the snapshot (with its product types, currencies and effective
+    # prices) and starts its refresher
+    from restapi.base.shop.catalog_snapshot import CatalogSnapshot
+    CatalogSnapshot.getInstance().getMany([])
+
+
+def _load_keys() -> None:
+    from restapi.base.crypto_service import CryptoService
+    CryptoService.getInstance()
+
+
+def _create_services() -> None:
+    from restapi.base.rate_limiter import RateLimiter
+    from restapi.base.shop.order_handler import OrderHandler
+
+    RateLimiter.getInstance()
+    OrderHandler.getInstance()
+
+
+WARMUP_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("database", _connect_database),
+    ("cache", _connect_cache),
+    ("signal receivers", _register_signal_receivers),
+    ("product handlers", _load_product_handlers),
+    ("catalog snapshot", _load_catalog_snapshot),
+    ("encryption keys", _load_keys),
+    ("services", _create_services),
+]
+
+
+def warmup() -> Dict[str, float]:
+    """
+    Preloads the per-process caches and connections the first requests would
+    otherwise pay for. It runs in each worker before it accepts traffic,
+    through the Warmup middleware. A failing step is logged and skipped,
+    since the caches also load lazily on first use.
+
+    Returns the duration of each step in milliseconds.
+    """
+
+    durations = {}
+
+    for name, step in WARMUP_STEPS:
+        start = time.perf_counter()
+
+        try:
+            step()
+        except Exception as e:
+            logger.error("Warmup step '{}' failed - {}".format(name, e))
+
+        durations[name] = (time.perf_counter() - start) * 1000
+
+    logger.info("Warmup finished in {:.0f} ms - {}".format(
+        sum(durations.values()),
+        ", ".join(f"{name}: {ms:.0f} ms" for name, ms in durations.items())))
+
+    return durations
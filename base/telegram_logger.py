@@ -1,9 +1,11 @@
 import logging
-import requests
 
 from django.conf import settings
+from restapi.base.lazy_import import lazy_import
 from restapi.base.runtime_config import RuntimeConfig
 
+requests = lazy_import("requests")
+
 
 class TelegramLogger(logging.Handler):
     def __init__(self):
@@ -3,10 +3,14 @@ import requests
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from django.conf import settings
+
 from restapi.base.runtime_config import RuntimeConfig
+from restapi.base.payment_token_cache import PaymentTokenCache
 from restapi.base.interface_payment import (IPayment, PaymentStatus,
                                             VerifiedPaymentResult)
 from restapi.models import SepPayment
+from restapi.models.sep import SepPaymentAttempt
 
 import logging
 logger = logging.getLogger(__name__)
@@ -21,9 +25,21 @@ class Sep(IPayment):
                                    "logs and consider changing the payment "
                                    "gateway if necessary.")
 
+        # Sep tokens are valid for 20 minutes
+        self._token_cache = PaymentTokenCache(
+            "sep", getattr(settings, "SEP_TOKEN_CACHE_TTL", 15 * 60))
+
     def requestPayment(self, orderid: str, amount_toman: int,
                        mobile: int | None = None) -> str | None:
 
+        token = self._token_cache.get(orderid, amount_toman, mobile)
+
+        if token is not None:
+            logger.info("Reusing payment token - orderid: {}, mobile: {}"
+                        .format(orderid, mobile))
+
+            return token
+
         url = "https://sep.shaparak.ir/onlinepg/onlinepg"
         wage = self._calcWage(amount_toman)
 
@@ -73,6 +89,11 @@ class Sep(IPayment):
 
                 return None
 
+            self._token_cache.set(orderid, amount_toman, mobile,
+                                  response["token"])
+
+            self._recordAttempt(orderid, response["token"], amount_toman)
+
             return response["token"]
         except requests.exceptions.JSONDecodeError:
             logger.error("response isn't json - {}", r.text)
@@ -89,6 +110,17 @@ class Sep(IPayment):
     def isPaymentVerifiable(self, callback_data: Dict,
                             authorized_cards: List[int] = []) -> PaymentStatus:
 
+        if "ResNum" in callback_data:
+            # the token may have been used, so it must not be reused
+            PaymentTokenCache.invalidate(callback_data["ResNum"])
+
+        status = self._checkCallback(callback_data, authorized_cards)
+        self._recordCallback(callback_data, status)
+
+        return status
+
+    def _checkCallback(self, callback_data: Dict,
+                       authorized_cards: List[int]) -> PaymentStatus:
         try:
             if callback_data["State"] != "OK":
                 logger.warning("'State' key is not 'OK' - {}"
@@ -121,42 +153,22 @@ class Sep(IPayment):
 
             return None
 
-        url = ("https://sep.shaparak.ir/"
-               "verifyTxnRandomSessionkey/ipg/VerifyTransaction")
-
-        data = {
-            "TerminalNumber": self._terminal_id,
-            "RefNum": trackid,
-        }
-
-        config = RuntimeConfig.getInstance()
-
-        try:
-            logger.info("Verification of transaction {} has been requested"
-                        .format(trackid))
+        logger.info("Verification of transaction {} has been requested"
+                    .format(trackid))
 
-            r = requests.post(url, json=data,
-                              timeout=config.http_request_timeout)
-        except requests.exceptions.RequestException as e:
-            logger.error("{} - trackid: {}".format(e, trackid))
-            messenger_logger.error(self._messenger_log_msg)
-            return None
+        response = self.inquiryPayment(trackid)
 
-        if r.status_code != requests.codes.ok:
-            logger.error("response code: {}, trackid: {}"
-                         .format(r.status_code, trackid))
+        if "error" in response:
+            logger.error("{} - trackid: {}".format(response, trackid))
             messenger_logger.error(self._messenger_log_msg)
-
             return None
 
         try:
-            response = r.json()
-
-            logger.info("trackid: {}, response: {}".format(trackid, r.text))
+            logger.info("trackid: {}, response: {}".format(trackid, response))
 
             if not response["Success"] or response["ResultCode"] != 0:
                 logger.warning("trackid: {}, response: {}"
-                               .format(trackid, r.text))
+                               .format(trackid, response))
                 messenger_logger.error(self._messenger_log_msg)
 
                 return None
@@ -165,7 +177,7 @@ class Sep(IPayment):
 
             if len(detail["MaskedPan"]) != 16:
                 logger.warning("The card number is not 16 digits long - {}"
-                               .format(r.text))
+                               .format(response))
 
                 return None
 
@@ -187,7 +199,7 @@ class Sep(IPayment):
                 # possibility of a duplicate transaction
                 logger.warning(("Given that this transaction is over an hour "
                                 "old, verification will be omitted due to the "
-                                "risk of duplication - {}").format(r.text))
+                                "risk of duplication - {}").format(response))
 
                 return None
 
@@ -204,19 +216,15 @@ class Sep(IPayment):
                 record cannot be saved.
                 """
 
-                logger.error("{} - {}", e, r.text)
+                logger.error("{} - {}", e, response)
                 return None
 
-        except requests.exceptions.JSONDecodeError:
-            logger.error("response isn't json - {}", r.text)
-            messenger_logger.error(self._messenger_log_msg)
-            return None
-        except KeyError as e:
-            logger.error("{} - {}", e, r.text)
+        except (KeyError, TypeError) as e:
+            logger.error("{} - {}", e, response)
             messenger_logger.error(self._messenger_log_msg)
             return None
         except ValueError as e:
-            logger.error("{} - {}", e, r.text)
+            logger.error("{} - {}", e, response)
             messenger_logger.error(self._messenger_log_msg)
             return None
 
@@ -229,7 +237,7 @@ class Sep(IPayment):
                 type(detail["AffectiveAmount"]) is not int):
 
             logger.warning("The card number or response amount is invalid - {}"
-                           .format(r.text))
+                           .format(response))
 
             return None
 
@@ -246,6 +254,9 @@ class Sep(IPayment):
         [IMPORTANT] This method verifies successful transactions. Therefore,
         before using it, ensure the bank card used for payment is authorized to
         prevent verification of unauthorized transactions.
+
+        verifyPayment makes its request through this method, after ruling out
+        duplicate verifications.
         """
 
         url = ("https://sep.shaparak.ir/"
@@ -293,6 +304,51 @@ class Sep(IPayment):
 
             return response
 
+    def _recordAttempt(self, orderid: str, token: str,
+                       amount_toman: int) -> None:
+        try:
+            SepPaymentAttempt._default_manager.create(
+                orderid=orderid, token=token, amount_toman=amount_toman,
+                created_at=datetime.now(timezone.utc))
+        except Exception as e:
+            logger.error("Recording the payment attempt failed - {}, "
+                         "orderid: {}".format(e, orderid))
+
+    def _recordCallback(self, callback_data: Dict,
+                        status: PaymentStatus) -> None:
+
+        if "ResNum" not in callback_data:
+            return
+
+        match status:
+            case PaymentStatus.OK:
+                state = SepPaymentAttempt.State.CALLBACK
+                note = None
+            case PaymentStatus.UNAUTHORIZEDCARD:
+                state = SepPaymentAttempt.State.FAILED
+                note = "unauthorized card"
+            case PaymentStatus.PAYMENTFAILED:
+                state = SepPaymentAttempt.State.FAILED
+                note = str(callback_data.get("State"))[:150]
+            case _:
+                state = SepPaymentAttempt.State.FLAGGED
+                note = "invalid callback data"
+
+        attempts = SepPaymentAttempt._default_manager.filter(
+            orderid=callback_data["ResNum"],
+            state=SepPaymentAttempt.State.PENDING)
+
+        if "Token" in callback_data:
+            attempts = attempts.filter(token=callback_data["Token"])
+
+        try:
+            attempts.update(state=state, note=note,
+                            refnum=callback_data.get("RefNum"),
+                            callback_at=datetime.now(timezone.utc))
+        except Exception as e:
+            logger.error("Recording the payment callback failed - {} - {}"
+                         .format(e, callback_data))
+
     def _calcWage(self, amount_toman: int) -> int:
         if amount_toman < 600_000:
             return 120
@@ -0,0 +1,95 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from restapi.base.benchmark.catalog import CatalogScale, CatalogSeeder
+from restapi.base.benchmark.fake_sep import FakeSep
+from restapi.base.benchmark.runner import (CheckoutBenchmark,
+                                           compare_with_baseline)
+
+
+class Command(BaseCommand):
+    help = ("Seeds a synthetic catalog into a throwaway test database and "
+            "load-tests the checkout flow of the Order view")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--base-products", type=int, default=200)
+        parser.add_argument("--variations", type=int, default=3)
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--sessions", type=int, default=1,
+                            help="checkout sessions per user")
+        parser.add_argument("--cart-size", type=int, default=2)
+        parser.add_argument("--detail-reads", type=int, default=3,
+                            help="get-unpaid-order-details calls per session")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--gateway-latency-ms", type=float, default=50)
+        parser.add_argument("--baseline", help="JSON baseline to compare to")
+        parser.add_argument("--tolerance", type=float, default=.2)
+        parser.add_argument("--write-baseline",
+                            help="write the report to this path")
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"])
+
+        try:
+            report = self._run(options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"])
+
+        self._printReport(report)
+
+        if options["write_baseline"]:
+            with open(options["write_baseline"], "w") as f:
+                json.dump(report, f, indent=2)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+
+            regressions = compare_with_baseline(report, baseline,
+                                                options["tolerance"])
+
+            if regressions:
+                raise CommandError("Regressions against the baseline:\n" +
+                                   "\n".join(regressions))
+
+            self.stdout.write(self.style.SUCCESS("No regressions"))
+
+    def _run(self, options) -> dict:
+        scale = CatalogScale(categories=options["categories"],
+                             base_products=options["base_products"],
+                             variations=options["variations"],
+                             users=options["users"])
+
+        catalog = CatalogSeeder(scale).seed()
+
+        benchmark = CheckoutBenchmark(
+            catalog.product_ids, catalog.user_ids,
+            gateway=FakeSep(latency_ms=options["gateway_latency_ms"]),
+            sessions_per_user=options["sessions"],
+            cart_size=options["cart_size"],
+            detail_reads=options["detail_reads"],
+            concurrency=options["concurrency"])
+
+        return benchmark.run()
+
+    def _printReport(self, report: dict) -> None:
+        header = "{:<28} {:>8} {:>9} {:>9} {:>9} {:>10} {:>8}".format(
+            "endpoint", "requests", "p50 ms", "p95 ms", "p99 ms", "req/s",
+            "queries")
+
+        self.stdout.write(header)
+
+        for name, stats in report["endpoints"].items():
+            self.stdout.write(
+                "{:<28} {:>8} {:>9} {:>9} {:>9} {:>10} {:>8}".format(
+                    name, stats["requests"], stats["p50_ms"],
+                    stats["p95_ms"], stats["p99_ms"],
+                    stats["throughput_rps"], stats["queries_per_request"]))
+
+        self.stdout.write(f"wall time: {report['wall_seconds']}s")
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from restapi.base.benchmark.catalog import CatalogScale, CatalogSeeder
+from restapi.base.benchmark.flash_sale import FlashSaleBenchmark
+from restapi.base.shop.checkout_admission import CheckoutAdmission
+from restapi.models.product.product import Product
+
+
+class Command(BaseCommand):
+    help = ("Load-tests concurrent submit-cart calls for a single product, "
+            "with and without checkout admission control, and compares the "
+            "latency percentiles")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--stock", type=int, default=100)
+        parser.add_argument("--concurrency", type=int, default=64)
+
+    def handle(self, *args, **options):
+        results = {}
+
+        for mode in ("direct", "admission"):
+            results[mode] = self._runOnFreshDatabase(mode, options)
+
+        self.stdout.write("{:<10} {:>9} {:>9} {:>9} {:>8} {:>8}".format(
+            "mode", "p50 ms", "p95 ms", "p99 ms", "req/s", "orders"))
+
+        for mode, summary in results.items():
+            self.stdout.write("{:<10} {:>9} {:>9} {:>9} {:>8} {:>8}".format(
+                mode, summary["p50_ms"], summary["p95_ms"],
+                summary["p99_ms"], summary["throughput_rps"],
+                summary["orders_submitted"]))
+
+            if summary["orders_submitted"] > options["stock"]:
+                self.stderr.write(f"{mode}: more orders than stock")
+
+    def _runOnFreshDatabase(self, mode: str, options) -> dict:
+        old_name = connection.creation.create_test_db(verbosity=0,
+                                                      autoclobber=True)
+        admission = CheckoutAdmission.getInstance()
+
+        try:
+            catalog = CatalogSeeder(CatalogScale(
+                categories=1, base_products=1, variations=1,
+                users=options["users"], out_of_stock_ratio=0)).seed()
+
+            product_id = catalog.product_ids[0]
+            Product._default_manager.filter(id=product_id) \
+                .update(stock=options["stock"])
+
+            admission.setHotProducts([product_id] if mode == "admission"
+                                     else [])
+
+            return FlashSaleBenchmark(
+                product_id, catalog.user_ids,
+                concurrency=options["concurrency"]).run()
+        finally:
+            admission.setHotProducts([])
+            connection.creation.destroy_test_db(old_name, verbosity=0)
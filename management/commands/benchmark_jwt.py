@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+import secrets
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from django.core.management.base import BaseCommand
+
+from restapi.base.jwt_keyset import KeySet, KeySetTokenBackend, load_key
+
+
+def _pem_pair(private_key):
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+
+    return private_pem, public_pem
+
+
+def _key_configs(kid: str, algorithm: str):
+    """signing and verification-only configs of a fresh key"""
+
+    if algorithm == "HS256":
+        secret = secrets.token_urlsafe(48)
+        config = {"kid": kid, "algorithm": algorithm, "signing_key": secret}
+        return config, config
+
+    if algorithm == "EdDSA":
+        private_pem, public_pem = _pem_pair(
+            ed25519.Ed25519PrivateKey.generate())
+    else:
+        private_pem, public_pem = _pem_pair(
+            ec.generate_private_key(ec.SECP256R1()))
+
+    return ({"kid": kid, "algorithm": algorithm,
+             "signing_key": private_pem, "verifying_key": public_pem},
+            {"kid": kid, "algorithm": algorithm,
+             "verifying_key": public_pem})
+
+
+class Command(BaseCommand):
+    help = ("Compares the signing and verification throughput of HS256, "
+            "EdDSA and ES256 access tokens through the key-set token "
+            "backend")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tokens", type=int, default=5000)
+        parser.add_argument("--keys", type=int, default=4,
+                            help="keys in the key set (lookup by kid)")
+
+    def handle(self, *args, **options):
+        now = datetime.now(timezone.utc)
+        payload = {
+            "token_type": "access",
+            "exp": int((now + timedelta(minutes=5)).timestamp()),
+            "iat": int(now.timestamp()),
+            "jti": secrets.token_hex(16),
+            "user_id": 1,
+        }
+
+        self.stdout.write(f"{'algorithm':<10}{'sign/s':>12}{'verify/s':>12}")
+
+        for algorithm in ("HS256", "EdDSA", "ES256"):
+            configs = [_key_configs(f"key-{i}", algorithm)
+                       for i in range(options["keys"])]
+            signing_kid = configs[-1][0]["kid"]
+
+            signer = KeySetTokenBackend(
+                KeySet([load_key(config) for config, _ in configs],
+                       signing_kid))
+
+            # verification-only: no private keys
+            verifier = KeySetTokenBackend(
+                KeySet([load_key(config) for _, config in configs]))
+
+            sign_rate, tokens = self._measure(
+                lambda: signer.encode(payload), options["tokens"])
+
+            token_iter = iter(tokens)
+            verify_rate, _ = self._measure(
+                lambda: verifier.decode(next(token_iter)), len(tokens))
+
+            self.stdout.write(
+                f"{algorithm:<10}{sign_rate:>12,.0f}{verify_rate:>12,.0f}")
+
+    def _measure(self, call, count):
+        results = []
+        start = time.perf_counter()
+
+        for _ in range(count):
+            results.append(call())
+
+        return count / (time.perf_counter() - start), results
@@ -0,0 +1,75 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from restapi.base.benchmark.fake_sms import FakeSms
+from restapi.base.notification_queue import OtpDispatchQueue
+
+
+class Command(BaseCommand):
+    help = ("Sends a burst of OTP requests through the dispatch queue to a "
+            "fake SMS provider and prints the delivery metrics")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--numbers", type=int, default=1500,
+                            help="distinct mobile numbers in the burst")
+        parser.add_argument("--provider-latency-ms", type=float, default=100)
+        parser.add_argument("--no-batch", action="store_true")
+        parser.add_argument("--provider-failure-rate", type=float, default=0,
+                            help="share of provider requests returning 500")
+
+    def handle(self, *args, **options):
+        sms = FakeSms(latency_ms=options["provider_latency_ms"],
+                      batch=not options["no_batch"],
+                      failure_rate=options["provider_failure_rate"])
+
+        otp_queue = OtpDispatchQueue(lambda: sms)
+        rnd = random.Random(4)
+        start = time.perf_counter()
+
+        for _ in range(options["requests"]):
+            mobile = 9_000_000_000 + rnd.randrange(options["numbers"])
+            otp_queue.enqueue(mobile, f"{rnd.randrange(100_000):05}")
+
+        enqueue_seconds = time.perf_counter() - start
+
+        while True:
+            metrics = otp_queue.getMetrics()
+
+            # messages held back by the dedupe window are sent later
+            if (metrics["queue_size"] == 0 and
+                    metrics["sent"] + metrics["failed"] ==
+                    metrics["queued"] - metrics["delayed"]):
+                break
+
+            time.sleep(.05)
+
+        self.stdout.write(f"enqueue time: {enqueue_seconds * 1000:.1f} ms")
+        self.stdout.write(f"drain time: {time.perf_counter() - start:.2f} s")
+        self.stdout.write(f"provider requests: {sms.requests}")
+
+        for key, value in metrics.items():
+            self.stdout.write(f"{key}: {value}")
+
+        # numbers whose code wasn't delivered must be able to retry at once
+        failed_mobiles = {mobile for mobile, _ in sms.failed} - \
+            {mobile for mobile, _ in sms.sent}
+
+        if failed_mobiles:
+            delayed = otp_queue.getMetrics()["delayed"]
+
+            for mobile in failed_mobiles:
+                otp_queue.enqueue(mobile, "00000")
+
+            blocked = otp_queue.getMetrics()["delayed"] - delayed
+
+            if blocked:
+                self.stdout.write(self.style.ERROR(
+                    f"{blocked} numbers with failed sends were held back "
+                    "on retry"))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{len(failed_mobiles)} numbers with failed sends "
+                    "could retry"))
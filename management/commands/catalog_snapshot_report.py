@@ -0,0 +1,58 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from restapi.base.shop.catalog_snapshot import CatalogSnapshot, ProductRecord
+
+
+class Command(BaseCommand):
+    help = ("Loads the in-memory catalog snapshot and reports its memory use "
+            "per 100k products. --synthetic builds records in memory instead "
+            "of reading the database")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--synthetic", type=int, default=0,
+                            help="number of synthetic products")
+
+    def handle(self, *args, **options):
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        start = time.perf_counter()
+
+        if options["synthetic"]:
+            records = {
+                i: ProductRecord(
+                    id=i,
+                    title=f"Product {i}",
+                    cover_image_lq=f"product/games/{i}/cover-lq.webp",
+                    effective_price_irt=100_000 + i,
+                    currency="USD" if i % 3 == 0 else None,
+                    product_type="gift-card" if i % 2 else "game-pc-steam",
+                    in_stock=i % 10 != 0)
+                for i in range(1, options["synthetic"] + 1)}
+            count = len(records)
+        else:
+            snapshot = CatalogSnapshot.getInstance()
+            snapshot.load()
+            count = len(snapshot)
+
+        load_seconds = time.perf_counter() - start
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        # the query's transient allocations are freed by now
+        size = sum(stat.size_diff
+                   for stat in after.compare_to(before, "filename"))
+
+        if count == 0:
+            self.stdout.write("The catalog is empty")
+            return
+
+        self.stdout.write(f"products: {count}")
+        self.stdout.write(f"load time: {load_seconds:.2f}s")
+        self.stdout.write(f"memory: {size / 2**20:.2f} MiB "
+                          f"({size / count:.0f} bytes per product)")
+        self.stdout.write(self.style.SUCCESS(
+            f"memory per 100k products: "
+            f"{size / count * 100_000 / 2**20:.2f} MiB"))
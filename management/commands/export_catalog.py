@@ -0,0 +1,27 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from restapi.base.catalog_io import CatalogExporter
+
+
+class Command(BaseCommand):
+    help = "Exports the products as CSV or JSONL, in the import file format"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", help="defaults to stdout")
+        parser.add_argument("--format", choices=["csv", "jsonl"],
+                            default="csv")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        exporter = CatalogExporter(chunk_size=options["chunk_size"])
+
+        if options["path"] is None:
+            exporter.write(sys.stdout, options["format"])
+            return
+
+        with open(options["path"], "w", newline="", encoding="utf-8") as f:
+            count = exporter.write(f, options["format"])
+
+        self.stdout.write(self.style.SUCCESS(f"{count} products exported"))
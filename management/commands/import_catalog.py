@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from restapi.base.catalog_io import CatalogImporter, ImportResult, read_rows
+
+
+class Command(BaseCommand):
+    help = ("Imports product prices, stock and variations from a CSV or JSONL "
+            "file. Rows with an id update that product; rows without one "
+            "create a product")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "jsonl"])
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--start-line", type=int, default=0,
+                            help="skip the lines before this one (resume)")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or ("jsonl"
+                                    if options["path"].endswith(".jsonl")
+                                    else "csv")
+
+        importer = CatalogImporter(chunk_size=options["chunk_size"],
+                                   dry_run=options["dry_run"])
+
+        def on_chunk(result: ImportResult):
+            # --start-line is inclusive, so resuming starts after the line
+            self.stdout.write(f"committed up to line {result.last_line} "
+                              f"(resume with --start-line "
+                              f"{result.last_line + 1}) - "
+                              f"created: {result.created}, "
+                              f"updated: {result.updated}")
+
+        try:
+            with open(options["path"], newline="", encoding="utf-8") as f:
+                result = importer.run(read_rows(f, fmt),
+                                      start_line=options["start_line"],
+                                      on_chunk=on_chunk)
+        except ValueError as e:
+            raise CommandError(f"The file cannot be parsed - {e}")
+
+        for error in result.errors:
+            self.stderr.write(error)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"created: {result.created}, updated: {result.updated}, "
+            f"invalid rows: {len(result.errors)}"))
@@ -0,0 +1,77 @@
+from typing import Dict, List
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from restapi.base.startup import warmup
+
+
+DEFAULT_MODULES = ["restapi.views.order", "restapi.views.stock_events",
+                   "restapi.middleware.jwt_authentication"]
+
+
+def parse_importtime(output: str) -> Dict[str, Dict[str, int]]:
+    """parses the stderr of python -X importtime (times in microseconds)"""
+
+    modules = {}
+
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+
+        modules[name.strip()] = {"self": int(self_us),
+                                 "cumulative": int(cumulative_us)}
+
+    return modules
+
+
+class Command(BaseCommand):
+    help = ("Reports the import time of the modules a worker loads, using "
+            "python -X importtime in a fresh interpreter, and optionally the "
+            "duration of the warmup steps")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--module", action="append", dest="modules",
+                            help="module to import (repeatable)")
+        parser.add_argument("--top", type=int, default=25)
+        parser.add_argument("--warmup", action="store_true",
+                            help="also run and time the warmup steps")
+
+    def handle(self, *args, **options):
+        target_modules: List[str] = options["modules"] or DEFAULT_MODULES
+
+        code = "; ".join(["import django", "django.setup()"] +
+                         [f"import {name}" for name in target_modules])
+
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True, text=True, env=os.environ.copy())
+
+        if result.returncode != 0:
+            raise CommandError(result.stderr.splitlines()[-1]
+                               if result.stderr else "import failed")
+
+        modules = parse_importtime(result.stderr)
+        total_us = sum(module["self"] for module in modules.values())
+
+        self.stdout.write(f"{len(modules)} modules imported in "
+                          f"{total_us / 1000:.0f} ms")
+
+        for key in ("cumulative", "self"):
+            self.stdout.write(f"\nslowest by {key} time:")
+
+            slowest = sorted(modules.items(), key=lambda item: item[1][key],
+                             reverse=True)[:options["top"]]
+
+            for name, times in slowest:
+                self.stdout.write(f"{times[key] / 1000:9.1f} ms  {name}")
+
+        if options["warmup"]:
+            self.stdout.write("\nwarmup:")
+
+            for name, ms in warmup().items():
+                self.stdout.write(f"{ms:9.1f} ms  {name}")
@@ -0,0 +1,83 @@
+import statistics
+import tempfile
+import time
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from restapi.middleware.sampling_profiler import SamplingProfiler
+
+
+def _view(request):
+    # a small amount of work, roughly a cheap API call
+    sum(i * i for i in range(20_000))
+    return HttpResponse(b"{}", content_type="application/json")
+
+
+_VIEW_NAME = f"{_view.__module__}.{_view.__qualname__}"
+
+
+class Command(BaseCommand):
+    help = ("Measures the per-request overhead of the sampling profiler "
+            "middleware when disabled, when enabled but not sampling, and "
+            "when profiling every request")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        request_count = options["requests"]
+
+        with override_settings(PROFILER_ENABLED=False):
+            try:
+                SamplingProfiler(_view)
+                self.stdout.write(self.style.ERROR(
+                    "disabled: the middleware was not removed"))
+            except MiddlewareNotUsed:
+                self.stdout.write("disabled: removed at startup, "
+                                  "no per-request overhead")
+
+        baseline = self._measure(lambda request: _view(request), factory,
+                                 request_count)
+        self._report("no middleware", baseline, baseline)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            for label, rate in (("enabled, not sampling", 0),
+                                ("profiling every request", 1)):
+
+                with override_settings(PROFILER_ENABLED=True,
+                                       PROFILER_VIEWS=[_VIEW_NAME],
+                                       PROFILER_SAMPLE_RATE=rate,
+                                       PROFILER_OUTPUT_DIR=output_dir):
+                    middleware = SamplingProfiler(_view)
+
+                def handler(request, middleware=middleware):
+                    # the order Django calls the middleware hooks in
+                    def get_response(request):
+                        middleware.process_view(request, _view, (), {})
+                        return _view(request)
+
+                    middleware.get_response = get_response
+                    return middleware(request)
+
+                count = request_count if rate == 0 else request_count // 10
+                self._report(label, self._measure(handler, factory, count),
+                             baseline)
+
+    def _measure(self, handler, factory, count):
+        durations = []
+
+        for _ in range(count):
+            request = factory.get("/profiler-overhead/")
+            start = time.perf_counter()
+            handler(request)
+            durations.append(time.perf_counter() - start)
+
+        return statistics.median(durations)
+
+    def _report(self, label, median, baseline):
+        self.stdout.write(f"{label}: median {median * 1e6:.0f} us "
+                          f"(+{(median - baseline) * 1e6:.0f} us)")
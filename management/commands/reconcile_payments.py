@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from restapi.base.payment_reconciler import PaymentReconciler, summarize
+from restapi.base.third_party_api.sep import Sep
+
+
+class Command(BaseCommand):
+    help = ("Verifies the Sep payments whose callback arrived but which were "
+            "never verified, completes the successful ones and flags the "
+            "rest for review. Meant to run periodically, e.g. every 5 "
+            "minutes")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--rate", type=float, default=5,
+                            help="verification requests per second")
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--grace-seconds", type=int, default=120,
+                            help="time left for the callback to verify")
+
+    def handle(self, *args, **options):
+        gateway = Sep(settings.SEP_TERMINAL_ID,
+                      getattr(settings, "SEP_CALLBACK_URL", ""))
+
+        reconciler = PaymentReconciler(
+            gateway, workers=options["workers"], rate=options["rate"],
+            batch_size=options["batch_size"],
+            grace_seconds=options["grace_seconds"])
+
+        report = reconciler.run()
+
+        for line in summarize(report):
+            self.stdout.write(line)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from restapi.base.service.repricing import RepricingService
+
+
+class Command(BaseCommand):
+    help = "Recomputes the effective toman price of all products"
+
+    def handle(self, *args, **options):
+        count = RepricingService().repriceAll()
+        self.stdout.write(self.style.SUCCESS(f"{count} products repriced"))
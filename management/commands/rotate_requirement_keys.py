@@ -0,0 +1,108 @@
+from typing import List
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from restapi.base.crypto_service import (get_fernet_keys,
+                                         init_rotation_worker, rotate_tokens)
+from restapi.models import Order
+
+
+class Command(BaseCommand):
+    help = ("Re-encrypts the passwords stored in order requirements with the "
+            "current key of FERNET_KEYS. Orders are processed in id order and "
+            "in batches, so an interrupted run can be resumed with --start-id")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+        parser.add_argument("--start-id", type=int, default=0)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        keys = get_fernet_keys()
+
+        if len(keys) == 1:
+            self.stdout.write("Only one key is configured, nothing to rotate")
+            return
+
+        last_id = options["start_id"] - 1
+        total = 0
+
+        with ProcessPoolExecutor(max_workers=options["workers"],
+                                 initializer=init_rotation_worker,
+                                 initargs=(keys,)) as pool:
+            while True:
+                ids = list(Order._default_manager
+                           .filter(id__gt=last_id,
+                                   requirements__isnull=False)
+                           .order_by("id")
+                           .values_list("id", flat=True)
+                           [:options["batch_size"]])
+
+                if not ids:
+                    break
+
+                rotated = self._rotateBatch(pool, ids, options["workers"],
+                                            options["dry_run"])
+
+                total += rotated
+                last_id = ids[-1]
+
+                self.stdout.write(f"orders up to id {last_id}: "
+                                  f"{rotated} passwords rotated")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} passwords rotated"
+            + (" (dry run)" if options["dry_run"] else "")))
+
+    def _rotateBatch(self, pool: ProcessPoolExecutor, ids: List[int],
+                     workers: int, dry_run: bool) -> int:
+
+        with transaction.atomic():
+            orders = list(Order._default_manager
+                          .select_for_update()
+                          .filter(id__in=ids)
+                          .only("id", "requirements"))
+
+            locations = []
+            tokens = []
+
+            for order in orders:
+                if not isinstance(order.requirements, dict):
+                    continue
+
+                for name, value in order.requirements.items():
+                    if isinstance(value, dict) and value.get("password"):
+                        locations.append((order, name))
+                        tokens.append(value["password"])
+
+            if not tokens:
+                return 0
+
+            size = math.ceil(len(tokens) / workers)
+            rotated = [token
+                       for part in pool.map(rotate_tokens,
+                                            [tokens[i:i + size] for i in
+                                             range(0, len(tokens), size)])
+                       for token in part]
+
+            changed = {}
+
+            for (order, name), old, new in zip(locations, tokens, rotated):
+                if new is None:
+                    self.stderr.write(f"order {order.id}: the password of "
+                                      f"{name} cannot be decrypted")
+                elif new != old:
+                    order.requirements[name]["password"] = new
+                    changed[order.id] = order
+
+            if changed and not dry_run:
+                Order._default_manager.bulk_update(changed.values(),
+                                                   ["requirements"])
+
+            return sum(1 for old, new in zip(tokens, rotated)
+                       if new is not None and new != old)
@@ -1,7 +1,9 @@
 from typing import cast
 
 from django.http import HttpRequest, HttpResponse
-from rest_framework_simplejwt.tokens import AccessToken, Token
+from rest_framework_simplejwt.tokens import Token
+
+from restapi.base.jwt_keyset import KeySetAccessToken
 
 
 class JwtAuthentication:
@@ -20,7 +22,7 @@ class JwtAuthentication:
                 # because authentication is handled in the view if necessary.
 
                 try:
-                    AccessToken(cast(Token, cookies["access"]))
+                    KeySetAccessToken(cast(Token, cookies["access"]))
                 except Exception:
                     # token is invalid or expired
                     return self.get_response(request)
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from restapi.base.db_router import (has_written, pin_to_primary,
+                                     reset_pinning)
+
+
+class PrimaryPinning:
+    """
+    Replicas may lag behind the primary, so a client that has just written
+    (e.g. submitted its cart) keeps reading from the primary for
+    DATABASE_PRIMARY_PIN_SECONDS seconds. This is tracked with a short-lived
+    cookie set on responses of requests that wrote to the database.
+    """
+
+    cookie_name = "pin_primary"
+
+    # __init__() is called only once, when the web server starts.
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._pin_seconds = getattr(settings, "DATABASE_PRIMARY_PIN_SECONDS",
+                                    5)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        reset_pinning()
+
+        if self.cookie_name in request.COOKIES:
+            pin_to_primary()
+
+        response = self.get_response(request)
+
+        if has_written():
+            response.set_cookie(self.cookie_name, "1",
+                                max_age=self._pin_seconds,
+                                httponly=True, samesite="Lax")
+
+        reset_pinning()
+        return response
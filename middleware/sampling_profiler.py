@@ -0,0 +1,192 @@
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from pathlib import Path
+import hmac
+import itertools
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from rest_framework_simplejwt.settings import api_settings
+
+from restapi.base.jwt_keyset import KeySetAccessToken
+from restapi.base.sampling_profiler import QueryTimer, StackSampler
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """
+    Opt-in profiler for slow endpoints in production. Requests to the views
+    in PROFILER_VIEWS (the Order view by default; the Sep callback view
+    should be added in the settings) are profiled when:
+
+    - they are the Nth request to those views (PROFILER_SAMPLE_RATE, 0 to
+      disable random sampling),
+    - they carry the PROFILER_HEADER header set to PROFILER_HEADER_SECRET
+      (the header is ignored unless the secret is set), or
+    - they are sent by a user in PROFILER_UIDS.
+
+    Each profiled request writes a collapsed-stack file and a JSON breakdown
+    (wall, database and estimated HTTP time, slowest queries) to
+    PROFILER_OUTPUT_DIR, which keeps the latest PROFILER_MAX_PROFILES
+    profiles. At most PROFILER_MAX_CONCURRENT requests are profiled at once,
+    and sampling stops after PROFILER_MAX_SECONDS.
+
+    Unless PROFILER_ENABLED is set, the middleware removes itself at startup,
+    so it costs nothing when disabled.
+    """
+
+    # __init__() is called only once, when the web server starts.
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILER_ENABLED", False):
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+        self._views = set(getattr(settings, "PROFILER_VIEWS",
+                                  ["restapi.views.order.Order"]))
+        self._rate = getattr(settings, "PROFILER_SAMPLE_RATE", 100)
+        self._header = "HTTP_" + getattr(settings, "PROFILER_HEADER",
+                                         "X-Profile").upper() \
+            .replace("-", "_")
+        self._header_secret = getattr(settings, "PROFILER_HEADER_SECRET",
+                                      None)
+        self._uids = set(getattr(settings, "PROFILER_UIDS", []))
+        self._interval = getattr(settings, "PROFILER_INTERVAL_MS", 5) / 1000
+        self._max_seconds = getattr(settings, "PROFILER_MAX_SECONDS", 30)
+        self._output_dir = Path(getattr(settings, "PROFILER_OUTPUT_DIR",
+                                        "/tmp/game4sell-profiles"))
+        self._max_profiles = getattr(settings, "PROFILER_MAX_PROFILES", 500)
+
+        self._slots = threading.BoundedSemaphore(
+            getattr(settings, "PROFILER_MAX_CONCURRENT", 2))
+        self._counter = itertools.count(1)
+        self._local = threading.local()
+
+        self._output_dir.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        self._local.profile = None
+
+        response = self.get_response(request)
+
+        profile = self._local.profile
+
+        if profile is not None:
+            self._local.profile = None
+            self._finish(request, response, *profile)
+
+        return response
+
+    def process_view(self, request: HttpRequest, view_func, view_args,
+                     view_kwargs):
+
+        view_class = getattr(view_func, "view_class", view_func)
+        view_name = f"{view_class.__module__}.{view_class.__qualname__}"
+
+        if view_name not in self._views or not self._shouldProfile(request):
+            return None
+
+        if not self._slots.acquire(blocking=False):
+            return None
+
+        sampler = StackSampler(threading.get_ident(), self._interval,
+                               self._max_seconds)
+        query_timer = QueryTimer()
+        stack = ExitStack()
+
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(query_timer))
+
+        self._local.profile = (sampler, query_timer, stack,
+                               time.perf_counter())
+        sampler.start()
+
+        return None
+
+    def _shouldProfile(self, request: HttpRequest) -> bool:
+        header = request.META.get(self._header)
+
+        if (header is not None and self._header_secret and
+                hmac.compare_digest(header.encode(),
+                                    self._header_secret.encode())):
+            return True
+
+        if self._uids and self._getUid(request) in self._uids:
+            return True
+
+        return self._rate > 0 and next(self._counter) % self._rate == 0
+
+    def _getUid(self, request: HttpRequest) -> int | None:
+        token = request.COOKIES.get("access")
+
+        if token is None:
+            return None
+
+        try:
+            return KeySetAccessToken(token)[api_settings.USER_ID_CLAIM]
+        except Exception:
+            return None
+
+    def _finish(self, request: HttpRequest, response: HttpResponse,
+                sampler: StackSampler, query_timer: QueryTimer,
+                stack: ExitStack, start: float) -> None:
+
+        wall = time.perf_counter() - start
+
+        try:
+            sampler.stop()
+            stack.close()
+            self._write(request, response, sampler, query_timer, wall)
+        except Exception as e:
+            logger.error("Writing the profile of {} failed - {}"
+                         .format(request.path, e))
+        finally:
+            self._slots.release()
+
+    def _write(self, request: HttpRequest, response: HttpResponse,
+               sampler: StackSampler, query_timer: QueryTimer,
+               wall: float) -> None:
+
+        name = "{}-{}-{}".format(
+            datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f"),
+            request.method,
+            request.path.strip("/").replace("/", "_")[:80])
+
+        (self._output_dir / f"{name}.collapsed").write_text(
+            "\n".join(sampler.collapsed()) + "\n")
+
+        breakdown = {
+            "path": request.path,
+            "method": request.method,
+            "status": response.status_code,
+            "uid": getattr(getattr(request, "user", None), "id", None),
+            "wall_ms": wall * 1000,
+            "db_ms": query_timer.total_seconds * 1000,
+            "db_queries": query_timer.count,
+            "http_ms_estimate": sampler.httpShare * wall * 1000,
+            "samples": sampler.samples,
+            "sample_interval_ms": self._interval * 1000,
+            "slowest_queries": query_timer.slowest(),
+        }
+
+        (self._output_dir / f"{name}.json").write_text(
+            json.dumps(breakdown, indent=2))
+
+        self._prune()
+
+    def _prune(self) -> None:
+        """removes the oldest profiles beyond PROFILER_MAX_PROFILES"""
+
+        # names start with the UTC timestamp, so they sort by age
+        profiles = sorted(self._output_dir.glob("*.json"))
+
+        for path in profiles[:max(0, len(profiles) - self._max_profiles)]:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".collapsed").unlink(missing_ok=True)
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from restapi.base.startup import warmup
+
+
+class Warmup:
+    """
+    Runs the startup warmup (restapi.base.startup) once per worker, when its
+    WSGI/ASGI handler loads the middleware, i.e. before it serves the first
+    request. Management commands don't load middleware, so they don't pay for
+    it. It should be the first entry of MIDDLEWARE; with an application
+    preloaded before forking (gunicorn --preload), call warmup() from the
+    post_fork hook instead, since the connections and threads it starts
+    don't survive a fork. WARMUP_ON_STARTUP = False turns it off.
+    """
+
+    # __init__() is called only once, when the web server starts.
+    def __init__(self, get_response):
+        if getattr(settings, "WARMUP_ON_STARTUP", True):
+            warmup()
+
+        # nothing to do per request
+        raise MiddlewareNotUsed()
@@ -1,4 +1,5 @@
 from django.db import models
+from datetimeutc.fields import DateTimeUTCField
 from .category import ProductCategory
 
 
@@ -16,3 +17,4 @@ class BaseProduct(models.Model):
     additional_details = models.JSONField(null=True)
     cover_image = models.ImageField(upload_to=get_upload_path)
     cover_image_lq = models.ImageField(upload_to=get_upload_path)
+    updated_at = DateTimeUTCField(auto_now=True, db_index=True)
@@ -1,4 +1,5 @@
 from django.db import models
+from datetimeutc.fields import DateTimeUTCField
 from .base import BaseProduct
 from .currency import Currency
 from .type import ProductType
@@ -14,3 +15,10 @@ class Product(models.Model):
     product_type = models.ForeignKey(ProductType, null=True,
                                      on_delete=models.RESTRICT)
     stock = models.IntegerField(default=0)
+
+    # price_irt, or non_rial_value converted to toman for non-rial products;
+    # maintained by the repricing service
+    effective_price_irt = models.PositiveIntegerField(null=True)
+
+    # watermark of the in-memory catalog snapshots; bulk updates must set it
+    updated_at = DateTimeUTCField(auto_now=True, db_index=True)
@@ -0,0 +1,18 @@
+from django.db import models
+from datetimeutc.fields import DateTimeUTCField
+
+from .currency import Currency
+
+
+class RepricingRun(models.Model):
+    """
+    A record of each recomputation of the effective prices of products. A null
+    currency means all products were repriced.
+    """
+
+    currency = models.ForeignKey(Currency, on_delete=models.SET_NULL,
+                                 null=True)
+    toman_value = models.FloatField(null=True)
+    products_updated = models.PositiveIntegerField()
+    started_at = DateTimeUTCField()
+    duration_ms = models.PositiveIntegerField()
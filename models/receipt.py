@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.db import models
+from datetimeutc.fields import DateTimeUTCField
+
+
+class OrderReceipt(models.Model):
+    """
+    A paid order frozen at verification time: line prices, the currency rates
+    they were computed with, the total and the masked paying card. Receipts
+    are immutable, so past orders are shown as they were paid regardless of
+    later price or product changes.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.PROTECT)
+    order = models.OneToOneField("restapi.Order", on_delete=models.SET_NULL,
+                                 null=True)
+    refnum = models.CharField(max_length=50, unique=True)
+
+    # [{"product_id", "title", "count", "unit_price_irt", "currency",
+    #   "non_rial_value"}]
+    lines = models.JSONField()
+    currency_rates = models.JSONField()  # currency unit -> toman value
+    total_toman = models.PositiveIntegerField()
+    paid_amount_rial = models.PositiveBigIntegerField()
+    card_first_digits = models.PositiveIntegerField()
+    card_last_digits = models.PositiveSmallIntegerField()
+    paid_at = DateTimeUTCField()
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "-paid_at", "-id"])]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Receipts cannot be modified")
+
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Receipts cannot be deleted")
+
+
+class OrderLineSnapshot(models.Model):
+    """
+    A line of an order as submitted, with its price and the currency rate it
+    was computed with, written together with the order so its receipt can be
+    frozen without reading the order lines or current prices back.
+    """
+
+    order = models.ForeignKey("restapi.Order", on_delete=models.CASCADE,
+                              related_name="line_snapshots")
+    product = models.ForeignKey("restapi.Product", on_delete=models.SET_NULL,
+                                null=True)
+    title = models.CharField(max_length=200)
+    count = models.PositiveIntegerField()
+
+    # at submission
+    unit_price_irt = models.PositiveIntegerField()
+    currency = models.CharField(max_length=5, null=True)
+    non_rial_value = models.FloatField(null=True)
+    toman_value = models.FloatField(null=True)
+
+
+class UserPurchaseStats(models.Model):
+    """per-user purchase totals, updated as receipts are created"""
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL,
+                                on_delete=models.CASCADE, primary_key=True)
+    order_count = models.PositiveIntegerField(default=0)
+    total_spent_toman = models.PositiveBigIntegerField(default=0)
+    last_paid_at = DateTimeUTCField(null=True)
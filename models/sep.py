@@ -16,3 +16,34 @@ class SepPayment(models.Model):
 
     refnum = models.CharField(unique=True, max_length=50)
     payment_date = DateTimeUTCField()
+
+
+class SepPaymentAttempt(models.Model):
+    """
+    Each payment token requested from Sep is recorded as an attempt, so that
+    payments whose verification never completed can be reconciled.
+
+    An attempt moves to CALLBACK once its callback arrives and the payment is
+    verifiable, i.e. its state is OK and the card is authorized, and to
+    SETTLED once the payment is verified and the order is marked as paid. The
+    reconciliation job completes CALLBACK attempts that were never verified,
+    and flags those it can't complete for review.
+    """
+
+    class State(models.TextChoices):
+        PENDING = "pending"  # waiting for the callback
+        CALLBACK = "callback"  # verifiable, waiting for verification
+        SETTLED = "settled"
+        FAILED = "failed"
+        FLAGGED = "flagged"  # needs manual review
+
+    orderid = models.CharField(max_length=50, db_index=True)
+    token = models.CharField(max_length=100)
+    amount_toman = models.PositiveIntegerField()
+    refnum = models.CharField(max_length=50, null=True)
+    state = models.CharField(max_length=10, choices=State.choices,
+                             default=State.PENDING, db_index=True)
+    paid_amount_rial = models.PositiveBigIntegerField(null=True)
+    note = models.CharField(max_length=150, null=True)
+    created_at = DateTimeUTCField()
+    callback_at = DateTimeUTCField(null=True)
@@ -0,0 +1,10 @@
+def new_instance(cls, *args, **kwargs):
+    """
+    Builds a separate instance of a singleton class, bypassing SingletonMeta,
+    so each test starts from fresh state and current settings.
+    """
+
+    instance = cls.__new__(cls)
+    instance.__init__(*args, **kwargs)
+
+    return instance
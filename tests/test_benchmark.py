@@ -0,0 +1,74 @@
+from django.test import SimpleTestCase
+
+from restapi.base.benchmark.fake_sep import FakeSep
+from restapi.base.benchmark.runner import (EndpointStats,
+                                           compare_with_baseline, percentile)
+
+
+def endpoint(p99_ms: float = 10, throughput_rps: float = 100,
+             queries_per_request: float = 5) -> dict:
+    return {"p50_ms": 1, "p95_ms": 5, "p99_ms": p99_ms,
+            "throughput_rps": throughput_rps,
+            "queries_per_request": queries_per_request}
+
+
+class ReportTest(SimpleTestCase):
+    def test_percentile_is_nearest_rank(self):
+        values = [.5, .1, .4, .3, .2]
+
+        self.assertEqual(percentile(values, 50), .3)
+        self.assertEqual(percentile(values, 99), .5)
+        self.assertEqual(percentile([], 50), 0)
+
+    def test_summary(self):
+        stats = EndpointStats()
+
+        for status_code in (200, 200, 500, 429):
+            stats.record(.01, 3, status_code)
+
+        summary = stats.summary(wall_seconds=2)
+
+        self.assertEqual(summary["requests"], 4)
+        self.assertEqual(summary["errors"], 1)
+        self.assertEqual(summary["status"],
+                         {"200": 2, "429": 1, "500": 1})
+        self.assertEqual(summary["throughput_rps"], 2)
+        self.assertEqual(summary["queries_per_request"], 3)
+
+
+class CompareWithBaselineTest(SimpleTestCase):
+    def test_drift_within_the_tolerance_passes(self):
+        report = {"endpoints": {"submit-cart": endpoint(p99_ms=11.9,
+                                                        throughput_rps=81)}}
+        baseline = {"endpoints": {"submit-cart": endpoint()}}
+
+        self.assertEqual(compare_with_baseline(report, baseline, .2), [])
+
+    def test_regressions_are_reported(self):
+        report = {"endpoints": {"submit-cart": endpoint(
+            p99_ms=13, throughput_rps=70, queries_per_request=6)}}
+        baseline = {"endpoints": {"submit-cart": endpoint(),
+                                  "get-cart-details": endpoint()}}
+
+        regressions = compare_with_baseline(report, baseline, .2)
+
+        self.assertEqual(len(regressions), 4)
+        self.assertIn("get-cart-details: endpoint missing from the run",
+                      regressions)
+
+    def test_any_extra_query_is_a_regression(self):
+        report = {"endpoints": {"submit-cart": endpoint(
+            queries_per_request=5.01)}}
+        baseline = {"endpoints": {"submit-cart": endpoint()}}
+
+        self.assertEqual(len(compare_with_baseline(report, baseline)), 1)
+
+
+class FakeSepTest(SimpleTestCase):
+    def test_payment_is_verified_once(self):
+        sep = FakeSep()
+        token = sep.requestPayment("1", 1000)
+
+        self.assertEqual(sep.verifyPayment(token).paid_amount_rial, 10_000)
+        self.assertIsNone(sep.verifyPayment(token))
+        self.assertIsNone(sep.verifyPayment("unknown"))
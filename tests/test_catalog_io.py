@@ -0,0 +1,60 @@
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from restapi.base.catalog_io import CatalogImporter, InvalidRow, read_rows
+
+
+class ReadRowsTest(SimpleTestCase):
+    def test_invalid_json_becomes_an_invalid_row(self):
+        stream = io.StringIO('{"id": 1}\n\n{"id": \n{"id": 2}\n')
+
+        rows = list(read_rows(stream, "jsonl"))
+
+        self.assertEqual(rows[0], (1, {"id": 1}))
+        self.assertEqual(rows[1][0], 3)
+        self.assertIsInstance(rows[1][1], InvalidRow)
+        self.assertEqual(rows[2], (4, {"id": 2}))
+
+
+class CatalogImporterTest(TestCase):
+    def test_invalid_rows_are_reported_per_line(self):
+        rows = [(1, InvalidRow("invalid JSON")), (2, [])]
+
+        result = CatalogImporter().run(rows)
+
+        self.assertEqual(len(result.errors), 2)
+        self.assertTrue(result.errors[0].startswith("line 1: invalid JSON"))
+        self.assertTrue(result.errors[1].startswith("line 2:"))
+
+    def test_resume_starts_at_the_given_line(self):
+        committed = []
+        rows = [(line, {"id": "x"}) for line in range(1, 6)]
+
+        result = CatalogImporter(chunk_size=2).run(
+            rows, start_line=3,
+            on_chunk=lambda result: committed.append(result.last_line))
+
+        self.assertEqual(committed, [4, 5])
+        self.assertEqual([error.split(":")[0] for error in result.errors],
+                         ["line 3", "line 4", "line 5"])
+
+    def test_progress_reports_the_line_to_resume_from(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl",
+                                         delete=False) as f:
+            f.write('{"id": 1}\nnot json\n')
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+
+        try:
+            call_command("import_catalog", f.name, chunk_size=1,
+                         stdout=stdout, stderr=stderr)
+        finally:
+            os.remove(f.name)
+
+        self.assertIn("committed up to line 2 (resume with --start-line 3)",
+                      stdout.getvalue())
+        self.assertIn("line 2: invalid JSON", stderr.getvalue())
@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete
+from django.test import TestCase, override_settings
+
+from restapi.base.service.product_service import ProductService
+from restapi.base.shop.catalog_snapshot import CatalogSnapshot
+from restapi.models.product.product import Product
+from restapi.tests.helpers import new_instance
+
+
+def summary(product_id: int) -> SimpleNamespace:
+    return SimpleNamespace(id=product_id, title=f"Product {product_id}",
+                           price_irt=1000)
+
+
+@override_settings(CATALOG_SNAPSHOT_INTERVAL=3600)
+class CatalogSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.snapshot = new_instance(CatalogSnapshot)
+
+        patcher = mock.patch.object(CatalogSnapshot, "getInstance",
+                                    return_value=self.snapshot)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch.object(
+            ProductService, "getProductSummaryByIds",
+            side_effect=lambda ids: [summary(i) for i in ids if i != 404])
+        self.summaries = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_summaries_keep_the_product_service_shape(self):
+        self.assertEqual(self.snapshot.getSummaries([1, 404, 2]),
+                         [summary(1).__dict__, summary(2).__dict__])
+
+    def test_summaries_are_served_from_memory(self):
+        self.snapshot.getSummaries([1, 2])
+        self.snapshot.getSummaries([2, 1])
+
+        self.assertEqual(self.summaries.call_count, 2)
+
+    def test_stock_changes_rebuild_the_summary(self):
+        self.snapshot.getSummaries([1])
+        self.snapshot.updateStocks({1: 0})
+        self.snapshot.getSummaries([1])
+
+        self.assertEqual(self.summaries.call_count, 2)
+
+    def test_deletion_is_announced_to_other_workers(self):
+        other = new_instance(CatalogSnapshot)
+        other.load()
+        self.snapshot.getSummaries([1])
+
+        post_delete.send(sender=Product, instance=SimpleNamespace(pk=1))
+        self.snapshot.getSummaries([1])
+
+        # dropped here right away, and reloaded by the other worker
+        self.assertEqual(self.summaries.call_count, 2)
+
+        with mock.patch.object(other, "load") as load:
+            other.refresh()
+
+        load.assert_called_once()
+
+    def test_refresh_without_deletions_is_incremental(self):
+        self.snapshot.load()
+
+        with mock.patch.object(self.snapshot, "load") as load:
+            self.snapshot.refresh()
+
+        self.assertFalse(load.called)
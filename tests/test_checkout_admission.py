@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+from unittest import mock
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from restapi.base.shop.checkout_admission import CheckoutAdmission
+from restapi.base.shop.order_handler import ErrorId, OrderHandler
+from restapi.tests.helpers import new_instance
+
+
+class SlowOrderHandler:
+    def __init__(self) -> None:
+        self.release = threading.Event()
+
+    def submitOrder(self, user, order_list):
+        self.release.wait(timeout=5)
+        return True
+
+
+@override_settings(CHECKOUT_HEARTBEAT_INTERVAL=.05)
+class CheckoutAdmissionTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SimpleNamespace(id=1)
+        self.handler = SlowOrderHandler()
+
+        patcher = mock.patch.object(OrderHandler, "getInstance",
+                                    return_value=self.handler)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.handler.release.set)
+
+    def test_long_submission_keeps_the_ticket_pending(self):
+        admission = new_instance(CheckoutAdmission)
+        ticket = admission.submit(self.user, [{"id": 1, "count": 1}], 1)
+
+        # well past three heartbeat intervals
+        time.sleep(.4)
+        self.assertEqual(admission.getResult(ticket, 1)["state"], "pending")
+
+        self.handler.release.set()
+        deadline = time.monotonic() + 5
+
+        while admission.getResult(ticket, 1)["state"] == "pending":
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(.01)
+
+        self.assertIsNone(admission.getResult(ticket, 1)["error"])
+
+    def test_ticket_of_a_gone_worker_fails(self):
+        admission = new_instance(CheckoutAdmission)
+        ticket = "t1"
+
+        # issued by a worker that has stopped beating
+        cache.set(admission._ticketKey(ticket),
+                  {"uid": 1, "state": "pending", "worker": "gone"})
+
+        with self.assertLogs("restapi.base.shop.checkout_admission",
+                             "ERROR"):
+            result = admission.getResult(ticket, 1)
+
+        self.assertEqual(result["state"], "done")
+        self.assertEqual(result["error"].error_id, ErrorId.SAVE_ERROR)
+
+    def test_tickets_belong_to_their_user(self):
+        admission = new_instance(CheckoutAdmission)
+        ticket = admission.submit(self.user, [{"id": 1, "count": 1}], 1)
+
+        self.assertIsNone(admission.getResult(ticket, 2))
@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from restapi.base.shop.checkout_cache import CheckoutSnapshotCache
+from restapi.tests.helpers import new_instance
+
+
+@override_settings(CACHES={"default": {
+    "BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class CheckoutSnapshotCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.snapshots = new_instance(CheckoutSnapshotCache)
+
+    def test_snapshot_has_no_passwords(self):
+        requirements = {"epic-email-pass": {"email": "a@example.com",
+                                            "password": "secret"},
+                        "steam-tradelink": None}
+
+        self.snapshots.set(1, 250_000, requirements)
+        snapshot = self.snapshots.get(1)
+
+        self.assertEqual(snapshot["price"], 250_000)
+        self.assertEqual(snapshot["requirements"],
+                         {"epic-email-pass": {"email": "a@example.com"},
+                          "steam-tradelink": None})
+
+        # the order's own requirements are left as they are
+        self.assertIn("password", requirements["epic-email-pass"])
+
+    def test_invalidate_drops_only_the_users_snapshot(self):
+        self.snapshots.set(1, 100, {})
+        self.snapshots.set(2, 200, {})
+
+        self.snapshots.invalidate(1)
+
+        self.assertIsNone(self.snapshots.get(1))
+        self.assertEqual(self.snapshots.get(2)["price"], 200)
+
+    def test_currency_change_invalidates_every_snapshot(self):
+        self.snapshots.set(1, 100, {})
+        self.snapshots.set(2, 200, {})
+
+        self.snapshots.invalidateAll()
+
+        self.assertIsNone(self.snapshots.get(1))
+        self.assertIsNone(self.snapshots.get(2))
+
+        # snapshots taken afterwards are valid again
+        self.snapshots.set(1, 150, {})
+        self.assertEqual(self.snapshots.get(1)["price"], 150)
+
+    def test_invalidate_all_without_snapshots(self):
+        self.snapshots.invalidateAll()
+
+        self.assertIsNone(self.snapshots.get(1))
@@ -0,0 +1,50 @@
+from cryptography.fernet import Fernet
+from django.test import SimpleTestCase, override_settings
+
+from restapi.base.crypto_service import (CryptoService, get_fernet_keys,
+                                         init_rotation_worker, rotate_tokens)
+from restapi.tests.helpers import new_instance
+
+OLD_KEY = Fernet.generate_key().decode()
+NEW_KEY = Fernet.generate_key().decode()
+
+
+@override_settings(FERNET_KEY=OLD_KEY, FERNET_KEYS=[NEW_KEY, OLD_KEY])
+class CryptoServiceTest(SimpleTestCase):
+    def test_newest_key_encrypts(self):
+        token = new_instance(CryptoService).encrypt("secret")
+
+        self.assertEqual(Fernet(NEW_KEY).decrypt(token.encode()), b"secret")
+
+    def test_older_keys_decrypt(self):
+        token = Fernet(OLD_KEY).encrypt(b"secret").decode()
+
+        self.assertEqual(new_instance(CryptoService).decrypt(token), "secret")
+
+    def test_undecryptable_token(self):
+        token = Fernet.generate_key().decode()
+
+        with self.assertLogs("restapi.base.crypto_service", "ERROR"):
+            self.assertIsNone(new_instance(CryptoService).decrypt(token))
+
+    def test_first_key_may_differ_from_fernet_key(self):
+        self.assertEqual(get_fernet_keys(), [NEW_KEY, OLD_KEY])
+
+    @override_settings(FERNET_KEYS=None)
+    def test_falls_back_to_fernet_key(self):
+        self.assertEqual(get_fernet_keys(), [OLD_KEY])
+
+
+class RotateTokensTest(SimpleTestCase):
+    def test_rotates_to_the_newest_key(self):
+        init_rotation_worker([NEW_KEY, OLD_KEY])
+
+        old = Fernet(OLD_KEY).encrypt(b"old").decode()
+        current = Fernet(NEW_KEY).encrypt(b"current").decode()
+
+        rotated = rotate_tokens([old, current, "garbage"])
+
+        self.assertEqual(Fernet(NEW_KEY).decrypt(rotated[0].encode()),
+                         b"old")
+        self.assertEqual(rotated[1], current)
+        self.assertIsNone(rotated[2])
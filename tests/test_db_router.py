@@ -0,0 +1,89 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from restapi.base.db_router import (ReplicaRouter, has_written,
+                                    pin_to_primary, reset_pinning,
+                                    use_primary)
+from restapi.middleware.primary_pinning import PrimaryPinning
+from restapi.models import Order
+from restapi.models.product.product import Product
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        reset_pinning()
+        self.router = ReplicaRouter()
+
+    def tearDown(self):
+        reset_pinning()
+
+    def test_catalog_reads_go_to_a_replica(self):
+        self.assertEqual(self.router.db_for_read(Product), "replica")
+
+    def test_order_reads_go_to_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Order), "default")
+
+    def test_use_primary(self):
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Product), "default")
+
+        self.assertEqual(self.router.db_for_read(Product), "replica")
+
+    def test_reads_after_a_write_go_to_the_primary(self):
+        with use_primary():
+            self.assertEqual(self.router.db_for_write(Product), "default")
+
+        # the written flag outlives the use_primary block
+        self.assertTrue(has_written())
+        self.assertEqual(self.router.db_for_read(Product), "default")
+
+        reset_pinning()
+        self.assertEqual(self.router.db_for_read(Product), "replica")
+
+    def test_pin_to_primary(self):
+        pin_to_primary()
+        self.assertEqual(self.router.db_for_read(Product), "default")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual(ReplicaRouter().db_for_read(Product), "default")
+
+    def test_migrations_run_on_the_primary_only(self):
+        self.assertTrue(self.router.allow_migrate("default", "restapi"))
+        self.assertFalse(self.router.allow_migrate("replica", "restapi"))
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class PrimaryPinningTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_writing_request_sets_the_pin_cookie(self):
+        def view(request):
+            ReplicaRouter().db_for_write(Product)
+            return HttpResponse()
+
+        response = PrimaryPinning(view)(self.factory.post("/"))
+
+        self.assertIn(PrimaryPinning.cookie_name, response.cookies)
+        self.assertFalse(has_written())
+
+    def test_read_only_request_sets_no_cookie(self):
+        response = PrimaryPinning(lambda request: HttpResponse())(
+            self.factory.get("/"))
+
+        self.assertNotIn(PrimaryPinning.cookie_name, response.cookies)
+
+    def test_pin_cookie_routes_reads_to_the_primary(self):
+        routes = []
+
+        def view(request):
+            routes.append(ReplicaRouter().db_for_read(Product))
+            return HttpResponse()
+
+        request = self.factory.get("/")
+        request.COOKIES[PrimaryPinning.cookie_name] = "1"
+        PrimaryPinning(view)(request)
+
+        self.assertEqual(routes, ["default"])
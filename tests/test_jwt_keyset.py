@@ -0,0 +1,48 @@
+import jwt
+from django.test import SimpleTestCase, override_settings
+
+from restapi.base.jwt_keyset import KeySet, KeySetTokenBackend
+
+KEYS = [
+    {"kid": "2024", "algorithm": "HS256", "signing_key": "old-secret"},
+    {"kid": "2025", "algorithm": "HS256", "signing_key": "new-secret"},
+]
+
+
+@override_settings(SIMPLE_JWT={"ALGORITHM": "HS256",
+                               "SIGNING_KEY": "legacy-secret"})
+class KeySetTest(SimpleTestCase):
+    @override_settings(JWT_KEYS=KEYS, JWT_SIGNING_KID="2025")
+    def test_tokens_are_verified_with_the_key_of_their_kid(self):
+        backend = KeySetTokenBackend(KeySet.fromSettings())
+        token = backend.encode({"user_id": 1})
+
+        self.assertEqual(jwt.get_unverified_header(token)["kid"], "2025")
+        self.assertEqual(backend.decode(token)["user_id"], 1)
+
+        old = jwt.encode({"user_id": 2}, "old-secret", algorithm="HS256",
+                         headers={"kid": "2024"})
+        self.assertEqual(backend.decode(old)["user_id"], 2)
+
+    @override_settings(JWT_KEYS=KEYS, JWT_SIGNING_KID="2025")
+    def test_legacy_tokens_are_rejected_once_keys_are_configured(self):
+        self.assertIsNone(KeySet.fromSettings().getKey(None))
+
+    @override_settings(JWT_KEYS=[])
+    def test_legacy_tokens_are_accepted_without_keys(self):
+        backend = KeySetTokenBackend(KeySet.fromSettings())
+        token = jwt.encode({"user_id": 1}, "legacy-secret",
+                           algorithm="HS256")
+
+        self.assertEqual(backend.decode(token)["user_id"], 1)
+
+    @override_settings(JWT_KEYS=KEYS, JWT_ACCEPT_LEGACY_TOKENS=True,
+                       SIMPLE_JWT={"ALGORITHM": "RS256",
+                                   "SIGNING_KEY": "",
+                                   "VERIFYING_KEY": ""})
+    def test_unavailable_legacy_key_is_skipped(self):
+        with self.assertLogs("restapi.base.jwt_keyset", "WARNING"):
+            key_set = KeySet.fromSettings()
+
+        self.assertIsNone(key_set.getKey(None))
+        self.assertIsNotNone(key_set.getKey("2025"))
@@ -0,0 +1,105 @@
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from restapi.base.benchmark.fake_sms import FakeSms
+from restapi.base.notification_queue import OtpDispatchQueue
+from restapi.base.notifier import Notifier
+from restapi.tests.helpers import new_instance
+
+
+def wait_for(condition, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+
+        time.sleep(.01)
+
+    return False
+
+
+@override_settings(OTP_DEDUPE_WINDOW=.3, OTP_QUEUE_RATE=1000,
+                   OTP_QUEUE_BURST=1000)
+class OtpDispatchQueueTest(SimpleTestCase):
+    def test_codes_are_sent_in_batches(self):
+        sms = FakeSms(latency_ms=50)
+        otp_queue = OtpDispatchQueue(lambda: sms)
+
+        for mobile in range(20):
+            otp_queue.enqueue(9_000_000_000 + mobile, "12345")
+
+        self.assertTrue(wait_for(lambda: len(sms.sent) == 20))
+        self.assertLess(sms.requests, 20)
+
+    def test_sends_one_at_a_time_without_a_batch_api(self):
+        sms = FakeSms(batch=False)
+        otp_queue = OtpDispatchQueue(lambda: sms)
+
+        for mobile in range(3):
+            otp_queue.enqueue(9_000_000_000 + mobile, "12345")
+
+        self.assertTrue(wait_for(lambda: len(sms.sent) == 3))
+        self.assertEqual(sms.requests, 3)
+
+    def test_queued_code_is_replaced_by_the_latest(self):
+        sms = FakeSms(latency_ms=100)
+        otp_queue = OtpDispatchQueue(lambda: sms)
+
+        # the first code keeps the worker busy while the others are queued
+        otp_queue.enqueue(9_000_000_001, "11111")
+        otp_queue.enqueue(9_000_000_002, "22222")
+        otp_queue.enqueue(9_000_000_002, "33333")
+
+        self.assertTrue(wait_for(lambda: len(sms.sent) == 2))
+        self.assertIn((9_000_000_002, "33333"), sms.sent)
+        self.assertEqual(otp_queue.getMetrics()["coalesced"], 1)
+
+    def test_code_within_the_window_is_sent_after_it(self):
+        sms = FakeSms()
+        otp_queue = OtpDispatchQueue(lambda: sms)
+
+        otp_queue.enqueue(9_000_000_000, "11111")
+        self.assertTrue(wait_for(
+            lambda: otp_queue.getMetrics()["sent"] == 1))
+
+        otp_queue.enqueue(9_000_000_000, "22222")
+        otp_queue.enqueue(9_000_000_000, "33333")
+
+        self.assertEqual(otp_queue.getMetrics()["delayed"], 1)
+        self.assertEqual(len(sms.sent), 1)
+
+        # only the latest code is delivered, once the window has passed
+        self.assertTrue(wait_for(lambda: len(sms.sent) == 2))
+        self.assertEqual(sms.sent[-1], (9_000_000_000, "33333"))
+        self.assertEqual(otp_queue.getMetrics()["delayed"], 0)
+
+    def test_failed_send_can_be_retried_at_once(self):
+        sms = FakeSms(failure_rate=1)
+        otp_queue = OtpDispatchQueue(lambda: sms)
+
+        otp_queue.enqueue(9_000_000_000, "11111")
+        self.assertTrue(wait_for(
+            lambda: otp_queue.getMetrics()["failed"] == 1))
+
+        otp_queue.enqueue(9_000_000_000, "22222")
+
+        self.assertEqual(otp_queue.getMetrics()["delayed"], 0)
+        self.assertTrue(wait_for(
+            lambda: otp_queue.getMetrics()["failed"] == 2))
+
+
+class NotifierTest(SimpleTestCase):
+    def test_otp_is_sent_through_the_queue(self):
+        sms = FakeSms(latency_ms=50)
+        notifier = new_instance(Notifier)
+        notifier.setSmsHandler(sms)
+
+        self.assertEqual(notifier.sendOtpToMobile(9_000_000_000, "12345"),
+                         200)
+
+        # the request doesn't wait for the provider
+        self.assertEqual(sms.sent, [])
+        self.assertTrue(wait_for(lambda: len(sms.sent) == 1))
+        self.assertEqual(notifier.getOtpQueueMetrics()["sent"], 1)
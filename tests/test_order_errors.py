@@ -0,0 +1,50 @@
+import json
+
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+
+from restapi.base.shop.order_handler import ErrorId
+from restapi.views.order_errors import (ORDER_ERRORS, CompiledError,
+                                        ErrorTemplate)
+
+
+class CompiledErrorTest(SimpleTestCase):
+    template = ErrorTemplate(404, "low-stock",
+                             "only {stock} of «{product_title}» left",
+                             ("product_title", "stock"))
+
+    def test_rendered_like_the_json_renderer(self):
+        values = {"product_title": "Elden Ring", "stock": 2}
+        expected = JSONRenderer().render({
+            "error_type": "low-stock",
+            "error_msg": "only 2 of «Elden Ring» left",
+            **values,
+        })
+
+        self.assertEqual(CompiledError(self.template).render(values),
+                         expected)
+
+    def test_values_are_escaped(self):
+        title = 'Say "hi"\\ \u0001'
+        body = json.loads(CompiledError(self.template).render(
+            {"product_title": title, "stock": 0}))
+
+        self.assertEqual(body["product_title"], title)
+        self.assertEqual(body["error_msg"], f"only 0 of «{title}» left")
+
+    def test_template_without_fields_is_static(self):
+        error = CompiledError(ErrorTemplate(400, "validation", "invalid"))
+
+        self.assertEqual(json.loads(error.render({})),
+                         {"error_type": "validation",
+                          "error_msg": "invalid"})
+
+
+class OrderErrorsTest(SimpleTestCase):
+    def test_every_order_error_has_a_response(self):
+        for error_id in ErrorId:
+            response = ORDER_ERRORS.response(error_id, product_title="x",
+                                             stock=1)
+
+            self.assertGreaterEqual(response.status_code, 400)
+            self.assertIn("error_type", json.loads(response.content))
@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase
+
+from restapi.base.benchmark.fake_sep import FakeSep
+from restapi.base.interface_payment import VerifiedPaymentResult
+from restapi.base.payment_reconciler import PaymentReconciler
+from restapi.base.service.order_service import OrderService
+from restapi.base.service.payment_service import PaymentService
+from restapi.base.service.receipt_service import ReceiptService
+from restapi.models import SepPayment
+from restapi.models.sep import SepPaymentAttempt
+
+State = SepPaymentAttempt.State
+
+
+def create_attempt(refnum: str | None, state: str = State.CALLBACK,
+                   age: timedelta = timedelta(minutes=10),
+                   amount_toman: int = 1000,
+                   orderid: str = "1") -> SepPaymentAttempt:
+
+    created_at = datetime.now(timezone.utc) - age
+
+    return SepPaymentAttempt._default_manager.create(
+        orderid=orderid, token=f"token-{refnum}", amount_toman=amount_toman,
+        refnum=refnum, state=state, created_at=created_at,
+        callback_at=created_at if refnum else None)
+
+
+def payment(paid_amount_rial: int) -> VerifiedPaymentResult:
+    return VerifiedPaymentResult(
+        paid_amount_rial=paid_amount_rial,
+        card_number={"first_digits": 603799, "last_digits": 1234})
+
+
+class PaymentReconcilerTest(TestCase):
+    def setUp(self):
+        self.gateway = FakeSep()
+        patcher = mock.patch.object(PaymentService, "completePayment",
+                                    return_value=True)
+        self.complete = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def reconcile(self):
+        return PaymentReconciler(self.gateway, workers=2, rate=1000,
+                                 grace_seconds=60).run()
+
+    def test_verifies_and_completes_unverified_payments(self):
+        refnum = self.gateway.requestPayment("1", 1000)
+        create_attempt(refnum)
+
+        report = self.reconcile()
+
+        self.assertEqual(report.settled, 1)
+        self.assertEqual(self.gateway.calls["inquiryPayment"], 1)
+        self.complete.assert_called_once_with(refnum, payment(10_000))
+
+    def test_unverifiable_payments_are_retried(self):
+        create_attempt("unknown")
+
+        report = self.reconcile()
+
+        self.assertEqual(report.retry, 1)
+        self.assertFalse(self.complete.called)
+        self.assertEqual(SepPaymentAttempt._default_manager.get().state,
+                         State.CALLBACK)
+
+    def test_attempts_within_the_grace_period_are_left_to_the_callback(self):
+        create_attempt(self.gateway.requestPayment("1", 1000),
+                       age=timedelta(seconds=10))
+
+        self.reconcile()
+
+        self.assertEqual(self.gateway.calls["inquiryPayment"], 0)
+
+    def test_verified_but_incomplete_payments_are_flagged(self):
+        create_attempt("verified")
+        SepPayment._default_manager.create(
+            refnum="verified", payment_date=datetime.now(timezone.utc))
+
+        report = self.reconcile()
+
+        self.assertEqual(report.flagged, 1)
+        self.assertEqual(self.gateway.calls["inquiryPayment"], 0)
+        self.assertEqual(SepPaymentAttempt._default_manager.get().state,
+                         State.FLAGGED)
+
+    def test_expired_attempts_are_flagged(self):
+        create_attempt(None, state=State.PENDING, age=timedelta(hours=2))
+        create_attempt("late", age=timedelta(hours=2))
+
+        report = self.reconcile()
+
+        self.assertEqual(report.expired, 2)
+        self.assertEqual(self.gateway.calls["inquiryPayment"], 0)
+
+
+class PaymentServiceTest(TestCase):
+    def test_underpaid_payment_is_flagged(self):
+        create_attempt("refnum", amount_toman=1000)
+
+        with self.assertLogs("restapi.base.service.payment_service",
+                             "WARNING"):
+            completed = PaymentService().completePayment("refnum",
+                                                         payment(9_999))
+
+        attempt = SepPaymentAttempt._default_manager.get()
+
+        self.assertFalse(completed)
+        self.assertEqual(attempt.state, State.FLAGGED)
+        self.assertEqual(attempt.paid_amount_rial, 9_999)
+
+    def test_payment_of_a_missing_order_is_flagged(self):
+        create_attempt("refnum", orderid="not-an-id")
+
+        with self.assertLogs("restapi.base.service.payment_service",
+                             "WARNING"):
+            completed = PaymentService().completePayment("refnum",
+                                                         payment(10_000))
+
+        self.assertFalse(completed)
+        self.assertEqual(SepPaymentAttempt._default_manager.get().note,
+                         "order not found")
+
+    def test_completing_twice_is_a_no_op(self):
+        create_attempt("refnum", state=State.SETTLED)
+
+        self.assertTrue(PaymentService().completePayment("refnum",
+                                                         payment(10_000)))
+
+    def test_unknown_payment(self):
+        with self.assertLogs("restapi.base.service.payment_service",
+                             "ERROR"):
+            self.assertFalse(PaymentService().completePayment(
+                "unknown", payment(10_000)))
+
+    def test_receipt_is_frozen_once_the_order_is_paid(self):
+        create_attempt("refnum", amount_toman=1000)
+        order = SimpleNamespace(id=1, user_id=1)
+        orders = mock.Mock()
+        orders._default_manager.select_for_update.return_value \
+            .filter.return_value.first.return_value = order
+        calls = mock.Mock()
+        calls.markOrderAsPaid.return_value = True
+
+        with mock.patch("restapi.base.service.payment_service.Order",
+                        orders), \
+                mock.patch.object(OrderService, "markOrderAsPaid",
+                                  calls.markOrderAsPaid), \
+                mock.patch.object(ReceiptService, "freezeOrder",
+                                  calls.freezeOrder):
+
+            self.assertTrue(PaymentService().completePayment(
+                "refnum", payment(10_000)))
+
+        self.assertEqual([call[0] for call in calls.mock_calls],
+                         ["markOrderAsPaid", "freezeOrder"])
+
+        # the total is the amount the order was charged
+        calls.freezeOrder.assert_called_once_with(
+            order, "refnum", payment(10_000), 1000, paid_at=None)
+        self.assertEqual(SepPaymentAttempt._default_manager.get().state,
+                         State.SETTLED)
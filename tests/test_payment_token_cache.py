@@ -0,0 +1,29 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from restapi.base.payment_token_cache import PaymentTokenCache
+
+
+@override_settings(CACHES={"default": {
+    "BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class PaymentTokenCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.tokens = PaymentTokenCache("sep", ttl=60)
+        self.tokens.set("12", 150_000, 9_120_000_000, "token")
+
+    def test_same_attempt_reuses_the_token(self):
+        self.assertEqual(self.tokens.get("12", 150_000, 9_120_000_000),
+                         "token")
+
+    def test_changed_attempt_needs_a_new_token(self):
+        self.assertIsNone(self.tokens.get("12", 160_000, 9_120_000_000))
+        self.assertIsNone(self.tokens.get("12", 150_000, None))
+        self.assertIsNone(self.tokens.get("13", 150_000, 9_120_000_000))
+        self.assertIsNone(PaymentTokenCache("other", ttl=60)
+                          .get("12", 150_000, 9_120_000_000))
+
+    def test_invalidated_token_is_dropped(self):
+        PaymentTokenCache.invalidate("12")
+
+        self.assertIsNone(self.tokens.get("12", 150_000, 9_120_000_000))
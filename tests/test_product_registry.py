@@ -0,0 +1,65 @@
+from django.test import SimpleTestCase, override_settings
+
+from restapi.base.shop.product.registry import ProductHandlerRegistry
+from restapi.tests.helpers import new_instance
+
+
+class FakeHandler:
+    pass
+
+
+class OtherHandler:
+    pass
+
+
+HANDLER_PATH = "restapi.tests.test_product_registry:FakeHandler"
+
+
+class ProductHandlerRegistryTest(SimpleTestCase):
+    @override_settings(PRODUCT_HANDLERS={"fake": HANDLER_PATH})
+    def test_handler_paths_from_the_settings(self):
+        registry = new_instance(ProductHandlerRegistry)
+
+        self.assertIs(registry.getHandler("fake"), FakeHandler)
+
+    @override_settings(PRODUCT_HANDLERS={"fake": HANDLER_PATH})
+    def test_handlers_are_loaded_once(self):
+        registry = new_instance(ProductHandlerRegistry)
+        registry.getHandler("fake")
+
+        # a loaded handler no longer depends on its path
+        registry._paths["fake"] = "restapi.missing:Handler"
+        self.assertIs(registry.getHandler("fake"), FakeHandler)
+
+    def test_unknown_product_type(self):
+        registry = new_instance(ProductHandlerRegistry)
+
+        self.assertIsNone(registry.getHandler("unknown"))
+
+    @override_settings(PRODUCT_HANDLERS={"broken": "restapi.missing:Handler"})
+    def test_unloadable_handler(self):
+        registry = new_instance(ProductHandlerRegistry)
+
+        with self.assertLogs("restapi.base.shop.product.registry", "ERROR"):
+            self.assertIsNone(registry.getHandler("broken"))
+
+    @override_settings(PRODUCT_HANDLERS={"fake": HANDLER_PATH})
+    def test_register_replaces_a_loaded_handler(self):
+        registry = new_instance(ProductHandlerRegistry)
+        registry.getHandler("fake")
+
+        registry.register(
+            "fake", "restapi.tests.test_product_registry:OtherHandler")
+
+        self.assertIs(registry.getHandler("fake"), OtherHandler)
+
+        registry.register("fake", FakeHandler)
+        self.assertIs(registry.getHandler("fake"), FakeHandler)
+
+    @override_settings(PRODUCT_HANDLERS={"fake": HANDLER_PATH})
+    def test_preload(self):
+        registry = new_instance(ProductHandlerRegistry)
+        registry._paths = {"fake": HANDLER_PATH}
+        registry.preload()
+
+        self.assertEqual(registry._handlers, {"fake": FakeHandler})
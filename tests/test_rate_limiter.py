@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from restapi.base.benchmark.runner import client_ip
+from restapi.base.rate_limiter import MethodRateThrottle, RateLimiter
+from restapi.tests.helpers import new_instance
+
+
+@override_settings(RATE_LIMITS={"submit-cart": (.001, 2)},
+                   RATE_LIMIT_SHARED=False)
+class RateLimiterTest(SimpleTestCase):
+    def setUp(self):
+        self.limiter = new_instance(RateLimiter)
+
+    def test_burst_then_wait(self):
+        self.assertEqual(self.limiter.check("submit-cart", ["uid:1"]), 0)
+        self.assertEqual(self.limiter.check("submit-cart", ["uid:1"]), 0)
+        self.assertGreater(self.limiter.check("submit-cart", ["uid:1"]), 0)
+
+        # other keys have buckets of their own
+        self.assertEqual(self.limiter.check("submit-cart", ["uid:2"]), 0)
+
+    def test_all_keys_must_have_a_token(self):
+        self.limiter.check("submit-cart", ["uid:1", "ip:a"])
+        self.limiter.check("submit-cart", ["uid:1", "ip:a"])
+
+        self.assertGreater(
+            self.limiter.check("submit-cart", ["uid:2", "ip:a"]), 0)
+
+        # the rejected request took no token from uid:2
+        self.assertEqual(self.limiter.check("submit-cart", ["uid:2"]), 0)
+        self.assertEqual(self.limiter.check("submit-cart", ["uid:2"]), 0)
+
+    def test_reset_drops_the_buckets(self):
+        for _ in range(3):
+            self.limiter.check("submit-cart", ["uid:1"])
+
+        self.limiter.reset()
+
+        self.assertEqual(self.limiter.check("submit-cart", ["uid:1"]), 0)
+
+
+class BenchmarkClientIpTest(SimpleTestCase):
+    def test_users_get_distinct_addresses(self):
+        ips = {client_ip(user_id) for user_id in range(1, 70_000)}
+
+        self.assertEqual(len(ips), 69_999)
+        self.assertNotIn("127.0.0.1", ips)
+
+    @override_settings(RATE_LIMITS={"submit-cart": (.001, 1)})
+    def test_users_dont_share_the_ip_bucket(self):
+        factory = APIRequestFactory()
+        view = SimpleNamespace(kwargs={"method": "submit-cart"})
+        limiter = new_instance(RateLimiter)
+
+        with mock.patch.object(RateLimiter, "getInstance",
+                               return_value=limiter):
+            for user_id in (1, 2):
+                request = factory.post("/order/submit-cart",
+                                       REMOTE_ADDR=client_ip(user_id))
+                request.user = AnonymousUser()
+
+                self.assertTrue(
+                    MethodRateThrottle().allow_request(request, view))
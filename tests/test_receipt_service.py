@@ -0,0 +1,35 @@
+from django.test import SimpleTestCase
+
+from restapi.base.service.receipt_service import ReceiptService
+from restapi.models.receipt import OrderLineSnapshot
+
+
+class FreezeLinesTest(SimpleTestCase):
+    def test_lines_keep_the_prices_at_submission(self):
+        snapshots = [
+            OrderLineSnapshot(product_id=1, title="Game", count=2,
+                              unit_price_irt=500_000),
+            OrderLineSnapshot(product_id=2, title="Gift card", count=1,
+                              unit_price_irt=1_200_000, currency="USD",
+                              non_rial_value=20, toman_value=60_000),
+        ]
+
+        lines, rates = ReceiptService()._freezeLines(snapshots)
+
+        self.assertEqual([line["unit_price_irt"] for line in lines],
+                         [500_000, 1_200_000])
+        self.assertEqual(lines[1]["currency"], "USD")
+        self.assertEqual(lines[1]["non_rial_value"], 20)
+        self.assertEqual(rates, {"USD": 60_000})
+
+    def test_lines_of_deleted_products_are_kept(self):
+        snapshots = [OrderLineSnapshot(product_id=None, title="Gone",
+                                       count=1, unit_price_irt=100)]
+
+        lines, rates = ReceiptService()._freezeLines(snapshots)
+
+        self.assertEqual(lines, [{"product_id": None, "title": "Gone",
+                                  "count": 1, "unit_price_irt": 100,
+                                  "currency": None,
+                                  "non_rial_value": None}])
+        self.assertEqual(rates, {})
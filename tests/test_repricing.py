@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+
+from restapi.base.service.repricing import (_set_effective_price,
+                                            calc_effective_price)
+from restapi.models.product.currency import Currency
+from restapi.models.product.product import Product
+
+
+class EffectivePriceTest(SimpleTestCase):
+    def test_rial_price_is_kept(self):
+        self.assertEqual(calc_effective_price(120_000, None, None), 120_000)
+        self.assertEqual(calc_effective_price(120_000, 2.5, None), 120_000)
+
+    def test_non_rial_value_is_converted(self):
+        self.assertEqual(calc_effective_price(0, 2.5, 60_000), 150_000)
+        self.assertEqual(calc_effective_price(0, 1.99, 1_800.5), 3_583)
+
+    def test_saved_product_gets_its_effective_price(self):
+        usd = Currency(unit="USD", name="dollar", toman_value=60_000)
+        products = [
+            Product(price_irt=90_000),
+            Product(price_irt=0, non_rial_currency=usd, non_rial_value=2),
+        ]
+
+        for product in products:
+            _set_effective_price(Product, product)
+
+        self.assertEqual([product.effective_price_irt
+                          for product in products], [90_000, 120_000])
@@ -0,0 +1,89 @@
+import tempfile
+import threading
+import time
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from restapi.base.sampling_profiler import QueryTimer, StackSampler
+from restapi.middleware.sampling_profiler import SamplingProfiler
+
+
+def view(request):
+    time.sleep(.02)
+    return HttpResponse("ok")
+
+
+class StackSamplerTest(SimpleTestCase):
+    def test_stacks_of_the_thread_are_sampled(self):
+        sampler = StackSampler(threading.get_ident(), interval=.001)
+        sampler.start()
+        view(None)
+        sampler.stop()
+
+        self.assertGreater(sampler.samples, 0)
+        self.assertIn(f"{__name__}:view", sampler.collapsed()[0])
+
+
+class QueryTimerTest(SimpleTestCase):
+    def test_slowest_queries_are_kept(self):
+        timer = QueryTimer(keep_slowest=2)
+
+        def execute(sql, params, many, context):
+            time.sleep(params[0])
+
+        for delay in (.001, .02, .01):
+            timer(execute, f"SELECT {delay}", [delay], False, {})
+
+        self.assertEqual(timer.count, 3)
+        self.assertGreaterEqual(timer.total_seconds, .031)
+        self.assertEqual([query["sql"] for query in timer.slowest()],
+                         ["SELECT 0.02", "SELECT 0.01"])
+
+
+class SamplingProfilerTest(SimpleTestCase):
+    def setUp(self):
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.output_dir.cleanup)
+
+        self.settings = override_settings(
+            PROFILER_ENABLED=True, PROFILER_VIEWS=[f"{__name__}.view"],
+            PROFILER_SAMPLE_RATE=0, PROFILER_HEADER_SECRET="s3cret",
+            PROFILER_MAX_PROFILES=2, PROFILER_INTERVAL_MS=1,
+            PROFILER_OUTPUT_DIR=self.output_dir.name)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+        self.profiler = SamplingProfiler(self._getResponse)
+        self.factory = RequestFactory()
+
+    def _getResponse(self, request):
+        self.profiler.process_view(request, view, (), {})
+        return view(request)
+
+    def _profiles(self):
+        return sorted(path.name for path in
+                      self.profiler._output_dir.glob("*.json"))
+
+    @override_settings(PROFILER_ENABLED=False)
+    def test_disabled_by_default(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            SamplingProfiler(self._getResponse)
+
+    def test_header_must_carry_the_secret(self):
+        self.profiler(self.factory.get("/order/x", HTTP_X_PROFILE="1"))
+        self.assertEqual(self._profiles(), [])
+
+        self.profiler(self.factory.get("/order/x",
+                                       HTTP_X_PROFILE="s3cret"))
+        self.assertEqual(len(self._profiles()), 1)
+
+    def test_only_the_latest_profiles_are_kept(self):
+        for _ in range(3):
+            self.profiler(self.factory.get("/order/x",
+                                           HTTP_X_PROFILE="s3cret"))
+
+        self.assertEqual(len(self._profiles()), 2)
+        self.assertEqual(
+            len(list(self.profiler._output_dir.glob("*.collapsed"))), 2)
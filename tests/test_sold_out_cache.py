@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from restapi.base.service.product_service import ProductService
+from restapi.base.shop.sold_out_cache import SoldOutCache
+from restapi.tests.helpers import new_instance
+
+
+@override_settings(CACHES={"default": {
+    "BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class SoldOutCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.sold_out = new_instance(SoldOutCache)
+
+    def test_sold_out_product_is_found(self):
+        self.sold_out.markSoldOut(2, "Elden Ring")
+
+        self.assertIsNone(self.sold_out.findSoldOut(1, [1, 3]))
+        self.assertEqual(self.sold_out.findSoldOut(1, [1, 2]),
+                         (2, "Elden Ring"))
+
+    def test_products_reserved_by_the_user_are_ignored(self):
+        self.sold_out.markSoldOut(2, "Elden Ring")
+        self.sold_out.setUserReservation(1, [2])
+
+        self.assertIsNone(self.sold_out.findSoldOut(1, [2]))
+        self.assertEqual(self.sold_out.findSoldOut(5, [2]),
+                         (2, "Elden Ring"))
+
+    def test_stock_events_add_and_clear_entries(self):
+        self.sold_out.markSoldOut(1, "Elden Ring")
+        self.sold_out.update({1: 0, 2: 0, 3: 4})
+
+        # the title of the existing entry is kept
+        self.assertEqual(self.sold_out.findSoldOut(1, [1]),
+                         (1, "Elden Ring"))
+
+        # entries from stock events have no title
+        with mock.patch.object(
+                ProductService, "getProductSummaryByIds",
+                return_value=[SimpleNamespace(title="Gift card")]):
+            self.assertEqual(self.sold_out.findSoldOut(1, [2]),
+                             (2, "Gift card"))
+
+        self.sold_out.update({1: 5})
+
+        self.assertIsNone(self.sold_out.findSoldOut(1, [1, 3]))
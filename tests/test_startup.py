@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import sys
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import SimpleTestCase, override_settings
+
+from restapi.base import startup
+from restapi.base.lazy_import import lazy_import
+from restapi.middleware.warmup import Warmup
+
+
+class LazyImportTest(SimpleTestCase):
+    def setUp(self):
+        sys.modules.pop("tabnanny", None)
+
+    def test_module_is_imported_on_first_access(self):
+        module = lazy_import("tabnanny")
+
+        self.assertNotIn("tabnanny", sys.modules)
+        self.assertTrue(callable(module.check))
+        self.assertIn("tabnanny", sys.modules)
+
+    def test_concurrent_first_access(self):
+        module = lazy_import("tabnanny")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            checks = list(pool.map(lambda _: module.check, range(32)))
+
+        self.assertEqual(set(checks), {sys.modules["tabnanny"].check})
+
+    def test_imported_modules_are_returned_as_they_are(self):
+        self.assertIs(lazy_import("json"), sys.modules["json"])
+
+    def test_missing_module_fails_on_access(self):
+        module = lazy_import("restapi.no_such_module")
+
+        with self.assertRaises(ImportError):
+            module.anything
+
+
+class WarmupTest(SimpleTestCase):
+    def test_failing_step_is_skipped(self):
+        steps = [("fails", mock.Mock(side_effect=ValueError("down"))),
+                 ("works", mock.Mock())]
+
+        with mock.patch.object(startup, "WARMUP_STEPS", steps), \
+                self.assertLogs("restapi.base.startup", "ERROR"):
+            durations = startup.warmup()
+
+        self.assertEqual(list(durations), ["fails", "works"])
+        steps[1][1].assert_called_once()
+
+    def test_middleware_warms_up_once_and_steps_aside(self):
+        with mock.patch("restapi.middleware.warmup.warmup") as warmup:
+            with self.assertRaises(MiddlewareNotUsed):
+                Warmup(lambda request: None)
+
+        warmup.assert_called_once()
+
+    @override_settings(WARMUP_ON_STARTUP=False)
+    def test_middleware_can_be_turned_off(self):
+        with mock.patch("restapi.middleware.warmup.warmup") as warmup:
+            with self.assertRaises(MiddlewareNotUsed):
+                Warmup(lambda request: None)
+
+        self.assertFalse(warmup.called)
@@ -0,0 +1,50 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from restapi.base.shop.stock_events import StockSubscription
+
+
+class StockSubscriptionTest(SimpleTestCase):
+    def test_keeps_the_latest_stock_per_product(self):
+        async def run():
+            subscription = StockSubscription({1, 2})
+
+            subscription.put({1: 5})
+            subscription.put({1: 4, 2: 3})
+            subscription.put({1: 2})
+
+            return await subscription.get()
+
+        self.assertEqual(asyncio.run(run()), {1: 2, 2: 3})
+
+    def test_get_waits_for_a_change(self):
+        async def run():
+            subscription = StockSubscription({1})
+            reader = asyncio.ensure_future(subscription.get())
+
+            await asyncio.sleep(0)
+            self.assertFalse(reader.done())
+
+            subscription.put({1: 7})
+            stocks = await reader
+
+            # the delivered values aren't delivered again
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(subscription.get(), timeout=.05)
+
+            return stocks
+
+        self.assertEqual(asyncio.run(run()), {1: 7})
+
+    def test_timed_out_reader_loses_nothing(self):
+        async def run():
+            subscription = StockSubscription({1})
+
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(subscription.get(), timeout=.01)
+
+            subscription.put({1: 1})
+            return await subscription.get()
+
+        self.assertEqual(asyncio.run(run()), {1: 1})
@@ -1,4 +1,4 @@
-from typing import cast
+from typing import List, cast
 
 from rest_framework.views import APIView
 from rest_framework.request import Request
@@ -7,42 +7,55 @@ from rest_framework.serializers import Serializer
 from rest_framework import status
 from ipware import get_client_ip
 
+from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_protect
 from django.utils.decorators import method_decorator
 from django.conf import settings
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from restapi.serializers.order_serializer import (ProductIdsSerializer,
                                                   CartProductsSerializer,
                                                   SteamTradeLinkSerializer,
                                                   SteamAccountSerializer,
                                                   EmailPassSerializer)
-from restapi.base.service.product_service import ProductService
+from restapi.base.shop.catalog_snapshot import CatalogSnapshot
 from restapi.base.shop.order_handler import OrderHandler, OrderError, ErrorId
+from restapi.base.shop.checkout_admission import CheckoutAdmission
+from restapi.base.service.receipt_service import (ReceiptService,
+                                                  receipt_to_dict)
 from restapi.models.user import User
-from restapi.base.crypto import Crypto
+from restapi.base.crypto_service import CryptoService
+from restapi.base.jwt_keyset import KeySetJWTAuthentication
+from restapi.base.rate_limiter import MethodRateThrottle
+from restapi.views.order_errors import ORDER_ERRORS
 
 import logging
 logger = logging.getLogger(__name__)
 
+MAX_HISTORY_PAGE_SIZE = 50
+
 
 @method_decorator(csrf_protect, name="dispatch")
 class Order(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [KeySetJWTAuthentication]
+    throttle_classes = [MethodRateThrottle]
 
-    def get(self, request: Request, method: str) -> Response:
+    def get(self, request: Request, method: str) -> HttpResponse:
         match method:
             case "get-cart-details":
                 return self._getCartDetails(request)
             case "get-unpaid-order-details":
                 return self._getUnpaidOrderDetails(request)
+            case "get-cart-ticket":
+                return self._getCartTicket(request)
+            case "get-order-history":
+                return self._getOrderHistory(request)
             case _:
                 logger.info("[IP: {}] [CLIENT_ERROR] Invalid method: {}"
                             .format(get_client_ip(request)[0], method))
 
                 return Response(status=status.HTTP_400_BAD_REQUEST)
 
-    def post(self, request: Request, method: str) -> Response:
+    def post(self, request: Request, method: str) -> HttpResponse:
         if request.auth is None:
             logger.info("[IP: {}] [CLIENT_ERROR] Unauthorized request"
                         .format(get_client_ip(request)[0]))
@@ -92,19 +105,16 @@ class Order(APIView):
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
         product_ids = serializer.data.get("product_ids")
-        product_service = ProductService()
-
-        summeries = product_service.getProductSummaryByIds(product_ids)
-        summaries_serializable = [summary.__dict__ for summary in summeries]
 
         response = {
             "img_base_url": settings.MEDIA_URL,
-            "summaries": summaries_serializable
+            "summaries": CatalogSnapshot.getInstance()
+            .getSummaries(product_ids)
         }
 
         return Response(response, status=status.HTTP_200_OK)
 
-    def _submitCart(self, request: Request) -> Response:
+    def _submitCart(self, request: Request) -> HttpResponse:
         user = cast(User, request.user)  # user type cannot be AnonymousUser
         serializer = CartProductsSerializer(data=request.data)
 
@@ -118,132 +128,127 @@ class Order(APIView):
 
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        order_handler = OrderHandler()
+        order_list = serializer.data["order_list"]
+        admission = CheckoutAdmission.getInstance()
+
+        hot_product_id = admission.findHotProduct(
+            [product_cart["id"] for product_cart in order_list])
+
+        if hot_product_id is not None:
+            # flash sale: the order is submitted by the product's queue
+            admission_result = admission.submit(user, order_list,
+                                                hot_product_id)
+
+            if admission_result is None:
+                logger.warning(("[IP: {}] [uid: {}] Admission queue of "
+                                "product {} is full")
+                               .format(get_client_ip(request)[0],
+                                       user.id, hot_product_id))
+
+                return Response(status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
-        submit_result = order_handler \
-            .submitOrder(user, serializer.data["order_list"])
+            if type(admission_result) is OrderError:
+                return self._orderErrorResponse(request, user, order_list,
+                                                admission_result)
+
+            return Response({"ticket": admission_result},
+                            status=status.HTTP_202_ACCEPTED)
+
+        order_handler = OrderHandler.getInstance()
+
+        submit_result = order_handler.submitOrder(user, order_list)
 
         if submit_result is True:  # order submission successful
             logger.info(("[IP: {}] [uid: {}] Order submitted successfully - "
                          "order list: {}")
                         .format(get_client_ip(request)[0],
                                 user.id,
-                                serializer.data["order_list"]))
+                                order_list))
 
             return Response(status=status.HTTP_201_CREATED)
 
         if type(submit_result) is OrderError:
-            match submit_result.error_id:
-                case ErrorId.INVALID_ID:
-                    error_msg = ("در سبد خرید شما، کالای نامعتبر وجود دارد. "
-                                 "لطفا کالاها را از سبد خرید حذف و "
-                                 "دوباره اقدام به خرید کنید.")
-
-                    response_err = {
-                        "error_type": "invalid-product",
-                        "error_msg": error_msg,
-                    }
-
-                    logger.info(("[IP: {}] [uid: {}] [CLIENT_ERROR] "
-                                 "Order contains invalid products - "
-                                 "order list: {}")
-                                .format(get_client_ip(request)[0],
-                                        user.id,
-                                        serializer.data["order_list"]))
-
-                    return Response(response_err,
-                                    status=status.HTTP_400_BAD_REQUEST)
-
-                case ErrorId.NO_PRODUCT_HANDLER:
-                    product_title = (submit_result.info["product_title"]
-                                     if submit_result.info is not None else "")
-
-                    error_msg = ("به دلیل مشکل فنی، امکان خرید محصول "
-                                 f"«{product_title}» "
-                                 "وجود ندارد. ")
-
-                    response_err = {
-                        "error_type": "no-product-handler",
-                        "error_msg": error_msg,
-                        "product_title": product_title
-                    }
-
-                    logger.error(("[IP: {}] [uid: {}] Product ({}) cannot be "
-                                  "handled").format(get_client_ip(request)[0],
-                                                    user.id,
-                                                    product_title))
-
-                    return Response(response_err,
-                                    status=status.HTTP_501_NOT_IMPLEMENTED)
-
-                case ErrorId.OUT_OF_STOCK:
-                    product_title = (submit_result.info["product_title"]
-                                     if submit_result.info is not None else "")
-
-                    error_msg = ("موجودی محصول "
-                                 f"«{product_title}» "
-                                 "به اتمام رسیده است")
-
-                    response_err = {
-                        "error_type": "out-of-stock",
-                        "error_msg": error_msg,
-                        "product_title": product_title
-                    }
-
-                    logger.info(("[IP: {}] [uid: {}] [CLIENT_ERROR] "
-                                 "Product ({}) is out of stock")
-                                .format(get_client_ip(request)[0],
-                                        user.id, product_title))
-
-                    return Response(response_err,
-                                    status=status.HTTP_404_NOT_FOUND)
-
-                case ErrorId.LOW_STOCK:
-                    product_title = (submit_result.info["product_title"]
-                                     if submit_result.info is not None else "")
-
-                    stock = (submit_result.info["stock"]
-                             if submit_result.info is not None else 0)
-
-                    error_msg = (f"موجودی محصول «{product_title}» "
-                                 f"برابر با {stock} عدد می‌باشد")
-
-                    response_err = {
-                        "error_type": "low-stock",
-                        "error_msg": error_msg,
-                        "product_title": product_title,
-                        "stock": stock
-                    }
-
-                    logger.info(("[IP: {}] [uid: {}] [CLIENT_ERROR] "
-                                 "There is insufficient stock of product ({})")
-                                .format(get_client_ip(request)[0],
-                                        user.id, product_title))
-
-                    return Response(response_err,
-                                    status=status.HTTP_404_NOT_FOUND)
-
-                case ErrorId.SAVE_ERROR:
-                    error_msg = ("ثبت سفارش امکان‌پذیر نیست. "
-                                 "لطفا دوباره اقدام کنید.")
-
-                    response_err = {
-                        "error_type": "no-product-handler",
-                        "error_msg": error_msg,
-                    }
-
-                    logger.error("[IP: {}] [uid: {}] Order submission failed"
-                                 .format(get_client_ip(request)[0], user.id))
-
-                    return Response(
-                        response_err,
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return self._orderErrorResponse(request, user, order_list,
+                                            submit_result)
 
         logger.error("[IP: {}] [uid: {}] Order submission failed - no handler"
                      .format(get_client_ip(request)[0], user.id))
 
         return Response(status=status.HTTP_501_NOT_IMPLEMENTED)
 
+    def _getCartTicket(self, request: Request) -> HttpResponse:
+        if request.auth is None:
+            logger.info("[IP: {}] [CLIENT_ERROR] Unauthorized request"
+                        .format(get_client_ip(request)[0]))
+
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        user = cast(User, request.user)  # user type cannot be AnonymousUser
+        ticket = request.query_params.get("ticket", "")
+
+        result = CheckoutAdmission.getInstance().getResult(ticket, user.id)
+
+        if result is None:
+            logger.info("[IP: {}] [uid: {}] [CLIENT_ERROR] Invalid ticket {}"
+                        .format(get_client_ip(request)[0], user.id, ticket))
+
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        if result["state"] == "pending":
+            return Response({"state": "pending"},
+                            status=status.HTTP_202_ACCEPTED)
+
+        if result["error"] is not None:
+            return self._orderErrorResponse(request, user, [],
+                                            result["error"])
+
+        logger.info("[IP: {}] [uid: {}] Queued order submitted successfully"
+                    .format(get_client_ip(request)[0], user.id))
+
+        return Response({"state": "done"}, status=status.HTTP_201_CREATED)
+
+    def _orderErrorResponse(self, request: Request, user: User,
+                            order_list: List, submit_result: OrderError) \
+            -> HttpResponse:
+
+        info = submit_result.info or {}
+        product_title = info.get("product_title", "")
+
+        match submit_result.error_id:
+            case ErrorId.OUT_OF_STOCK:
+                logger.info(("[IP: {}] [uid: {}] [CLIENT_ERROR] "
+                             "Product ({}) is out of stock")
+                            .format(get_client_ip(request)[0],
+                                    user.id, product_title))
+
+            case ErrorId.INVALID_ID:
+                logger.info(("[IP: {}] [uid: {}] [CLIENT_ERROR] "
+                             "Order contains invalid products - "
+                             "order list: {}")
+                            .format(get_client_ip(request)[0],
+                                    user.id,
+                                    order_list))
+
+            case ErrorId.NO_PRODUCT_HANDLER:
+                logger.error(("[IP: {}] [uid: {}] Product ({}) cannot be "
+                              "handled").format(get_client_ip(request)[0],
+                                                user.id,
+                                                product_title))
+
+            case ErrorId.LOW_STOCK:
+                logger.info(("[IP: {}] [uid: {}] [CLIENT_ERROR] "
+                             "There is insufficient stock of product ({})")
+                            .format(get_client_ip(request)[0],
+                                    user.id, product_title))
+
+            case ErrorId.SAVE_ERROR:
+                logger.error("[IP: {}] [uid: {}] Order submission failed"
+                             .format(get_client_ip(request)[0], user.id))
+
+        return ORDER_ERRORS.response(submit_result.error_id,
+                                     product_title=product_title,
+                                     stock=info.get("stock", 0))
+
     def _getUnpaidOrderDetails(self, request: Request) -> Response:
         if request.auth is None:
             logger.info("[IP: {}] [CLIENT_ERROR] Unauthorized request"
@@ -252,7 +257,7 @@ class Order(APIView):
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
         user = cast(User, request.user)  # user type cannot be AnonymousUser
-        order_handler = OrderHandler()
+        order_handler = OrderHandler.getInstance()
 
         order_det = order_handler.getUnpaidOrderCheckoutDetails(user)
 
@@ -262,17 +267,10 @@ class Order(APIView):
 
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        requirements = []
-
-        for key, value in order_det.requirements.items():
-            # Return any pre-existing value for a requirement to the user,
-            # omitting the password key if one exists.
-
-            if value:
-                value.pop("password", None)
-
-            req = {"requirement": key, "data": value}
-            requirements.append(req)
+        # Return any pre-existing value for a requirement to the user. The
+        # password key has already been omitted by the order handler.
+        requirements = [{"requirement": key, "data": value}
+                        for key, value in order_det.requirements.items()]
 
         response = {
             "price": order_det.price,
@@ -284,33 +282,65 @@ class Order(APIView):
 
         return Response(response, status=status.HTTP_200_OK)
 
+    def _getOrderHistory(self, request: Request) -> Response:
+        if request.auth is None:
+            logger.info("[IP: {}] [CLIENT_ERROR] Unauthorized request"
+                        .format(get_client_ip(request)[0]))
+
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        user = cast(User, request.user)  # user type cannot be AnonymousUser
+        receipt_service = ReceiptService()
+
+        try:
+            limit = min(int(request.query_params.get("limit", 20)),
+                        MAX_HISTORY_PAGE_SIZE)
+
+            if limit < 1:
+                raise ValueError("limit must be positive")
+
+            receipts, next_cursor = receipt_service.getHistory(
+                user.id, limit, request.query_params.get("cursor"))
+        except ValueError as e:
+            logger.info("[IP: {}] [uid: {}] [CLIENT_ERROR] Invalid data - {}"
+                        .format(get_client_ip(request)[0], user.id, e))
+
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        stats = receipt_service.getStats(user.id)
+
+        response = {
+            "order_count": stats.order_count,
+            "total_spent": stats.total_spent_toman,
+            "receipts": [receipt_to_dict(receipt) for receipt in receipts],
+            "next_cursor": next_cursor,
+        }
+
+        return Response(response, status=status.HTTP_200_OK)
+
     def _submitRequirement(self, request: Request, req_type: str,
-                           serializer_class: type[Serializer]) -> Response:
+                           serializer_class: type[Serializer]) \
+            -> HttpResponse:
 
         user = cast(User, request.user)  # user type cannot be AnonymousUser
         serializer = serializer_class(data=request.data)
 
         if not serializer.is_valid():
-            response = {
-                "error_type": "validation",
-                "error_msg": "داده‌های واردشده نامعتبر است",
-            }
-
             logger.info("[IP: {}] [uid: {}] [CLIENT_ERROR] Invalid data"
                         .format(get_client_ip(request)[0], user.id))
 
-            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+            return ORDER_ERRORS.response("validation")
 
         data = serializer.data
 
         if "password" in data:
-            crypto = Crypto(settings.FERNET_KEY)
+            crypto = CryptoService.getInstance()
             password_enc = crypto.encrypt(serializer.data["password"])
 
             data = serializer.data
             data["password"] = password_enc
 
-        order_handler = OrderHandler()
+        order_handler = OrderHandler.getInstance()
 
         submit_result = order_handler.submitRequirement(
             user, req_type, data)
@@ -323,17 +353,11 @@ class Order(APIView):
             return Response(status=status.HTTP_404_NOT_FOUND)
 
         if not submit_result:
-            response = {
-                "error_type": "submit-error",
-                "error_msg": "ثبت داده‌ها با مشکل مواجه شد",
-            }
-
             logger.error(("[IP: {}] [uid: {}] "
                          "The requirement could not be submitted ({})")
                          .format(get_client_ip(request)[0], user.id, req_type))
 
-            return Response(response,
-                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return ORDER_ERRORS.response("submit-error")
 
         logger.info(("[IP: {}] [uid: {}] Requirement submitted - "
                      "type: {}, data: {}")
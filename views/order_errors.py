@@ -0,0 +1,133 @@
+from typing import Dict, List, Tuple
+from dataclasses import dataclass
+import json
+import re
+
+from django.http import HttpResponse
+from rest_framework import status
+
+from restapi.base.shop.order_handler import ErrorId
+
+
+@dataclass(frozen=True)
+class ErrorTemplate:
+    status: int
+    error_type: str
+    error_msg: str  # may contain {field} placeholders
+    fields: Tuple[str, ...] = ()  # info fields added to the response
+
+
+# Placeholders are rendered as marker strings, so the template can be dumped
+# to JSON once and split around them. \x01 marks a whole JSON value and \x00
+# a part of a string.
+_VALUE_MARKER = re.compile(r'"\\u0001(\w+)\\u0001"')
+_STRING_MARKER = re.compile(r"\\u0000(\w+)\\u0000")
+
+
+class CompiledError:
+    """
+    An error response pre-rendered to JSON bytes. Only the placeholder values
+    are encoded when rendering, and responses without placeholders are
+    returned as they are.
+    """
+
+    def __init__(self, template: ErrorTemplate) -> None:
+        self.status = template.status
+
+        error_msg = template.error_msg.format_map(
+            {name: f"\x00{name}\x00" for name in template.fields})
+
+        body = {"error_type": template.error_type, "error_msg": error_msg}
+        body.update({name: f"\x01{name}\x01" for name in template.fields})
+
+        # matches the output of DRF's JSONRenderer
+        rendered = json.dumps(body, ensure_ascii=False, separators=(",", ":"))
+
+        self._parts: List[bytes] = []
+        self._slots: List[Tuple[str, bool]] = []  # (field, is whole value)
+        pos = 0
+
+        for match in sorted([*_VALUE_MARKER.finditer(rendered),
+                             *_STRING_MARKER.finditer(rendered)],
+                            key=lambda m: m.start()):
+
+            self._parts.append(rendered[pos:match.start()].encode())
+            self._slots.append((match.group(1),
+                                match.re is _VALUE_MARKER))
+            pos = match.end()
+
+        self._tail = rendered[pos:].encode()
+        self._static = self._tail if not self._slots else None
+
+    def render(self, values: Dict) -> bytes:
+        if self._static is not None:
+            return self._static
+
+        chunks = []
+
+        for part, (name, whole) in zip(self._parts, self._slots):
+            value = values[name]
+            encoded = json.dumps(value, ensure_ascii=False)
+
+            if not whole and isinstance(value, str):
+                encoded = encoded[1:-1]  # inside a JSON string
+
+            chunks.append(part)
+            chunks.append(encoded.encode())
+
+        chunks.append(self._tail)
+        return b"".join(chunks)
+
+
+class ErrorCatalog:
+    def __init__(self, templates: Dict[ErrorId | str, ErrorTemplate]) -> None:
+        self._errors = {key: CompiledError(template)
+                        for key, template in templates.items()}
+
+    def response(self, key: ErrorId | str, **values) -> HttpResponse:
+        error = self._errors[key]
+
+        return HttpResponse(error.render(values), status=error.status,
+                            content_type="application/json")
+
+
+ORDER_ERRORS = ErrorCatalog({
+    ErrorId.INVALID_ID: ErrorTemplate(
+        status.HTTP_400_BAD_REQUEST, "invalid-product",
+        ("در سبد خرید شما، کالای نامعتبر وجود دارد. "
+         "لطفا کالاها را از سبد خرید حذف و "
+         "دوباره اقدام به خرید کنید.")),
+
+    ErrorId.NO_PRODUCT_HANDLER: ErrorTemplate(
+        status.HTTP_501_NOT_IMPLEMENTED, "no-product-handler",
+        ("به دلیل مشکل فنی، امکان خرید محصول "
+         "«{product_title}» "
+         "وجود ندارد. "),
+        ("product_title",)),
+
+    ErrorId.OUT_OF_STOCK: ErrorTemplate(
+        status.HTTP_404_NOT_FOUND, "out-of-stock",
+        ("موجودی محصول "
+         "«{product_title}» "
+         "به اتمام رسیده است"),
+        ("product_title",)),
+
+    ErrorId.LOW_STOCK: ErrorTemplate(
+        status.HTTP_404_NOT_FOUND, "low-stock",
+        ("موجودی محصول «{product_title}» "
+         "برابر با {stock} عدد می‌باشد"),
+        ("product_title", "stock")),
+
+    ErrorId.SAVE_ERROR: ErrorTemplate(
+        status.HTTP_500_INTERNAL_SERVER_ERROR, "save-error",
+        ("ثبت سفارش امکان‌پذیر نیست. "
+         "لطفا دوباره اقدام کنید.")),
+
+    "validation": ErrorTemplate(
+        status.HTTP_400_BAD_REQUEST, "validation",
+        "داده‌های واردشده نامعتبر است"),
+
+    "submit-error": ErrorTemplate(
+        status.HTTP_500_INTERNAL_SERVER_ERROR, "submit-error",
+        "ثبت داده‌ها با مشکل مواجه شد"),
+})
@@ -0,0 +1,69 @@
+from typing import AsyncIterator, Dict
+import asyncio
+import json
+
+from django.conf import settings
+from django.http import (HttpRequest, HttpResponse, HttpResponseBadRequest,
+                         StreamingHttpResponse)
+from ipware import get_client_ip
+
+from restapi.base.shop.stock_events import StockEventHub
+
+import logging
+logger = logging.getLogger(__name__)
+
+MAX_PRODUCTS = 100
+
+
+async def stock_events(request: HttpRequest) -> HttpResponse:
+    """
+    Server-sent events with the stock of the requested products
+    (?product_ids=1,2,3), e.g. the products in the user's cart. Each event is
+    a JSON object mapping product ids to their current stock. This view must
+    be served by an async (ASGI) worker.
+    """
+
+    try:
+        product_ids = {int(product_id) for product_id in
+                       request.GET.get("product_ids", "").split(",")}
+    except ValueError:
+        product_ids = set()
+
+    if not product_ids or len(product_ids) > MAX_PRODUCTS:
+        logger.info("[IP: {}] [CLIENT_ERROR] Invalid data - {}"
+                    .format(get_client_ip(request)[0], request.GET))
+
+        return HttpResponseBadRequest()
+
+    response = StreamingHttpResponse(_stream(product_ids),
+                                     content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # disable proxy buffering (nginx)
+
+    return response
+
+
+def _event(stocks: Dict[int, int]) -> str:
+    return f"data: {json.dumps(stocks)}\n\n"
+
+
+async def _stream(product_ids) -> AsyncIterator[str]:
+    hub = StockEventHub.getInstance()
+    heartbeat = getattr(settings, "STOCK_EVENTS_HEARTBEAT", 15)
+    subscription = hub.subscribe(product_ids)
+
+    try:
+        stocks = await hub.getStocks(product_ids)
+
+        if stocks:
+            yield _event(stocks)
+
+        while True:
+            try:
+                stocks = await asyncio.wait_for(subscription.get(),
+                                                timeout=heartbeat)
+                yield _event(stocks)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+    finally:
+        hub.unsubscribe(subscription)